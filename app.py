@@ -1,74 +1,209 @@
 
+import time
+STARTED = time.perf_counter()
+
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
-import qrcode
-from PIL import Image, ImageTk
-import random
 import datetime
 import json
 import os
-from receipt_template import ReceiptGenerator
+import queue
+import sys
+import threading
+from receipt_queue import ReceiptRenderQueue
+from promptpay import PromptPayPayload
+from qr_renderer import QRImageCache
+from thumbnails import ThumbnailCache, ThumbnailStore
+from product_catalog import ALL_CATEGORIES
+from product_grid import VirtualProductGrid
+from render_scheduler import RenderScheduler
+from report_view import ListSummaries, StoreSummaries, VirtualSalesTree
+from barcode_scanner import BarcodeScanner
+from sales_engine import SalesEngine, OutOfStock
+from sales_search import parse_query, report_period
+from startup_timer import StartupTimer
+from metrics import metrics
 
 class PaymaApp:
-    def __init__(self, root):
+    def __init__(self, root, timer=None):
         self.root = root
+        self.timer = timer
         self.root.title("Payma - ระบบจัดการการขาย")
         self.root.geometry("1000x750")
         self.root.configure(bg='#f5f6fa')
         
-        # ข้อมูลสินค้า
-        self.products = [
-            {"id": 1, "name": "น้ำดื่ม", "price": 10, "category": "เครื่องดื่ม", "stock": 100},
-            {"id": 2, "name": "ขนมปัง", "price": 15, "category": "อาหาร", "stock": 50},
-            {"id": 3, "name": "นม", "price": 20, "category": "เครื่องดื่ม", "stock": 80},
-            {"id": 4, "name": "กาแฟ", "price": 25, "category": "เครื่องดื่ม", "stock": 60},
-            {"id": 5, "name": "บะหมี่กึ่งสำเร็จรูป", "price": 12, "category": "อาหาร", "stock": 120},
-            {"id": 6, "name": "น้ำอัดลม", "price": 18, "category": "เครื่องดื่ม", "stock": 90},
-            {"id": 7, "name": "ผลไม้", "price": 30, "category": "อาหาร", "stock": 40},
-            {"id": 8, "name": "ช็อคโกแลต", "price": 22, "category": "ขนม", "stock": 70},
-            {"id": 9, "name": "ข้าวกล่อง", "price": 45, "category": "อาหาร", "stock": 30},
-            {"id": 10, "name": "น้ำผลไม้", "price": 25, "category": "เครื่องดื่ม", "stock": 85}
-        ]
-        
-        # รายการสินค้าในตะกร้า
-        self.cart = []
-        
-        # ประวัติการขาย
-        self.sales_history = []
-        self.load_sales_history()
-        
-        # ระบบสร้างใบเสร็จ
-        self.receipt_generator = ReceiptGenerator()
-        
-        # สร้างโฟลเดอร์สำหรับบันทึกไฟล์
-        self.create_data_folders()
+        # ขั้นตอนการขาย (สินค้า ตะกร้า ประวัติการขาย การตั้งค่า ใบเสร็จ) ไม่ขึ้นกับหน้าจอ
+        self.engine = SalesEngine('data', 'receipts', sales_backend='sqlite', load_history=False)
+        self.catalog = self.engine.catalog
+        self.products = self.catalog.products
+        self.cart = self.engine.cart
+        self.settings = self.engine.settings
+        os.makedirs('reports', exist_ok=True)
+        self.mark_startup("สร้าง SalesEngine")
+        
+        # โหลดประวัติการขายในเธรดพื้นหลัง หน้าจอแสดงสินค้าได้ทันที สถิติจะเติมเมื่อโหลดเสร็จ
+        self.history_ready = False
+        self.history_error = None
+        self.first_painted = False
+        self.history_events = queue.Queue()
+        self.after_history = None
+        self.history_thread = threading.Thread(target=self._load_history, name="sales-history",
+                                               daemon=True)
+        self.history_thread.start()
+        
+        # รวมใบเสร็จของวันก่อน ๆ เป็น archive (เริ่มหลังโหลดประวัติเสร็จ)
+        self.archive_thread = None
+        self.archive_cancel = threading.Event()
+        self.archive_events = queue.Queue()
+        
+        # การส่งออกรายงานในเธรดพื้นหลัง
+        self.report_thread = None
+        self.report_cancel = threading.Event()
+        self.report_events = queue.Queue()
+        
+        # ข้อมูลวิเคราะห์แบบคอลัมน์ (โหลดในเธรดพื้นหลังเมื่อเปิดหน้ารายงานครั้งแรก)
+        self.analytics = None
+        self.analytics_thread = None
+        self.analytics_pending = []
+        self.analytics_events = queue.Queue()
+        
+        # QR พร้อมเพย์ (สร้างภาพในเธรดพื้นหลัง และแคชตาม payload)
+        self.qr_cache = QRImageCache(self.root, size=200)
+        self._promptpay = None
+        
+        # ภาพย่อสินค้า (ย่อในเธรดพื้นหลัง เก็บบนดิสก์ใน data/thumbnails และใน RAM ไม่เกิน 16 MB)
+        self.thumbnails = ThumbnailCache(self.root, ThumbnailStore(os.path.join('data', 'thumbnails')),
+                                         size=(64, 64), budget_bytes=16 * 1024 * 1024)
+        
+        # ระบบสร้างใบเสร็จ (สร้าง PDF ในเธรดพื้นหลัง)
+        self.receipt_queue = ReceiptRenderQueue(
+            self.root, workers=2, max_pending=32,
+            generator_factory=self.engine.new_receipt_generator)
+        
+        # เวลาแฝงของขั้นตอนสำคัญ ส่งออกเป็น data/metrics.json ทุกนาที
+        self.metrics_path = os.path.join('data', 'metrics.json')
+        metrics.start_export(self.metrics_path, interval=60)
+        self.profile_next_checkout = False
         
         # สร้าง UI
         self.create_widgets()
+        self.mark_startup("สร้างหน้าจอ")
+        
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.root.after(50, self._poll_history)
+        if self.timer is not None:
+            self.root.after_idle(self._on_first_paint)
         
-    def create_data_folders(self):
-        """สร้างโฟลเดอร์สำหรับเก็บข้อมูล"""
-        folders = ['receipts', 'data', 'reports']
-        for folder in folders:
-            if not os.path.exists(folder):
-                os.makedirs(folder)
+    @property
+    def sales_store(self):
+        return self.engine.sales_store
+    
+    def mark_startup(self, name):
+        if self.timer is not None:
+            self.timer.mark(name)
+    
+    def _on_first_paint(self):
+        self.mark_startup("แสดงหน้าจอครั้งแรก")
+        self.first_painted = True
+        self._finish_startup_timing()
     
-    def load_sales_history(self):
-        """โหลดประวัติการขายจากไฟล์"""
+    def _finish_startup_timing(self):
+        """โหมดจับเวลา: รายงานผลและปิดโปรแกรมเมื่อหน้าจอแสดงและโหลดประวัติเสร็จแล้ว"""
+        if self.first_painted and self.history_ready:
+            self.timer.report()
+            self.root.after(0, self.on_close)
+    
+    def run_ui_burst(self, adds=200, switches=30, file=None):
+        """--ui-burst: เพิ่มสินค้าติดกันแบบเครื่องสแกนแล้วสลับเมนูรัวๆ รายงานเวลาวาดหน้าจอแล้วปิดโปรแกรม"""
+        if not self.history_ready:
+            self.root.after(100, self.run_ui_burst, adds, switches, file)
+            return
+        self.scanner.enabled = True     # ไม่แสดงหน้าต่างแจ้งเตือนระหว่างเพิ่มสินค้า
+        products = [product for product in self.products if product.get('stock', 0) > 0] or self.products
+        # คิวเหตุการณ์ทั้งหมดพร้อมกัน เหมือนเครื่องสแกนส่งบาร์โค้ดติดกัน
+        for i in range(adds):
+            self.root.after(0, self.add_to_cart, products[i % len(products)])
+        steps = [self.show_reports, self.show_settings, self.show_home] * (switches // 3)
+        
+        def next_step():
+            if steps:
+                steps.pop(0)()
+                self.root.after(10, next_step)
+                return
+            if self.cart:
+                self.engine.clear_cart()
+                self.scheduler.invalidate('cart', 'grid')
+            self.scheduler.flush()
+            snapshot = metrics.snapshot()
+            out = file or sys.stderr
+            print(f"เวลาวาดหน้าจอ (เพิ่มสินค้า {adds} ครั้ง สลับเมนู {switches} ครั้ง):", file=out)
+            for name, timing in snapshot['timings'].items():
+                if name.startswith(('ui_', 'screen_switch')):
+                    print(f"  {name:28s} {timing['count']:6,} ครั้ง  p50 {timing['p50_ms']:8.2f} ms  "
+                          f"p95 {timing['p95_ms']:8.2f} ms  สูงสุด {timing['max_ms']:8.2f} ms", file=out)
+            counters = snapshot['counters']
+            print(f"  invalidate {counters.get('ui_invalidations', 0):,} ครั้ง วาดจริง "
+                  f"{counters.get('ui_frames', 0):,} รอบ", file=out)
+            self.on_close()
+        
+        self.root.after(0, next_step)
+    
+    def _load_history(self):
+        """ทำงานในเธรดพื้นหลัง: เปิดที่เก็บประวัติ (รวมการย้ายข้อมูลครั้งแรก)"""
+        try:
+            self.engine.load_sales_history()
+            self.history_events.put(('done', None))
+        except Exception as e:
+            self.history_events.put(('error', e))
+    
+    def _poll_history(self):
+        if self.history_ready or self.history_error is not None:
+            return
         try:
-            if os.path.exists('data/sales_history.json'):
-                with open('data/sales_history.json', 'r', encoding='utf-8') as f:
-                    self.sales_history = json.load(f)
-        except:
-            self.sales_history = []
-    
-    def save_sales_history(self):
-        """บันทึกประวัติการขายลงไฟล์"""
+            event, error = self.history_events.get_nowait()
+        except queue.Empty:
+            self.root.after(50, self._poll_history)
+            return
+        if event == 'error':
+            self.history_error = error
+            self.set_status("โหลดประวัติการขายไม่สำเร็จ")
+            messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถโหลดประวัติการขายได้: {str(error)}")
+            return
+        self.history_ready = True
+        self.mark_startup("โหลดประวัติการขาย")
+        self.update_stats()
+        self.start_archiver()
+        self.start_sync()
+        if self.after_history is not None:
+            callback, self.after_history = self.after_history, None
+            callback()
+        if self.timer is not None:
+            self._finish_startup_timing()
+    
+    def wait_for_history(self):
+        """รอให้โหลดประวัติเสร็จ (ใช้ก่อนบันทึกการขาย) คืนค่า False ถ้าโหลดไม่สำเร็จ"""
+        if not self.history_ready:
+            self.set_status("กำลังโหลดประวัติการขาย ...")
+            self.history_thread.join()
+            self._poll_history()
+        return self.history_ready
+    
+    def on_close(self):
+        """ปิดโปรแกรม: รอใบเสร็จที่ค้างในคิวและปิดที่เก็บประวัติก่อนออก"""
+        self.receipt_queue.shutdown()
+        self.qr_cache.shutdown()
+        self.thumbnails.shutdown()
+        self.history_thread.join()
+        if self.archive_thread is not None:
+            self.archive_cancel.set()
+            self.archive_thread.join()
+        # ปิดที่เก็บข้อมูลก่อน: เขียนไฟล์ metrics ไม่ได้ (ดิสก์เต็ม) ต้องไม่ทำให้ข้อมูลการขายไม่ถูกบันทึก
+        self.engine.close()
         try:
-            with open('data/sales_history.json', 'w', encoding='utf-8') as f:
-                json.dump(self.sales_history, f, ensure_ascii=False, indent=2)
-        except:
+            metrics.stop_export(self.metrics_path)
+        except OSError:
             pass
+        self.root.destroy()
     
     def create_widgets(self):
         # ส่วนหัว
@@ -95,43 +230,84 @@ class PaymaApp:
                            relief=tk.FLAT)
             btn.pack(side=tk.LEFT, padx=5, pady=5)
         
+        # โหมดเครื่องสแกนบาร์โค้ด (เพิ่มสินค้าโดยไม่แสดงหน้าต่างแจ้งเตือน)
+        self.scanner = BarcodeScanner(self.root, self.on_barcode_scanned)
+        self.scanner_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(menu_frame, text="🔎 โหมดสแกนบาร์โค้ด", variable=self.scanner_var,
+                      command=self.toggle_scanner_mode, bg='#34495e', fg='white',
+                      selectcolor='#2c3e50', activebackground='#34495e',
+                      font=("TH Sarabun New", 12)).pack(side=tk.RIGHT, padx=5, pady=5)
+        
+        # แถบสถานะด้านล่าง (แจ้งผลแบบไม่ต้องกดปิด)
+        self.status_label = tk.Label(self.root, text="พร้อมใช้งาน", anchor='w',
+                                    font=("TH Sarabun New", 11), bg='#dfe4ea', fg='#2c3e50')
+        self.status_label.pack(side=tk.BOTTOM, fill=tk.X)
+        
         # เฟรมหลัก
         self.main_frame = tk.Frame(self.root, bg='#f5f6fa')
         self.main_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
         
+        # หน้าจอที่สร้างแล้วเก็บไว้สลับแสดง (ไม่ทำลายแล้วสร้างใหม่ทุกครั้งที่กดเมนู)
+        self.screens = {}
+        self.current_screen = None
+        self.diagnostics_job = None
+        
+        # ส่วนที่ข้อมูลเปลี่ยนจะถูกวาดใหม่รวมกันครั้งเดียวเมื่อ Tk ว่าง
+        self.scheduler = RenderScheduler(self.root)
+        self.scheduler.register('cart', self.render_cart)
+        self.scheduler.register('grid', lambda: self.product_grid.refresh())
+        self.scheduler.register('stats', self.update_stats)
+        
         # แสดงหน้าหลัก
         self.show_home()
     
+    def show_screen(self, name, build, refresh=None):
+        """แสดงหน้าจอ name แทนหน้าจอเดิม สร้างด้วย build(เฟรม) ครั้งแรกครั้งเดียว แล้วเรียก refresh ทุกครั้ง"""
+        started = time.perf_counter()
+        self.after_history = None
+        if self.current_screen is not None:
+            self.screens[self.current_screen].pack_forget()
+        frame = self.screens.get(name)
+        if frame is None:
+            frame = self.screens[name] = tk.Frame(self.main_frame, bg='#f5f6fa')
+            build(frame)
+        self.current_screen = name
+        if refresh is not None:
+            refresh()
+        frame.pack(fill=tk.BOTH, expand=True)
+        # เวลาจนถึงรอบว่างถัดไป (รวมการจัดวางวิดเจ็ตของหน้าจอ)
+        self.root.after_idle(lambda: metrics.record('screen_switch.' + name, time.perf_counter() - started))
+    
     def show_home(self):
         """แสดงหน้าหลัก"""
-        self.clear_main_frame()
-        
-        # สร้างเฟรมสำหรับหน้าหลัก
-        home_frame = tk.Frame(self.main_frame, bg='#f5f6fa')
-        home_frame.pack(fill=tk.BOTH, expand=True)
-        
+        self.show_screen('home', self.build_home, self.refresh_home)
+    
+    def refresh_home(self):
+        self.scheduler.invalidate('cart', 'grid', 'stats')
+    
+    def build_home(self, home_frame):
         # สถิติรวดเร็ว
         stats_frame = tk.Frame(home_frame, bg='#ffffff', relief=tk.RAISED, bd=1)
         stats_frame.pack(fill=tk.X, padx=10, pady=10)
         
-        # สถิติ
-        today_sales = sum(sale['total'] for sale in self.sales_history 
-                         if sale['date'].startswith(datetime.datetime.now().strftime("%Y-%m-%d")))
-        
+        # สถิติ (ยอดวันนี้จะเติมเมื่อโหลดประวัติการขายเสร็จ)
         stats_data = [
-            ("💰 ยอดขายวันนี้", f"{today_sales:,.2f} บาท"),
-            ("📦 สินค้าทั้งหมด", f"{len(self.products)} รายการ"),
-            ("🛒 การขายวันนี้", f"{len([s for s in self.sales_history if s['date'].startswith(datetime.datetime.now().strftime('%Y-%m-%d'))])} รายการ")
+            ("sales", "💰 ยอดขายวันนี้"),
+            ("products", "📦 สินค้าทั้งหมด"),
+            ("count", "🛒 การขายวันนี้")
         ]
         
-        for i, (title, value) in enumerate(stats_data):
+        self.stats_labels = {}
+        for i, (key, title) in enumerate(stats_data):
             stat_frame = tk.Frame(stats_frame, bg=['#e8f6f3', '#fdedec', '#f4ecf7'][i])
             stat_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5, pady=10)
             
             tk.Label(stat_frame, text=title, font=("TH Sarabun New", 12), 
                     bg=stat_frame['bg']).pack(pady=(5, 0))
-            tk.Label(stat_frame, text=value, font=("TH Sarabun New", 16, "bold"), 
-                    bg=stat_frame['bg']).pack(pady=(0, 5))
+            self.stats_labels[key] = tk.Label(stat_frame, text="กำลังโหลด...", 
+                                             font=("TH Sarabun New", 16, "bold"), 
+                                             bg=stat_frame['bg'])
+            self.stats_labels[key].pack(pady=(0, 5))
         
         # เฟรมเนื้อหาหลัก
         content_frame = tk.Frame(home_frame, bg='#f5f6fa')
@@ -154,12 +330,12 @@ class PaymaApp:
         tk.Label(category_frame, text="หมวดหมู่:", font=("TH Sarabun New", 12), 
                 bg='#ecf0f1').pack(side=tk.LEFT, padx=(0, 10))
         
-        categories = ["ทั้งหมด"] + list(set([p["category"] for p in self.products]))
+        categories = [ALL_CATEGORIES] + self.catalog.categories()
         self.category_var = tk.StringVar()
         self.category_combo = ttk.Combobox(category_frame, textvariable=self.category_var, 
                                          values=categories, state="readonly", 
                                          font=("TH Sarabun New", 12))
-        self.category_combo.set("ทั้งหมด")
+        self.category_combo.set(ALL_CATEGORIES)
         self.category_combo.pack(side=tk.LEFT, fill=tk.X, expand=True)
         self.category_combo.bind('<<ComboboxSelected>>', self.filter_products)
         
@@ -170,15 +346,12 @@ class PaymaApp:
         self.product_canvas = tk.Canvas(product_canvas_frame, bg='#ffffff')
         self.product_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         
-        scrollbar = tk.Scrollbar(product_canvas_frame, orient="vertical", 
-                               command=self.product_canvas.yview)
+        scrollbar = tk.Scrollbar(product_canvas_frame, orient="vertical")
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        self.product_frame = tk.Frame(self.product_canvas, bg='#ffffff')
-        self.product_canvas.create_window((0, 0), window=self.product_frame, anchor="nw")
-        
-        self.product_frame.bind("<Configure>", self.on_frame_configure)
-        self.product_canvas.configure(yscrollcommand=scrollbar.set)
+        # ตารางสินค้าแบบสร้างปุ่มเฉพาะแถวที่มองเห็น
+        self.product_grid = VirtualProductGrid(self.product_canvas, scrollbar, self.add_to_cart,
+                                               thumbnails=self.thumbnails)
         
         # สร้างปุ่มสินค้า
         self.create_product_buttons()
@@ -245,66 +418,380 @@ class PaymaApp:
                                 height=8, relief=tk.SUNKEN, bd=1)
         self.qr_label.pack(fill=tk.BOTH, expand=True)
     
+    def update_stats(self):
+        """เติมสถิติบนหน้าหลัก (ถ้าสร้างหน้าหลักแล้วและโหลดประวัติเสร็จแล้ว)"""
+        labels = getattr(self, 'stats_labels', None)
+        if not labels:
+            return
+        labels['products'].config(text=f"{len(self.products)} รายการ")
+        if not self.history_ready:
+            return
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        today_count, today_sales = self.sales_store.daily_summary(today)
+        labels['sales'].config(text=f"{today_sales:,.2f} บาท")
+        labels['count'].config(text=f"{today_count} รายการ")
+    
     def show_reports(self):
         """แสดงหน้ารายงาน"""
-        self.clear_main_frame()
-        
-        report_frame = tk.Frame(self.main_frame, bg='#f5f6fa')
-        report_frame.pack(fill=tk.BOTH, expand=True)
-        
+        if not self.history_ready:
+            self.show_screen('loading', self.build_loading)
+            self.after_history = self.show_reports
+            return
+        self.show_screen('reports', self.build_reports, self.refresh_reports)
+    
+    def build_loading(self, frame):
+        tk.Label(frame, text="กำลังโหลดประวัติการขาย...", 
+                font=("TH Sarabun New", 18), bg='#f5f6fa').pack(pady=40)
+    
+    def refresh_reports(self):
+        """เติมข้อมูลล่าสุดลงหน้ารายงานที่สร้างไว้แล้ว"""
+        # สรุปยอดวันนี้จากยอดสรุปรายวัน/รายสินค้า
+        today = datetime.datetime.now().strftime("%Y-%m-%d")
+        today_count, today_sales = self.sales_store.daily_summary(today)
+        top_products = self.sales_store.product_summary(today)[:3]
+        summary_text = f"สรุปวันนี้: {today_count} รายการ / {today_sales:,.2f} บาท"
+        if top_products:
+            summary_text += "   ขายดี: " + ", ".join(
+                f"{name} ({quantity})" for _, name, quantity, _ in top_products)
+        self.today_summary_label.config(text=summary_text)
+        
+        # ยอดรวมทุกเครื่องจากเซิร์ฟเวอร์รวมยอด (ถ้าตั้งค่าไว้)
+        if self.engine.sync_client is not None:
+            self.store_summary_label.config(text="ยอดรวมทุกเครื่องวันนี้: กำลังโหลด...")
+            self.store_summary_label.pack(after=self.today_summary_label, pady=(0, 10))
+            self.run_in_background(lambda: self.engine.sync_client.summary(today),
+                                   self.show_store_summary, self.on_store_summary_error)
+        else:
+            self.store_summary_label.pack_forget()
+        
+        # ตารางแสดงประวัติทั้งหมดต่อ (ผลการค้นหาที่ค้างไว้ไม่เปลี่ยน) ถ้ามีการขายใหม่ให้อ่านใหม่
+        source = self.sales_view.source
+        if not self.report_search_entry.get().strip() and (
+                not isinstance(source, StoreSummaries) or len(source) != self.sales_store.count()):
+            self.sales_view.set_source(StoreSummaries(self.sales_store))
+        self.show_analytics()
+    
+    def build_reports(self, report_frame):
         tk.Label(report_frame, text="📊 รายงานการขาย", 
                 font=("TH Sarabun New", 24, "bold"), bg='#f5f6fa').pack(pady=20)
         
-        # สร้าง Treeview สำหรับแสดงรายงาน
-        columns = ("date", "receipt_no", "items", "total")
-        tree = ttk.Treeview(report_frame, columns=columns, show="headings", height=15)
+        self.today_summary_label = tk.Label(report_frame, text="", font=("TH Sarabun New", 14), 
+                                            bg='#f5f6fa', fg='#2c3e50')
+        self.today_summary_label.pack(pady=(0, 10))
+        self.store_summary_label = tk.Label(report_frame, text="", 
+                                           font=("TH Sarabun New", 14), bg='#f5f6fa', fg='#2c3e50')
+        
+        # ค้นหาประวัติการขาย (เลขที่ใบเสร็จ วันที่ ชื่อ/รหัสสินค้า)
+        search_frame = tk.Frame(report_frame, bg='#f5f6fa')
+        search_frame.pack(fill=tk.X, padx=20)
+        
+        tk.Label(search_frame, text="ค้นหา:", font=("TH Sarabun New", 14), 
+                bg='#f5f6fa').pack(side=tk.LEFT, padx=(0, 5))
+        search_entry = tk.Entry(search_frame, font=("TH Sarabun New", 12), width=40)
+        search_entry.pack(side=tk.LEFT, padx=(0, 10))
+        self.report_search_entry = search_entry
+        tk.Label(search_frame, text="เช่น PM20261018, 2026-10, 7วัน, น้ำดื่ม, id:5", 
+                font=("TH Sarabun New", 11), bg='#f5f6fa', fg='#7f8c8d').pack(side=tk.RIGHT)
+        
+        # สร้าง Treeview สำหรับแสดงรายงาน (อ่านเฉพาะแถวที่มองเห็นจากประวัติทั้งหมด)
+        tree_frame = tk.Frame(report_frame, bg='#f5f6fa')
+        tree_frame.pack(fill=tk.X, padx=20, pady=10)
+        
+        columns = ("date", "receipt_no", "item_count", "total")
+        tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=12)
         
         tree.heading("date", text="วันที่")
         tree.heading("receipt_no", text="เลขที่ใบเสร็จ")
-        tree.heading("items", text="จำนวนรายการ")
+        tree.heading("item_count", text="จำนวนรายการ")
         tree.heading("total", text="ยอดรวม (บาท)")
         
         tree.column("date", width=120)
         tree.column("receipt_no", width=100)
-        tree.column("items", width=100)
+        tree.column("item_count", width=100)
         tree.column("total", width=100)
         
-        # เพิ่มข้อมูล
-        for sale in self.sales_history[-20:]:  # แสดง 20 รายการล่าสุด
-            tree.insert("", "end", values=(
-                sale['date'],
-                sale['receipt_no'],
-                len(sale['items']),
-                f"{sale['total']:,.2f}"
-            ))
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        tree.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # เพิ่มข้อมูล (เรียงจากใหม่ไปเก่า คลิกหัวคอลัมน์เพื่อเรียงใหม่)
+        self.sales_view = VirtualSalesTree(tree, scrollbar)
+        
+        search_entry.bind('<Return>', lambda e: self.search_sales(search_entry.get()))
+        search_btn = tk.Button(search_frame, text="🔍 ค้นหา", 
+                              command=lambda: self.search_sales(search_entry.get()),
+                              bg='#3498db', fg='white', font=("TH Sarabun New", 12))
+        search_btn.pack(side=tk.LEFT)
+        
+        # พิมพ์ใบเสร็จซ้ำ (เลือกจากตารางหรือพิมพ์เลขที่ใบเสร็จ)
+        reprint_frame = tk.Frame(report_frame, bg='#f5f6fa')
+        reprint_frame.pack(pady=(0, 5))
         
-        tree.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+        tk.Label(reprint_frame, text="เลขที่ใบเสร็จ:", font=("TH Sarabun New", 14), 
+                bg='#f5f6fa').pack(side=tk.LEFT, padx=(0, 5))
+        self.reprint_entry = tk.Entry(reprint_frame, font=("TH Sarabun New", 12), width=20)
+        self.reprint_entry.pack(side=tk.LEFT, padx=(0, 10))
+        self.reprint_entry.bind('<Return>', lambda e: self.reprint_receipt())
+        tree.bind('<<TreeviewSelect>>', lambda e: self.select_reprint(tree))
+        
+        reprint_btn = tk.Button(reprint_frame, text="🖨️ พิมพ์ซ้ำ", command=self.reprint_receipt,
+                               bg='#e67e22', fg='white', font=("TH Sarabun New", 12))
+        reprint_btn.pack(side=tk.LEFT)
         
         # ปุ่มส่งออกรายงาน
-        export_btn = tk.Button(report_frame, text="📤 ส่งออกรายงาน PDF", 
+        export_frame = tk.Frame(report_frame, bg='#f5f6fa')
+        export_frame.pack(pady=10)
+        
+        tk.Label(export_frame, text="ช่วงเวลา:", font=("TH Sarabun New", 14), 
+                bg='#f5f6fa').pack(side=tk.LEFT, padx=(0, 5))
+        self.report_period_combo = ttk.Combobox(export_frame, values=list(self.REPORT_PERIODS), 
+                                                state="readonly", width=12, 
+                                                font=("TH Sarabun New", 12))
+        self.report_period_combo.set("เดือนนี้")
+        self.report_period_combo.pack(side=tk.LEFT, padx=(0, 10))
+        self.report_period_combo.bind('<<ComboboxSelected>>', lambda e: self.show_analytics())
+        
+        export_btn = tk.Button(export_frame, text="📤 ส่งออกรายงาน PDF", 
                               command=self.export_report, bg='#27ae60', fg='white',
                               font=("TH Sarabun New", 14))
-        export_btn.pack(pady=10)
+        export_btn.pack(side=tk.LEFT)
+        
+        self.report_progress = ttk.Progressbar(export_frame, length=200, mode='determinate')
+        self.report_progress.pack(side=tk.LEFT, padx=10)
+        
+        cancel_btn = tk.Button(export_frame, text="ยกเลิก", command=self.cancel_report,
+                              bg='#e74c3c', fg='white', font=("TH Sarabun New", 12))
+        cancel_btn.pack(side=tk.LEFT)
+        
+        # บทวิเคราะห์ของช่วงเวลาที่เลือก: สินค้าขายดี หมวดหมู่ และช่วงเวลาที่ขายดี
+        analytics_frame = tk.Frame(report_frame, bg='#f5f6fa')
+        analytics_frame.pack(fill=tk.BOTH, expand=True, padx=20, pady=(0, 10))
+        self.analytics_labels = []
+        for title in ("🏆 สินค้าขายดี", "📦 ยอดตามหมวดหมู่", "🕒 ช่วงเวลาที่ขายดี"):
+            column = tk.LabelFrame(analytics_frame, text=title, font=("TH Sarabun New", 14, "bold"),
+                                   bg='white', padx=10, pady=5)
+            column.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=5)
+            label = tk.Label(column, text="กำลังโหลด...", font=("TH Sarabun New", 12),
+                             bg='white', justify=tk.LEFT, anchor='nw')
+            label.pack(fill=tk.BOTH, expand=True)
+            self.analytics_labels.append(label)
     
-    def show_settings(self):
-        """แสดงหน้าตั้งค่า"""
-        self.clear_main_frame()
+    def run_in_background(self, func, on_done, on_error):
+        """เรียก func ในเธรดพื้นหลัง แล้วเรียก on_done(ผลลัพธ์)/on_error(ข้อผิดพลาด) บนเธรดของ Tk"""
+        results = queue.Queue(maxsize=1)
+        
+        def work():
+            try:
+                results.put((on_done, func()))
+            except Exception as e:
+                results.put((on_error, e))
+        
+        def poll():
+            try:
+                callback, value = results.get_nowait()
+            except queue.Empty:
+                self.root.after(50, poll)
+                return
+            callback(value)
+        
+        threading.Thread(target=work, daemon=True).start()
+        self.root.after(50, poll)
+    
+    def show_store_summary(self, summary):
+        if not self.store_summary_label.winfo_exists():
+            return
+        count, total = summary['daily']
+        terminals = ", ".join(f"{name} {state['count']:,}" for name, state in sorted(summary['terminals'].items()))
+        pending = self.engine.sync_client.pending if self.engine.sync_client else 0
+        text = f"ยอดรวมทุกเครื่องวันนี้: {count} รายการ / {total:,.2f} บาท   ({terminals})"
+        if pending:
+            text += f"   รอส่ง {pending} รายการ"
+        self.store_summary_label.config(text=text)
+    
+    def on_store_summary_error(self, error):
+        if self.store_summary_label.winfo_exists():
+            pending = self.engine.sync_client.pending if self.engine.sync_client else 0
+            self.store_summary_label.config(
+                text=f"ยอดรวมทุกเครื่อง: เชื่อมต่อเซิร์ฟเวอร์ไม่ได้ (รอส่ง {pending} รายการ)")
+    
+    def search_sales(self, text):
+        """ค้นหาประวัติการขายด้วยดัชนีของที่เก็บ (ค้นหาว่างแสดงประวัติทั้งหมด)"""
+        query = parse_query(text)
+        if not query:
+            source = StoreSummaries(self.sales_store)
+            self.sales_view.set_source(source)
+            self.set_status(f"แสดงประวัติการขายทั้งหมด {len(source):,} รายการ")
+            return
+        # ค้นในเธรดหน้าจอ: ใช้ดัชนีจึงเสร็จในไม่กี่มิลลิวินาที และไม่ต้องเปิด connection ใหม่ต่อการค้น
+        started = time.perf_counter()
+        try:
+            with metrics.timer('sales_search'):
+                rows = self.sales_store.search(query, limit=200)
+        except Exception as e:
+            self.set_status(f"ค้นหา \"{text.strip()}\" ไม่สำเร็จ: {e}")
+            return
+        elapsed = (time.perf_counter() - started) * 1000
+        self.sales_view.set_source(ListSummaries(rows))
+        more = " (แสดง 200 รายการล่าสุด)" if len(rows) == 200 else ""
+        self.set_status(f"ค้นหา \"{text.strip()}\": พบ {len(rows)} รายการ{more} ใน {elapsed:.1f} ms")
+    
+    def select_reprint(self, tree):
+        selection = tree.selection()
+        if selection:
+            self.reprint_entry.delete(0, tk.END)
+            self.reprint_entry.insert(0, tree.item(selection[0], 'values')[1])
+    
+    def reprint_receipt(self):
+        """พิมพ์ใบเสร็จซ้ำจาก archive (อ่านไฟล์ครั้งเดียว) หรือสร้างใหม่จากประวัติการขาย"""
+        receipt_no = self.reprint_entry.get().strip()
+        if not receipt_no:
+            messagebox.showwarning("แจ้งเตือน", "กรุณาเลือกหรือกรอกเลขที่ใบเสร็จ")
+            return
+        try:
+            path = self.engine.reprint(receipt_no)
+        except Exception as e:
+            messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถพิมพ์ใบเสร็จ {receipt_no} ซ้ำได้: {str(e)}")
+            return
+        if path is None:
+            messagebox.showwarning("แจ้งเตือน", f"ไม่พบใบเสร็จ {receipt_no}")
+        else:
+            self.set_status(f"พิมพ์ใบเสร็จ {receipt_no} ซ้ำเรียบร้อยแล้ว ({path})")
+    
+    def start_sync(self):
+        """เริ่มส่งการขายไปยังเซิร์ฟเวอร์รวมยอด (ถ้าตั้งค่า sync_server ไว้)"""
+        try:
+            if self.engine.start_sync() is not None:
+                self.set_status(f"ส่งยอดขายไปยังเซิร์ฟเวอร์ {self.settings['sync_server']}")
+        except ValueError:
+            messagebox.showwarning("แจ้งเตือน", "เซิร์ฟเวอร์รวมยอดต้องอยู่ในรูปแบบ host:port")
+    
+    def start_archiver(self):
+        """รวมใบเสร็จของวันที่ปิดแล้วเป็นไฟล์ archive ในเธรดพื้นหลัง"""
+        self.archive_thread = threading.Thread(target=self._archive_receipts, name="receipt-archive",
+                                               daemon=True)
+        self.archive_thread.start()
+        self.root.after(500, self._poll_archiver)
+    
+    def _archive_receipts(self):
+        try:
+            packed, days = self.engine.archive.pack_closed_days(
+                self.sales_store, cancelled=self.archive_cancel.is_set)
+            self.archive_events.put(('done', packed, days))
+        except Exception as e:
+            self.archive_events.put(('error', e))
+    
+    def _poll_archiver(self):
+        try:
+            event = self.archive_events.get_nowait()
+        except queue.Empty:
+            self.root.after(500, self._poll_archiver)
+            return
+        if event[0] == 'error':
+            self.set_status(f"รวมไฟล์ใบเสร็จไม่สำเร็จ: {str(event[1])}")
+        elif event[1]:
+            self.set_status(f"รวมใบเสร็จ {event[1]:,} ใบจาก {event[2]} วันเข้า archive แล้ว")
+    
+    def load_analytics(self):
+        """สร้างข้อมูลวิเคราะห์จากประวัติการขายในเธรดพื้นหลัง (ครั้งเดียว)"""
+        if self.analytics is not None or self.analytics_thread is not None:
+            return
+        # อ่านเฉพาะการขายที่มีอยู่ตอนนี้ การขายใหม่ระหว่างโหลดจะเก็บไว้ใน analytics_pending
+        upto = self.sales_store.count()
+        self.analytics_thread = threading.Thread(
+            target=self._build_analytics, args=(upto,), name="sales-analytics", daemon=True)
+        self.analytics_thread.start()
+        self.root.after(100, self._poll_analytics)
+    
+    def _build_analytics(self, upto):
+        try:
+            from sales_analytics import SalesAnalytics
+
+            self.analytics_events.put(('done', SalesAnalytics.from_store(self.sales_store, upto)))
+        except Exception as e:
+            self.analytics_events.put(('error', e))
+    
+    def _poll_analytics(self):
+        try:
+            event, value = self.analytics_events.get_nowait()
+        except queue.Empty:
+            self.root.after(100, self._poll_analytics)
+            return
+        self.analytics_thread = None
+        if event == 'error':
+            self.analytics_pending = []
+            self.set_status(f"ไม่สามารถโหลดข้อมูลวิเคราะห์ได้: {str(value)}")
+            return
+        value.append_sales(self.analytics_pending)
+        self.analytics_pending = []
+        self.analytics = value
+        self.show_analytics()
+    
+    def add_to_analytics(self, sale_data):
+        if self.analytics is not None:
+            self.analytics.append_sale(sale_data)
+        elif self.analytics_thread is not None:
+            self.analytics_pending.append(sale_data)
+    
+    def show_analytics(self):
+        """แสดงบทวิเคราะห์ของช่วงเวลาที่เลือกในหน้ารายงาน"""
+        if not getattr(self, 'analytics_labels', None) or not self.analytics_labels[0].winfo_exists():
+            return
+        if self.analytics is None:
+            self.load_analytics()
+            return
+        
+        start, end = report_period(self.REPORT_PERIODS[self.report_period_combo.get()])
+        top_label, category_label, hour_label = self.analytics_labels
         
-        settings_frame = tk.Frame(self.main_frame, bg='#f5f6fa')
-        settings_frame.pack(fill=tk.BOTH, expand=True)
+        top = self.analytics.top_products(10, start, end)
+        top_label.config(text="\n".join(
+            f"{rank}. {name}  {quantity:,} ชิ้น  {amount:,.2f} บาท"
+            for rank, (name, quantity, amount) in enumerate(top, 1)) or "ไม่มีข้อมูล")
         
+        categories = self.analytics.by_category(start, end)
+        category_label.config(text="\n".join(
+            f"{category}  {quantity:,} ชิ้น  {amount:,.2f} บาท"
+            for category, quantity, amount in categories) or "ไม่มีข้อมูล")
+        
+        counts, totals = self.analytics.by_hour(start, end)
+        busiest = [hour for hour in counts.argsort()[::-1][:5] if counts[hour]]
+        hour_label.config(text="\n".join(
+            f"{hour:02d}:00-{hour:02d}:59  {counts[hour]:,} ใบเสร็จ  {totals[hour]:,.2f} บาท"
+            for hour in busiest) or "ไม่มีข้อมูล")
+    
+    def show_settings(self):
+        """แสดงหน้าตั้งค่า"""
+        self.show_screen('settings', self.build_settings, self.refresh_settings)
+    
+    def refresh_settings(self):
+        # แสดงค่าที่บันทึกไว้ (ค่าที่แก้แต่ยังไม่บันทึกจะถูกยกเลิก)
+        for key, entry in self.settings_entries.items():
+            entry.delete(0, tk.END)
+            entry.insert(0, str(self.settings[key]))
+        if self.diagnostics_job is not None:
+            self.root.after_cancel(self.diagnostics_job)
+        self.refresh_diagnostics(self.diagnostics_tree)
+    
+    def build_settings(self, settings_frame):
         tk.Label(settings_frame, text="⚙️ ตั้งค่าระบบ", 
                 font=("TH Sarabun New", 24, "bold"), bg='#f5f6fa').pack(pady=20)
         
         # การตั้งค่าต่างๆ
         settings = [
-            ("🏪 ชื่อร้าน:", "Payma Store"),
-            ("📞 เบอร์โทร:", "02-123-4567"),
-            ("📧 อีเมล:", "info@payma.com"),
-            ("💳 ภาษี (%):", "7")
+            ("🏪 ชื่อร้าน:", "store_name"),
+            ("📍 ที่อยู่:", "address"),
+            ("📞 เบอร์โทร:", "phone"),
+            ("📧 อีเมล:", "email"),
+            ("💳 ภาษี (%):", "tax_rate"),
+            ("📱 พร้อมเพย์:", "promptpay_id"),
+            ("🧾 ใบเสร็จ (pdf/escpos):", "receipt_backend"),
+            ("🖨️ เครื่องพิมพ์:", "printer_target"),
+            ("🔄 เซิร์ฟเวอร์รวมยอด:", "sync_server"),
+            ("🏷️ ชื่อเครื่อง:", "terminal_id")
         ]
         
-        for i, (label, default) in enumerate(settings):
+        self.settings_entries = {}
+        for i, (label, key) in enumerate(settings):
             frame = tk.Frame(settings_frame, bg='#f5f6fa')
             frame.pack(fill=tk.X, padx=50, pady=5)
             
@@ -312,145 +799,283 @@ class PaymaApp:
                     bg='#f5f6fa', width=15, anchor='e').pack(side=tk.LEFT)
             
             entry = tk.Entry(frame, font=("TH Sarabun New", 14), width=30)
-            entry.insert(0, default)
             entry.pack(side=tk.LEFT, padx=10)
+            self.settings_entries[key] = entry
+        
+        save_btn = tk.Button(settings_frame, text="💾 บันทึกการตั้งค่า", 
+                            command=self.save_settings, bg='#27ae60', fg='white',
+                            font=("TH Sarabun New", 14))
+        save_btn.pack(pady=20)
+        
+        # การวินิจฉัย: เวลาแฝงล่าสุดของขั้นตอนสำคัญ (อัปเดตทุก 2 วินาทีขณะเปิดหน้านี้)
+        diag_frame = tk.LabelFrame(settings_frame, text="🩺 การวินิจฉัย", font=("TH Sarabun New", 14, "bold"),
+                                   bg='white', padx=10, pady=5)
+        diag_frame.pack(fill=tk.BOTH, expand=True, padx=50, pady=(0, 10))
+        columns = ("name", "count", "p50", "p95", "p99", "max")
+        tree = ttk.Treeview(diag_frame, columns=columns, show="headings", height=6)
+        for column, text, width in (("name", "ขั้นตอน", 180), ("count", "จำนวนครั้ง", 80),
+                                    ("p50", "p50 (ms)", 80), ("p95", "p95 (ms)", 80),
+                                    ("p99", "p99 (ms)", 80), ("max", "สูงสุด (ms)", 80)):
+            tree.heading(column, text=text)
+            tree.column(column, width=width, anchor='w' if column == "name" else 'e')
+        tree.pack(fill=tk.BOTH, expand=True)
+        self.diagnostics_tree = tree
+        
+        diag_buttons = tk.Frame(diag_frame, bg='white')
+        diag_buttons.pack(fill=tk.X, pady=(5, 0))
+        self.counters_label = tk.Label(diag_buttons, text="", font=("TH Sarabun New", 12),
+                                       bg='white', anchor='w')
+        self.counters_label.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        tk.Button(diag_buttons, text="🔬 จับโปรไฟล์การชำระเงินครั้งถัดไป", command=self.request_checkout_profile,
+                  bg='#8e44ad', fg='white', font=("TH Sarabun New", 12)).pack(side=tk.RIGHT)
+        tk.Button(diag_buttons, text="📤 ส่งออก", command=self.export_metrics,
+                  bg='#3498db', fg='white', font=("TH Sarabun New", 12)).pack(side=tk.RIGHT, padx=5)
     
-    def clear_main_frame(self):
-        """ล้างเฟรมหลัก"""
-        for widget in self.main_frame.winfo_children():
-            widget.destroy()
+    def refresh_diagnostics(self, tree):
+        # หยุดอัปเดตเมื่อออกจากหน้าตั้งค่า (เริ่มใหม่เมื่อกลับมา)
+        if self.current_screen != 'settings':
+            self.diagnostics_job = None
+            return
+        snapshot = metrics.snapshot()
+        tree.delete(*tree.get_children())
+        for name, timing in snapshot['timings'].items():
+            tree.insert("", tk.END, values=(name, f"{timing['count']:,}", f"{timing['p50_ms']:.2f}",
+                                            f"{timing['p95_ms']:.2f}", f"{timing['p99_ms']:.2f}",
+                                            f"{timing['max_ms']:.2f}"))
+        self.counters_label.config(text="   ".join(
+            f"{name}: {value:,}" for name, value in snapshot['counters'].items()))
+        self.diagnostics_job = self.root.after(2000, self.refresh_diagnostics, tree)
     
-    def on_frame_configure(self, event):
-        self.product_canvas.configure(scrollregion=self.product_canvas.bbox("all"))
+    def export_metrics(self):
+        try:
+            metrics.export(self.metrics_path)
+        except OSError as e:
+            messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถส่งออกค่าการวัดได้: {str(e)}")
+            return
+        self.set_status(f"ส่งออกค่าการวัดแล้ว: {self.metrics_path}")
     
-    def create_product_buttons(self):
-        """สร้างปุ่มสินค้า"""
-        for widget in self.product_frame.winfo_children():
-            widget.destroy()
-        
-        selected_category = self.category_combo.get()
-        if selected_category == "ทั้งหมด":
-            products_to_show = self.products
-        else:
-            products_to_show = [p for p in self.products if p["category"] == selected_category]
-        
-        row, col = 0, 0
-        for product in products_to_show:
-            product_frame = tk.Frame(self.product_frame, bg='#ecf0f1', relief=tk.RAISED, bd=1)
-            product_frame.grid(row=row, column=col, padx=5, pady=5, sticky="nsew")
-            
-            product_btn = tk.Button(product_frame, 
-                                   text=f"{product['name']}\n{product['price']} บาท\nคงเหลือ: {product['stock']}",
-                                   command=lambda p=product: self.add_to_cart(p),
-                                   bg='#3498db', fg='white', font=("TH Sarabun New", 10),
-                                   width=15, height=4)
-            product_btn.pack(padx=5, pady=5, fill=tk.BOTH, expand=True)
-            
-            col += 1
-            if col > 2:
-                col = 0
-                row += 1
+    def request_checkout_profile(self):
+        self.profile_next_checkout = True
+        self.set_status("จะจับโปรไฟล์ (cProfile) ในการชำระเงินครั้งถัดไป")
+    
+    def save_checkout_profile(self, profiler, sale_data):
+        """บันทึกโปรไฟล์การชำระเงินเป็น .prof (ใช้กับ pstats/snakeviz) และสรุป .txt"""
+        import io
+        import pstats
+        
+        folder = os.path.join('data', 'profiles')
+        os.makedirs(folder, exist_ok=True)
+        base = os.path.join(folder, f"checkout-{sale_data['receipt_no']}")
+        profiler.dump_stats(base + '.prof')
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats('cumulative').print_stats(40)
+        with open(base + '.txt', 'w', encoding='utf-8') as f:
+            f.write(text.getvalue())
+        return base + '.prof'
+    
+    def save_settings(self):
+        """บันทึกการตั้งค่าร้าน (แคชหัว/ท้ายใบเสร็จจะสร้างใหม่อัตโนมัติ)"""
+        values = {key: entry.get().strip() for key, entry in self.settings_entries.items()}
+        try:
+            values['tax_rate'] = float(values['tax_rate'])
+        except ValueError:
+            messagebox.showwarning("แจ้งเตือน", "กรุณากรอกอัตราภาษีเป็นตัวเลข")
+            return
+        if values['tax_rate'].is_integer():
+            values['tax_rate'] = int(values['tax_rate'])
+        if values['receipt_backend'] not in ('pdf', 'escpos'):
+            messagebox.showwarning("แจ้งเตือน", "รูปแบบใบเสร็จต้องเป็น pdf หรือ escpos")
+            return
         
-        for i in range(row + 1):
-            self.product_frame.rowconfigure(i, weight=1)
-        for i in range(3):
-            self.product_frame.columnconfigure(i, weight=1)
+        sync_changed = (values['sync_server'] != self.settings['sync_server'] or
+                        values['terminal_id'] != self.settings['terminal_id'])
+        self.settings.update(**values)
+        if sync_changed:
+            self.start_sync()
+        self.set_status("บันทึกการตั้งค่าเรียบร้อยแล้ว")
+    
+    def create_product_buttons(self):
+        """แสดงสินค้าตามหมวดหมู่ที่เลือก"""
+        with metrics.timer('create_product_buttons'):
+            self.product_grid.set_products(self.catalog.in_category(self.category_combo.get()))
     
     def filter_products(self, event=None):
         self.create_product_buttons()
     
     def add_to_cart(self, product):
-        if product['stock'] > 0:
-            self.cart.append(product)
-            self.update_cart_display()
+        try:
+            self.engine.add_to_cart(product)
+        except OutOfStock:
+            if self.scanner.enabled:
+                self.root.bell()
+                self.set_status(f"⚠️ {product['name']} สินค้าหมดสต็อกแล้ว")
+            else:
+                messagebox.showwarning("สินค้าหมด", f"{product['name']} สินค้าหมดสต็อกแล้ว")
+            return
+        self.scheduler.invalidate('cart', 'grid')
+        if self.scanner.enabled:
+            self.set_status(f"เพิ่ม {product['name']} (รวม {self.cart.total:,.2f} บาท)")
+        else:
             messagebox.showinfo("เพิ่มสินค้า", f"เพิ่ม {product['name']} ลงในตะกร้าเรียบร้อย!")
+    
+    def toggle_scanner_mode(self):
+        self.scanner.enabled = self.scanner_var.get()
+        if self.scanner.enabled:
+            self.set_status("โหมดสแกนบาร์โค้ด: พร้อมรับการสแกน")
         else:
-            messagebox.showwarning("สินค้าหมด", f"{product['name']} สินค้าหมดสต็อกแล้ว")
+            self.set_status("ปิดโหมดสแกนบาร์โค้ด")
+    
+    def on_barcode_scanned(self, code):
+        """เพิ่มสินค้าจากบาร์โค้ดที่สแกน (ใช้ได้เฉพาะเมื่ออยู่หน้าหลัก)"""
+        if self.current_screen != 'home':
+            self.root.bell()
+            self.set_status("กรุณากลับไปหน้าหลักก่อนสแกนสินค้า")
+            return
+        product = self.catalog.find_barcode(code)
+        if product is None:
+            self.root.bell()
+            self.set_status(f"⚠️ ไม่พบสินค้าบาร์โค้ด {code}")
+            return
+        self.add_to_cart(product)
+        stats = self.scanner.stats
+        self.set_status(f"สแกน {code}: {product['name']}  |  รวม {self.cart.total:,.2f} บาท  |  "
+                        f"{stats.scans_per_second():.1f} ครั้ง/วินาที  p95 {stats.percentile(95) * 1000:.1f} ms")
     
     def remove_from_cart(self):
+        # วาดตะกร้าที่ค้างอยู่ก่อน แถวที่เลือกจึงตรงกับตะกร้าจริง
+        self.scheduler.flush()
         selection = self.cart_listbox.curselection()
         if selection:
-            index = selection[0]
-            removed_product = self.cart.pop(index)
-            self.update_cart_display()
+            self.engine.remove_from_cart(selection[0])
+            self.scheduler.invalidate('cart', 'grid')
         else:
             messagebox.showwarning("แจ้งเตือน", "กรุณาเลือกรายการที่ต้องการลบ")
     
     def clear_cart(self):
         if self.cart:
-            self.cart = []
-            self.update_cart_display()
+            self.engine.clear_cart()
+            self.scheduler.invalidate('cart', 'grid')
         else:
             messagebox.showwarning("แจ้งเตือน", "ตะกร้าว่างเปล่า")
     
-    def update_cart_display(self):
-        self.cart_listbox.delete(0, tk.END)
-        
-        total = 0
-        for product in self.cart:
-            self.cart_listbox.insert(tk.END, f"{product['name']} - {product['price']:.2f} บาท")
-            total += product["price"]
-        
-        self.total_label.config(text=f"ยอดรวม: {total:,.2f} บาท")
+    def render_cart(self):
+        """ทำให้ Listbox ตรงกับตะกร้า โดยแก้เฉพาะแถวที่ข้อความเปลี่ยน และอัปเดตยอดรวม"""
+        lines = [self.cart.line_text(index) for index in range(len(self.cart.order))]
+        shown = self.cart_listbox.get(0, tk.END)
+        for index, text in enumerate(lines):
+            if index >= len(shown):
+                self.cart_listbox.insert(tk.END, text)
+            elif shown[index] != text:
+                self.cart_listbox.delete(index)
+                self.cart_listbox.insert(index, text)
+        if len(shown) > len(lines):
+            self.cart_listbox.delete(len(lines), tk.END)
+        self.total_label.config(text=f"ยอดรวม: {self.cart.total:,.2f} บาท")
     
     def show_qr_code(self):
         if not self.cart:
             messagebox.showwarning("แจ้งเตือน", "ตะกร้าว่างเปล่า กรุณาเพิ่มสินค้าก่อนชำระเงิน")
             return
         
-        total = sum(product["price"] for product in self.cart)
-        ref_number = random.randint(100000, 999999)
-        timestamp = datetime.datetime.now().strftime("%d/%m/%Y %H:%M")
-        
-        payment_data = f"""Payma - การชำระเงิน
-ยอดรวม: {total:,.2f} บาท
-รหัสอ้างอิง: {ref_number}
-วันที่: {timestamp}
-
-ขอบคุณที่ใช้บริการ!"""
-        
-        qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=6, border=2)
-        qr.add_data(payment_data)
-        qr.make(fit=True)
-        
-        qr_image = qr.make_image(fill_color="black", back_color="white")
-        qr_image = qr_image.resize((200, 200), Image.Resampling.LANCZOS)
-        
-        self.qr_photo = ImageTk.PhotoImage(qr_image)
-        self.qr_label.config(image=self.qr_photo, text="")
+        # ยอดรวมสุทธิรวมภาษี ตัวเลขเดียวกับที่พิมพ์บนใบเสร็จ
+        _, _, total = self.engine.totals()
+        with metrics.timer('show_qr_code'):
+            payload = self.promptpay_payload().build(total)
+            if not self.qr_cache.request(payload, self.on_qr_ready, self.on_qr_error):
+                self.qr_label.config(image='', text="กำลังสร้าง QR Code ...")
         
         messagebox.showinfo("ชำระเงิน", f"กรุณาสแกน QR Code เพื่อชำระเงิน\nยอดรวม: {total:,.2f} บาท")
     
+    def promptpay_payload(self):
+        """ตัวสร้าง payload พร้อมเพย์ของร้าน สร้างใหม่เมื่อหมายเลขพร้อมเพย์เปลี่ยน"""
+        promptpay_id = self.settings['promptpay_id']
+        if self._promptpay is None or self._promptpay.promptpay_id != promptpay_id:
+            self._promptpay = PromptPayPayload(promptpay_id)
+        return self._promptpay
+    
+    def on_qr_ready(self, photo):
+        self.qr_photo = photo
+        self.qr_label.config(image=self.qr_photo, text="")
+    
+    def on_qr_error(self, error):
+        self.qr_label.config(image='', text="QR Code จะแสดงที่นี่หลังกดชำระเงิน")
+        messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถสร้าง QR Code ได้: {str(error)}")
+    
     def print_receipt(self):
         if not self.cart:
             messagebox.showwarning("แจ้งเตือน", "ตะกร้าว่างเปล่า ไม่สามารถพิมพ์ใบเสร็จได้")
             return
+        if not self.wait_for_history():
+            messagebox.showerror("ข้อผิดพลาด", "ไม่สามารถบันทึกการขายได้ เนื่องจากโหลดประวัติการขายไม่สำเร็จ")
+            return
+        
+        started = time.perf_counter()
+        profiler = None
+        if self.profile_next_checkout:
+            import cProfile
+            self.profile_next_checkout = False
+            profiler = cProfile.Profile()
+            profiler.enable()
         
-        # สร้างข้อมูลการขาย
-        sale_data = {
-            'date': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'receipt_no': f"PM{datetime.datetime.now().strftime('%Y%m%d')}{random.randint(1000, 9999)}",
-            'items': self.cart,
-            'total': sum(product["price"] for product in self.cart),
-            'tax_rate': 7
-        }
-        
-        # บันทึกการขาย
-        self.sales_history.append(sale_data)
-        self.save_sales_history()
-        
-        # สร้างและพิมพ์ใบเสร็จ
-        receipt_path = self.receipt_generator.generate_receipt(sale_data)
-        
-        # ล้างตะกร้าหลังจากพิมพ์ใบเสร็จ
-        self.cart = []
-        self.update_cart_display()
+        # บันทึกการขายและล้างตะกร้าเพื่อเริ่มรายการถัดไป
+        try:
+            sale_data = self.engine.checkout()
+        except Exception as e:
+            if profiler is not None:
+                profiler.disable()
+            messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถบันทึกการขายได้: {str(e)}")
+            return
+        self.add_to_analytics(sale_data)
+        
+        # สร้างใบเสร็จในเธรดพื้นหลัง ถ้าคิวเต็ม (หรือกำลังจับโปรไฟล์) ให้สร้างทันที
+        receipt_result = None
+        if profiler is None and self.receipt_queue.submit(sale_data, self.on_receipt_done,
+                                                          self.on_receipt_error):
+            self.set_status(f"กำลังพิมพ์ใบเสร็จ {sale_data['receipt_no']} ...")
+        else:
+            try:
+                receipt_result = (self.on_receipt_done, self.engine.render_receipt(sale_data))
+            except Exception as e:
+                receipt_result = (self.on_receipt_error, e)
+        
+        self.scheduler.invalidate('cart', 'grid', 'stats')
         self.qr_label.config(image='', text="QR Code จะแสดงที่นี่หลังกดชำระเงิน")
+        metrics.record('print_receipt', time.perf_counter() - started)
         
-        messagebox.showinfo("พิมพ์ใบเสร็จ", f"พิมพ์ใบเสร็จเรียบร้อยแล้ว!\nเลขที่ใบเสร็จ: {sale_data['receipt_no']}")
+        if profiler is not None:
+            profiler.disable()
+            try:
+                path = self.save_checkout_profile(profiler, sale_data)
+                messagebox.showinfo("โปรไฟล์", f"บันทึกโปรไฟล์การชำระเงินแล้ว:\n{path}")
+            except OSError as e:
+                messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถบันทึกโปรไฟล์ได้: {str(e)}")
+        if receipt_result is not None:
+            callback, value = receipt_result
+            callback(sale_data, value)
+    
+    def on_receipt_done(self, sale_data, receipt_path):
+        """เรียกบนเธรดของ Tk เมื่อสร้างใบเสร็จเสร็จแล้ว"""
+        self.set_status(f"พิมพ์ใบเสร็จเรียบร้อยแล้ว: {sale_data['receipt_no']} ({receipt_path})")
+    
+    def on_receipt_error(self, sale_data, error):
+        """เรียกบนเธรดของ Tk เมื่อสร้างใบเสร็จไม่สำเร็จ"""
+        self.set_status(f"พิมพ์ใบเสร็จไม่สำเร็จ: {sale_data['receipt_no']}")
+        messagebox.showerror("ข้อผิดพลาด", 
+                             f"ไม่สามารถพิมพ์ใบเสร็จ {sale_data['receipt_no']} ได้: {str(error)}")
+    
+    def set_status(self, text):
+        self.status_label.config(text=text)
+    
+    REPORT_PERIODS = {"วันนี้": 'today', "เดือนนี้": 'month', "ปีนี้": 'year', "ทั้งหมด": 'all'}
     
     def export_report(self):
-        """ส่งออกรายงานเป็น PDF"""
+        """ส่งออกรายงานเป็น PDF ในเธรดพื้นหลัง"""
+        if self.report_thread is not None and self.report_thread.is_alive():
+            messagebox.showwarning("แจ้งเตือน", "กำลังส่งออกรายงานอยู่ กรุณารอสักครู่")
+            return
+        
+        period_name = self.report_period_combo.get()
+        start, end = report_period(self.REPORT_PERIODS[period_name])
         filename = filedialog.asksaveasfilename(
             defaultextension=".pdf",
             filetypes=[("PDF files", "*.pdf")],
@@ -458,65 +1083,75 @@ class PaymaApp:
         )
         
         if filename:
+            total = self.sales_store.count(start, end)
+            self.report_cancel = threading.Event()
+            self.report_events = queue.Queue()
+            self.report_thread = threading.Thread(
+                target=self._write_report, args=(filename, start, end, period_name, total),
+                name="sales-report", daemon=True)
+            self.report_thread.start()
+            self.set_status(f"กำลังส่งออกรายงาน ({total:,} รายการ) ...")
+            self.root.after(100, self._poll_report)
+    
+    def _write_report(self, filename, start, end, period_name, total):
+        """ทำงานในเธรดพื้นหลัง ส่งความคืบหน้ากลับผ่านคิว"""
+        from sales_report import SalesReportWriter, ReportCancelled
+        try:
+            writer = SalesReportWriter(filename, period=period_name, settings=self.settings)
+            done = writer.write(self.sales_store.iter_sales(start, end), total,
+                                progress=lambda d, t: self.report_events.put(('progress', d, t)),
+                                cancelled=self.report_cancel.is_set)
+            self.report_events.put(('done', done, writer.writer.page_count))
+        except ReportCancelled:
+            self.report_events.put(('cancelled',))
+        except Exception as e:
+            self.report_events.put(('error', e))
+    
+    def _poll_report(self):
+        finished = False
+        while True:
             try:
-                from reportlab.lib.pagesizes import A4
-                from reportlab.pdfgen import canvas
-                from reportlab.lib.utils import ImageReader
-                from reportlab.pdfbase import pdfmetrics
-                from reportlab.pdfbase.ttfonts import TTFont
-                
-                # สร้าง PDF
-                c = canvas.Canvas(filename, pagesize=A4)
-                width, height = A4
-                
-                # หัวข้อรายงาน
-                c.setFont("Helvetica-Bold", 16)
-                c.drawString(100, height - 100, "รายงานการขาย - Payma System")
-                
-                c.setFont("Helvetica", 12)
-                c.drawString(100, height - 130, f"วันที่ออกรายงาน: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}")
-                
-                # ตารางรายงาน
-                y_position = height - 180
-                headers = ["วันที่", "เลขที่ใบเสร็จ", "จำนวนรายการ", "ยอดรวม (บาท)"]
-                col_widths = [120, 100, 80, 80]
-                
-                # หัวข้อตาราง
-                x_position = 100
-                for i, header in enumerate(headers):
-                    c.setFont("Helvetica-Bold", 10)
-                    c.drawString(x_position, y_position, header)
-                    x_position += col_widths[i]
-                
-                y_position -= 20
-                
-                # ข้อมูลการขาย
-                c.setFont("Helvetica", 9)
-                for sale in self.sales_history[-20:]:
-                    x_position = 100
-                    values = [
-                        sale['date'],
-                        sale['receipt_no'],
-                        str(len(sale['items'])),
-                        f"{sale['total']:,.2f}"
-                    ]
-                    
-                    for i, value in enumerate(values):
-                        c.drawString(x_position, y_position, value)
-                        x_position += col_widths[i]
-                    
-                    y_position -= 15
-                    if y_position < 100:
-                        c.showPage()
-                        y_position = height - 100
-                
-                c.save()
+                event = self.report_events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == 'progress':
+                _, done, total = event
+                percent = done * 100 / total if total else 100
+                self.set_status(f"กำลังส่งออกรายงาน {done:,}/{total:,} รายการ ({percent:.0f}%)")
+                if self.report_progress.winfo_exists():
+                    self.report_progress['value'] = percent
+            elif event[0] == 'done':
+                finished = True
+                self.set_status(f"ส่งออกรายงานเรียบร้อยแล้ว: {event[1]:,} รายการ {event[2]:,} หน้า")
                 messagebox.showinfo("ส่งออกรายงาน", "ส่งออกรายงานเป็น PDF เรียบร้อยแล้ว!")
-                
-            except Exception as e:
-                messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถส่งออกรายงานได้: {str(e)}")
+            elif event[0] == 'cancelled':
+                finished = True
+                self.set_status("ยกเลิกการส่งออกรายงานแล้ว")
+            else:
+                finished = True
+                self.set_status("ส่งออกรายงานไม่สำเร็จ")
+                messagebox.showerror("ข้อผิดพลาด", f"ไม่สามารถส่งออกรายงานได้: {str(event[1])}")
+        
+        if not finished:
+            self.root.after(100, self._poll_report)
+        elif self.report_progress.winfo_exists():
+            self.report_progress['value'] = 0
+    
+    def cancel_report(self):
+        if self.report_thread is not None and self.report_thread.is_alive():
+            self.report_cancel.set()
 
 if __name__ == "__main__":
+    # --startup-time: จับเวลาการเปิดโปรแกรมแต่ละขั้นตอน แล้วปิดโปรแกรมเมื่อพร้อมใช้งาน
+    timer = None
+    if "--startup-time" in sys.argv:
+        timer = StartupTimer(STARTED)
+        timer.mark("import โมดูล")
     root = tk.Tk()
-    app = PaymaApp(root)
+    if timer is not None:
+        timer.mark("สร้างหน้าต่าง Tk")
+    app = PaymaApp(root, timer)
+    # --ui-burst: วัดเวลาวาดหน้าจอขณะเพิ่มสินค้าติดกันและสลับเมนูรัวๆ แล้วปิดโปรแกรม
+    if "--ui-burst" in sys.argv:
+        app.run_ui_burst()
     root.mainloop()
@@ -0,0 +1,99 @@
+
+import time
+import tkinter as tk
+from tkinter import ttk
+
+
+class ScanStats:
+    """สถิติการสแกน: จำนวน อัตราการสแกน และเวลาแฝงต่อครั้ง"""
+
+    def __init__(self, window=200):
+        self.window = window
+        self.latencies = []
+        self.timestamps = []
+        self.count = 0
+
+    def record(self, latency):
+        self.count += 1
+        self.latencies.append(latency)
+        self.timestamps.append(time.perf_counter())
+        if len(self.latencies) > self.window:
+            del self.latencies[0]
+            del self.timestamps[0]
+
+    def scans_per_second(self):
+        if len(self.timestamps) < 2:
+            return 0.0
+        elapsed = self.timestamps[-1] - self.timestamps[0]
+        return (len(self.timestamps) - 1) / elapsed if elapsed > 0 else 0.0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+
+class BarcodeScanner:
+    """รับข้อมูลจากเครื่องสแกนบาร์โค้ดแบบ keyboard wedge
+
+    เครื่องสแกนจะพิมพ์ตัวอักษรต่อเนื่องอย่างรวดเร็วแล้วปิดท้ายด้วย Enter
+    ตัวอักษรจะถูกเก็บในบัฟเฟอร์ ถ้าห่างกันเกิน max_interval จะเริ่มบัฟเฟอร์ใหม่
+    Enter ที่มาช้ากว่า max_interval หรือรหัสที่สั้นกว่า min_length ตัวไม่นับเป็นการสแกน
+    (กดปุ่มตัวเลขพลาดหนึ่งครั้งแล้วกด Enter ภายหลังจึงไม่เพิ่มสินค้าลงตะกร้า)
+    ช่องกรอกข้อความ (Entry/Combobox) ยังพิมพ์ได้ตามปกติ
+
+    ปุ่มถูกดักด้วย bindtag ที่ใส่ไว้หน้าสุดของวิดเจ็ตที่ได้รับโฟกัส จึงทำงานก่อน binding ของคลาส
+    (เช่น Enter ของ Listbox/ปุ่ม) และ "break" หยุดไม่ให้ตัวอักษรของการสแกนไปถึงวิดเจ็ต
+    """
+
+    TERMINATORS = ('Return', 'KP_Enter')
+
+    def __init__(self, root, on_scan, max_interval=0.05, min_length=4):
+        self.root = root
+        self.on_scan = on_scan
+        self.max_interval = max_interval
+        self.min_length = min_length
+        self.enabled = False
+        self.stats = ScanStats()
+        self._buffer = []
+        self._first_key = 0.0
+        self._last_key = 0.0
+        self.bindtag = f"BarcodeScanner{id(self)}"
+        root.bind_class(self.bindtag, '<Key>', self._on_key)
+        root.bind_all('<FocusIn>', self._on_focus, add='+')
+        self._tag(root)
+
+    def _on_focus(self, event):
+        self._tag(event.widget)
+
+    def _tag(self, widget):
+        # event.widget เป็นสตริงได้สำหรับวิดเจ็ตภายในของ Tk (เช่น รายการของ Combobox)
+        if not hasattr(widget, 'bindtags'):
+            return
+        tags = widget.bindtags()
+        if self.bindtag not in tags:
+            widget.bindtags((self.bindtag,) + tags)
+
+    def _on_key(self, event):
+        if not self.enabled or isinstance(event.widget, (tk.Entry, ttk.Entry, tk.Text)):
+            return None
+
+        now = time.perf_counter()
+        if event.keysym in self.TERMINATORS:
+            code = "".join(self._buffer)
+            self._buffer = []
+            if len(code) >= self.min_length and now - self._last_key <= self.max_interval:
+                # บันทึกก่อน on_scan เพื่อให้แถบสถานะที่ on_scan อัปเดตรวมการสแกนครั้งนี้
+                self.stats.record(now - self._first_key)
+                self.on_scan(code)
+            return "break"
+
+        if event.char and event.char.isprintable():
+            if not self._buffer or now - self._last_key > self.max_interval:
+                self._buffer = []
+                self._first_key = now
+            self._buffer.append(event.char)
+            self._last_key = now
+            return "break"
+        return None
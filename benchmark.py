@@ -0,0 +1,217 @@
+
+"""ชุดทดสอบประสิทธิภาพของขั้นตอนการขาย (ไม่ต้องเปิดหน้าจอ)
+
+วัดเวลาโหลดประวัติ เวลาชำระเงินต่อรายการ (p50/p95/p99) และจำนวนใบเสร็จต่อวินาที
+กับประวัติการขายจำลองหลายขนาด ผลลัพธ์ต่อท้ายใน benchmarks/results.jsonl
+และเปรียบเทียบกับผลครั้งก่อนเพื่อดูว่าช้าลงหรือไม่
+
+ตัวอย่าง:
+    python benchmark.py
+    python benchmark.py --sizes 1000,100000 --checkouts 200 --receipts 100
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import time
+
+from product_catalog import ProductCatalog
+from sales_engine import SalesEngine
+from sales_journal import SalesJournal
+from sales_store import SQLiteSalesStore
+
+
+def synthetic_sales(count, products, seed=0, start=datetime.datetime(2024, 1, 1)):
+    """การขายจำลอง count รายการ กระจายตามเวลา 1-5 สินค้าต่อใบเสร็จ"""
+    rng = random.Random(seed)
+    step = datetime.timedelta(seconds=90)
+    when = start
+    for i in range(count):
+        when += step
+        items = [{"id": p['id'], "name": p['name'], "price": p['price'],
+                  "category": p.get('category'), "quantity": rng.randint(1, 3)}
+                 for p in rng.sample(products, rng.randint(1, min(5, len(products))))]
+        yield {
+            'date': when.strftime("%Y-%m-%d %H:%M:%S"),
+            'receipt_no': f"BM{i:08d}",
+            'items': items,
+            'total': sum(item['price'] * item['quantity'] for item in items),
+            'tax_rate': 7,
+        }
+
+
+def build_history(data_dir, backend, size, products, batch_size=10000):
+    """สร้างประวัติจำลองครั้งเดียวแล้วเก็บไว้ใช้ซ้ำในการรันครั้งต่อไป"""
+    marker = os.path.join(data_dir, 'benchmark.json')
+    if os.path.exists(marker):
+        return
+    shutil.rmtree(data_dir, ignore_errors=True)
+    os.makedirs(data_dir)
+
+    if backend == 'journal':
+        SalesJournal(data_dir)._write_snapshot(list(synthetic_sales(size, products)))
+    else:
+        store = SQLiteSalesStore(os.path.join(data_dir, 'sales.db'))
+        # ไม่มี sales_history.json ให้ย้าย แต่บันทึกไว้เพื่อไม่ให้ตรวจซ้ำตอนเปิด
+        store.set_meta('migrated_from_json', 'benchmark')
+        batch = []
+        for sale in synthetic_sales(size, products):
+            batch.append(sale)
+            if len(batch) >= batch_size:
+                store.add_sales(batch)
+                batch = []
+        store.add_sales(batch)
+        store.close()
+
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump({'backend': backend, 'size': size}, f)
+
+
+def percentiles(samples, points=(50, 95, 99)):
+    ordered = sorted(samples)
+    return {f"p{p}": ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] for p in points}
+
+
+def bench_history(work_dir, backend, size, checkouts, catalog):
+    """เวลาโหลดประวัติและเวลาชำระเงินต่อรายการ บนสำเนาของประวัติจำลอง"""
+    base_dir = os.path.join(work_dir, f"{backend}-{size}")
+    build_history(base_dir, backend, size, catalog.products)
+    run_dir = base_dir + "-run"
+    shutil.rmtree(run_dir, ignore_errors=True)
+    shutil.copytree(base_dir, run_dir)
+
+    try:
+        # โหลดประวัติ: เปิดที่เก็บและอ่านข้อมูลที่หน้าหลัก/หน้ารายงานต้องใช้
+        started = time.perf_counter()
+        engine = SalesEngine(run_dir, os.path.join(run_dir, 'receipts'), backend, catalog=catalog)
+        engine.sales_store.count()
+        engine.sales_store.recent_summaries(20)
+        load_seconds = time.perf_counter() - started
+
+        # เติมสต็อกให้พอสำหรับทุกรอบ (สินค้าหนึ่งชิ้นถูกหยิบได้สูงสุด 3 ชิ้นต่อรอบ)
+        for product in catalog.products:
+            engine.inventory.receive(product, checkouts * 3, 'adjust', 'benchmark')
+
+        rng = random.Random(1)
+        latencies = []
+        for _ in range(checkouts):
+            started = time.perf_counter()
+            for product in rng.sample(catalog.products, 3):
+                engine.add_to_cart(product, rng.randint(1, 3))
+            engine.checkout()
+            latencies.append((time.perf_counter() - started) * 1000)
+        engine.close()
+    finally:
+        shutil.rmtree(run_dir, ignore_errors=True)
+
+    result = {'history_load_s': round(load_seconds, 4)}
+    result.update({f"checkout_{name}_ms": round(value, 3)
+                   for name, value in percentiles(latencies).items()})
+    return result
+
+
+def bench_receipts(work_dir, count, catalog):
+    """จำนวนใบเสร็จต่อวินาทีของแต่ละรูปแบบ (ไม่ขึ้นกับขนาดประวัติ)"""
+    output_dir = os.path.join(work_dir, 'receipts')
+    data_dir = os.path.join(work_dir, 'receipts-data')
+    engine = SalesEngine(data_dir, output_dir, 'journal', catalog=catalog)
+    engine.settings.values['printer_target'] = output_dir
+    sales = list(synthetic_sales(count, catalog.products, seed=2))
+    result = {}
+    try:
+        for name, generator in (("pdf", engine.receipt_generator.pdf),
+                                ("escpos", engine.receipt_generator.escpos)):
+            started = time.perf_counter()
+            for sale in sales:
+                generator.generate_receipt(sale)
+            result[f"receipts_per_s_{name}"] = round(count / (time.perf_counter() - started), 1)
+    finally:
+        engine.close()
+        shutil.rmtree(output_dir, ignore_errors=True)
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return result
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_previous(results_path, backend):
+    """ผลครั้งล่าสุดของ backend เดียวกันที่บันทึกไว้ หรือ None"""
+    previous = None
+    try:
+        with open(results_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    result = json.loads(line)
+                    if result.get('backend') == backend:
+                        previous = result
+    except OSError:
+        return None
+    return previous
+
+
+def compare(current, previous):
+    """พิมพ์ผลพร้อมการเปลี่ยนแปลงเทียบกับครั้งก่อน (+ คือค่ามากขึ้น)"""
+    old_metrics = previous['metrics'] if previous else {}
+    for key, value in current['metrics'].items():
+        line = f"{key:40s} {value:>12,}"
+        old = old_metrics.get(key)
+        if old:
+            line += f"  ({(value - old) / old * 100:+.1f}% จาก {old:,})"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="ทดสอบประสิทธิภาพขั้นตอนการขาย")
+    parser.add_argument("--sizes", default="1000,100000,1000000",
+                        help="ขนาดประวัติการขายจำลอง คั่นด้วยจุลภาค")
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "journal"])
+    parser.add_argument("--checkouts", type=int, default=500, help="จำนวนการชำระเงินต่อขนาด")
+    parser.add_argument("--receipts", type=int, default=200, help="จำนวนใบเสร็จที่สร้าง")
+    parser.add_argument("--work-dir", default="benchmarks/data", help="โฟลเดอร์ประวัติจำลอง")
+    parser.add_argument("--results", default="benchmarks/results.jsonl", help="ไฟล์เก็บผล")
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.work_dir, exist_ok=True)
+    catalog = ProductCatalog.load(os.path.join(args.work_dir, 'products.json'))
+    sizes = [int(size) for size in args.sizes.split(",")]
+
+    metrics = {}
+    for size in sizes:
+        print(f"ประวัติ {size:,} รายการ ({args.backend}) ...", file=sys.stderr)
+        for key, value in bench_history(args.work_dir, args.backend, size,
+                                        args.checkouts, catalog).items():
+            metrics[f"{size}.{key}"] = value
+    metrics.update(bench_receipts(args.work_dir, args.receipts, catalog))
+
+    current = {
+        'time': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'backend': args.backend,
+        'checkouts': args.checkouts,
+        'receipts': args.receipts,
+        'metrics': metrics,
+    }
+    previous = load_previous(args.results, args.backend)
+    compare(current, previous)
+
+    os.makedirs(os.path.dirname(args.results) or '.', exist_ok=True)
+    with open(args.results, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(current, ensure_ascii=False) + "\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+
+def _satang(price):
+    return int(round(price * 100))
+
+
+class Cart:
+    """ตะกร้าสินค้าที่รวมจำนวนตามรหัสสินค้า พร้อมยอดรวมที่อัปเดตทีละรายการ
+
+    ลำดับของรายการตรงกับลำดับแถวใน Listbox เพื่อให้หน้าจออัปเดตเฉพาะแถวที่เปลี่ยน
+    """
+
+    def __init__(self):
+        self.lines = {}    # product_id -> [product, quantity]
+        self.order = []    # product_id ตามลำดับที่แสดง
+        self.rows = {}     # product_id -> ตำแหน่งใน order
+        self.satang = 0    # ยอดรวมเป็นสตางค์ (จำนวนเต็ม บวก/ลบซ้ำกี่ครั้งก็ไม่คลาดเคลื่อน)
+        self.count = 0
+
+    @property
+    def total(self):
+        """ยอดรวมเป็นบาท"""
+        return self.satang / 100
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for product_id in self.order:
+            yield self.lines[product_id]
+
+    def add(self, product, quantity=1):
+        """เพิ่มสินค้า คืนค่า (ตำแหน่งแถว, เป็นแถวใหม่หรือไม่)"""
+        line = self.lines.get(product['id'])
+        is_new = line is None
+        if is_new:
+            line = self.lines[product['id']] = [product, 0]
+            self.rows[product['id']] = len(self.order)
+            self.order.append(product['id'])
+        line[1] += quantity
+        self.satang += _satang(product['price']) * quantity
+        self.count += quantity
+        return self.rows[product['id']], is_new
+
+    def remove_at(self, index):
+        """ลบแถวที่ตำแหน่ง index ทั้งแถว คืนค่า [product, quantity] ที่ลบ"""
+        product_id = self.order.pop(index)
+        del self.rows[product_id]
+        for row in range(index, len(self.order)):
+            self.rows[self.order[row]] = row
+        product, quantity = line = self.lines.pop(product_id)
+        self.satang -= _satang(product['price']) * quantity
+        self.count -= quantity
+        return line
+
+    def clear(self):
+        self.lines.clear()
+        self.order.clear()
+        self.rows.clear()
+        self.satang = 0
+        self.count = 0
+
+    def line_text(self, index):
+        product, quantity = self.lines[self.order[index]]
+        return f"{product['name']} x{quantity} - {product['price'] * quantity:,.2f} บาท"
+
+    def sale_items(self):
+        """รายการสินค้าสำหรับบันทึกการขาย หนึ่งรายการต่อสินค้าพร้อมจำนวน"""
+        return [{"id": product['id'], "name": product['name'], "price": product['price'],
+                 "category": product.get('category'), "quantity": quantity}
+                for product, quantity in self]
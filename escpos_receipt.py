@@ -0,0 +1,220 @@
+
+"""ใบเสร็จสำหรับเครื่องพิมพ์ความร้อน 80 มม. ผ่านคำสั่ง ESC/POS โดยตรง (ไม่ผ่าน PDF)
+
+ตัวอย่าง:
+    python escpos_receipt.py fake-printer --port 9100 --output fake_printer.bin
+    python escpos_receipt.py bench --count 500
+"""
+
+import argparse
+import os
+import socket
+import time
+import unicodedata
+
+from metrics import metrics
+from receipt_template import ReceiptGenerator
+from sales_store import sale_totals
+
+
+ESC = b'\x1b'
+GS = b'\x1d'
+
+INIT = ESC + b'@'
+ALIGN_LEFT = ESC + b'a\x00'
+ALIGN_CENTER = ESC + b'a\x01'
+BOLD_ON = ESC + b'E\x01'
+BOLD_OFF = ESC + b'E\x00'
+DOUBLE_SIZE = GS + b'!\x11'
+NORMAL_SIZE = GS + b'!\x00'
+CUT = GS + b'V\x42\x00'
+
+
+def display_width(text):
+    """ความกว้างของข้อความบนหัวพิมพ์ สระบน/ล่างและวรรณยุกต์ไม่กินคอลัมน์"""
+    return sum(1 for ch in text if not unicodedata.combining(ch)
+               and unicodedata.category(ch) != 'Mn')
+
+
+def pad_columns(left, right, width):
+    """จัดข้อความซ้ายและขวาให้อยู่ในบรรทัดเดียวกัน"""
+    space = width - display_width(left) - display_width(right)
+    return left + " " * max(1, space) + right
+
+
+class EscPosReceiptGenerator(ReceiptGenerator):
+    """สร้างใบเสร็จเป็นคำสั่ง ESC/POS แล้วส่งไปยังเครื่องพิมพ์ ไฟล์ หรือ socket
+
+    printer_target ในการตั้งค่ารองรับ:
+      - tcp://host:port   เครื่องพิมพ์เครือข่าย (ปกติพอร์ต 9100)
+      - โฟลเดอร์           เขียนไฟล์ <เลขที่ใบเสร็จ>.escpos ในโฟลเดอร์นั้น
+      - path อื่น          เช่น /dev/usb/lp0 เขียนต่อท้ายอุปกรณ์/ไฟล์
+    """
+
+    def __init__(self, output_dir='receipts', settings=None, columns=48,
+                 codepage=26, encoding='cp874'):
+        super().__init__(output_dir, settings)
+        self.columns = columns
+        # ESC t n: หมายเลข code page ภาษาไทยขึ้นกับรุ่นเครื่องพิมพ์
+        self.codepage = codepage
+        self.encoding = encoding
+
+    def receipt_path(self, receipt_no):
+        return f"{self.output_dir}/{receipt_no}.escpos"
+
+    def generate_receipt(self, sale_data):
+        """สร้างใบเสร็จและส่งไปยังเครื่องพิมพ์ คืนค่าปลายทางที่ส่งไป"""
+        data = self.render(sale_data)
+        target = self.settings.get('printer_target') or self.output_dir
+        return self.send(data, target, sale_data['receipt_no'])
+
+    def render(self, sale_data):
+        """แปลงข้อมูลการขายเป็น byte stream ESC/POS"""
+        width = self.columns
+        rule = "-" * width
+        out = [INIT, ESC + b't' + bytes([self.codepage])]
+
+        def text(line=""):
+            out.append(line.encode(self.encoding, errors='replace') + b'\n')
+
+        # ส่วนหัว
+        out.append(ALIGN_CENTER + DOUBLE_SIZE + BOLD_ON)
+        text(self.settings['store_name'].upper())
+        out.append(NORMAL_SIZE + BOLD_OFF)
+        text(self.settings['address'])
+        text(f"โทร: {self.settings['phone']}")
+        text(f"อีเมล: {self.settings['email']}")
+        out.append(ALIGN_LEFT)
+        text(rule)
+        out.append(BOLD_ON)
+        text("ใบเสร็จรับเงิน")
+        out.append(BOLD_OFF)
+        text(f"เลขที่: {sale_data['receipt_no']}")
+        text(f"วันที่: {sale_data['date']}")
+        text(rule)
+
+        # รายการสินค้า
+        for i, item in enumerate(sale_data['items'], 1):
+            quantity = item.get('quantity', 1)
+            text(pad_columns(f"{i}. {item['name']} x{quantity}",
+                             f"{item['price'] * quantity:,.2f}", width))
+
+        # ยอดรวม
+        subtotal, tax_amount, grand_total = sale_totals(sale_data)
+        text(rule)
+        text(pad_columns("ยอดรวมก่อนภาษี", f"{subtotal:,.2f}", width))
+        text(pad_columns(f"ภาษีมูลค่าเพิ่ม {sale_data['tax_rate']}%", f"{tax_amount:,.2f}", width))
+        out.append(BOLD_ON)
+        text(pad_columns("ยอดรวมสุทธิ", f"{grand_total:,.2f}", width))
+        out.append(BOLD_OFF)
+        text(f"({self.number_to_thai_baht(grand_total)})")
+
+        # ท้ายใบเสร็จ
+        out.append(ALIGN_CENTER)
+        text()
+        text("ขอบคุณที่ใช้บริการ Payma")
+        text("ใบเสร็จนี้เป็นหลักฐานการชำระเงินที่ถูกต้อง")
+        text()
+        text()
+        out.append(CUT)
+        return b''.join(out)
+
+    def send(self, data, target, receipt_no):
+        """ส่ง byte stream ไปยังปลายทาง"""
+        if target.startswith("tcp://"):
+            host, _, port = target[len("tcp://"):].partition(":")
+            with socket.create_connection((host, int(port or 9100)), timeout=5) as sock:
+                sock.sendall(data)
+            return target
+
+        if os.path.isdir(target):
+            path = os.path.join(target, f"{receipt_no}.escpos")
+            with open(path, 'wb') as f:
+                f.write(data)
+            return path
+
+        with open(target, 'ab') as f:
+            f.write(data)
+        return target
+
+
+class TerminalReceiptGenerator:
+    """เลือก backend ใบเสร็จของเครื่องนี้ตามการตั้งค่า receipt_backend ('pdf' หรือ 'escpos')"""
+
+    def __init__(self, settings, output_dir='receipts'):
+        self.settings = settings
+        self.pdf = ReceiptGenerator(output_dir, settings)
+        self.escpos = EscPosReceiptGenerator(output_dir, settings)
+
+    @property
+    def backend(self):
+        return self.escpos if self.settings.get('receipt_backend') == 'escpos' else self.pdf
+
+    def receipt_path(self, receipt_no):
+        return self.backend.receipt_path(receipt_no)
+
+    def generate_receipt(self, sale_data):
+        backend = self.backend
+        with metrics.timer('receipt_' + ('escpos' if backend is self.escpos else 'pdf')):
+            return backend.generate_receipt(sale_data)
+
+
+def run_fake_printer(port, output, host='127.0.0.1'):
+    """เครื่องพิมพ์จำลองบน localhost: รับข้อมูลทุกการเชื่อมต่อแล้วต่อท้ายลงไฟล์"""
+    with socket.create_server((host, port)) as server:
+        print(f"เครื่องพิมพ์จำลองรอที่ tcp://{host}:{port} บันทึกลง {output}")
+        while True:
+            conn, _ = server.accept()
+            with conn, open(output, 'ab') as f:
+                while True:
+                    chunk = conn.recv(65536)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+
+
+def benchmark(count=200, output_dir='receipts'):
+    """เปรียบเทียบเวลาสร้างใบเสร็จระหว่าง PDF และ ESC/POS"""
+    from store_settings import StoreSettings
+
+    os.makedirs(output_dir, exist_ok=True)
+    settings = StoreSettings()
+    sale = {
+        'date': '2026-01-01 12:00:00',
+        'receipt_no': 'BENCH',
+        'items': [{"id": 1, "name": "น้ำดื่ม", "price": 10, "category": "เครื่องดื่ม"}] * 8,
+        'total': 80,
+        'tax_rate': 7,
+    }
+    escpos = EscPosReceiptGenerator(output_dir, settings)
+    backends = [("pdf", ReceiptGenerator(output_dir, settings)),
+                ("escpos", escpos)]
+    for name, generator in backends:
+        started = time.perf_counter()
+        for i in range(count):
+            sale['receipt_no'] = f"BENCH{i:05d}"
+            if generator is escpos:
+                escpos.send(escpos.render(sale), output_dir, sale['receipt_no'])
+            else:
+                generator.generate_receipt(sale)
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(generator.receipt_path(sale['receipt_no']))
+        print(f"{name:7s} {elapsed / count * 1000:8.3f} ms/ใบ  {count / elapsed:8.1f} ใบ/วินาที  "
+              f"{size:6d} ไบต์/ใบ")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="เครื่องมือใบเสร็จ ESC/POS")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fake = sub.add_parser("fake-printer", help="เปิดเครื่องพิมพ์จำลองบน localhost")
+    fake.add_argument("--port", type=int, default=9100)
+    fake.add_argument("--output", default="fake_printer.bin")
+    bench = sub.add_parser("bench", help="เปรียบเทียบ PDF กับ ESC/POS")
+    bench.add_argument("--count", type=int, default=200)
+    bench.add_argument("--output-dir", default="receipts")
+    args = parser.parse_args()
+
+    if args.command == "fake-printer":
+        run_fake_printer(args.port, args.output)
+    else:
+        benchmark(args.count, args.output_dir)
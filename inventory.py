@@ -0,0 +1,231 @@
+
+import datetime
+import json
+import os
+import threading
+
+
+class OutOfStock(Exception):
+    pass
+
+
+class Inventory:
+    """สต็อกสินค้าแบบบันทึกการเคลื่อนไหวต่อท้าย (append-only ledger) พร้อม snapshot
+
+    ทุกการเปลี่ยนแปลงจำนวนสินค้าต่อท้ายไฟล์ data/inventory_ledger.jsonl ทีละบรรทัด
+    ในรูปแบบ {"seq": n, "product": id, "delta": จำนวน, "reason": ..., "ref": ..., "time": ...}
+    และเขียน snapshot (data/inventory.json) ทุก snapshot_every รายการในเธรดพื้นหลัง
+    ตอนเปิดโปรแกรมจึงอ่าน snapshot แล้วเล่นซ้ำเฉพาะ ledger ที่ต่อท้ายหลัง snapshot
+
+    การจองสต็อก (สินค้าในตะกร้า) เก็บในหน่วยความจำเท่านั้น เพราะตะกร้าก็ไม่ถูกบันทึก
+    product['stock'] ของสินค้าแต่ละชิ้นถูกปรับเป็นจำนวนที่ขายได้ (คงเหลือ - จอง) เพื่อให้หน้าจอแสดงได้ทันที
+    ทุกเมธอดใช้ล็อกเดียวกัน จึงเรียกจากเธรดของหน้าจอและเธรดพื้นหลังพร้อมกันได้
+    """
+
+    def __init__(self, data_dir='data', snapshot_every=1000):
+        os.makedirs(data_dir, exist_ok=True)
+        self.snapshot_path = os.path.join(data_dir, 'inventory.json')
+        self.ledger_path = os.path.join(data_dir, 'inventory_ledger.jsonl')
+        self.snapshot_every = snapshot_every
+
+        self.on_hand = {}       # product_id -> จำนวนคงเหลือจริง
+        self.reserved = {}      # product_id -> จำนวนที่อยู่ในตะกร้า
+        self.products = {}      # product_id -> dict สินค้า (สำหรับปรับ product['stock'])
+        self._seq = 0
+        self._since_snapshot = 0
+        self._lock = threading.Lock()
+        self._snapshot_thread = None
+        self._load()
+        self._file = open(self.ledger_path, 'a', encoding='utf-8')
+
+    # ----- ledger และ snapshot -----
+
+    def _load(self):
+        offset = 0
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            self._seq = snapshot['seq']
+            offset = snapshot['offset']
+            self.on_hand = {product_id: quantity for product_id, quantity in snapshot['stock']}
+        except (OSError, ValueError, KeyError):
+            pass
+
+        if not os.path.exists(self.ledger_path):
+            return
+        if offset > os.path.getsize(self.ledger_path):
+            offset = 0      # ledger ถูกแทนที่ เล่นซ้ำทั้งไฟล์ (seq กันรายการซ้ำ)
+
+        good_offset = offset
+        with open(self.ledger_path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line.decode('utf-8'))
+                    if record['seq'] > self._seq:
+                        self.on_hand[record['product']] = (
+                            self.on_hand.get(record['product'], 0) + record['delta'])
+                        self._seq = record['seq']
+                        self._since_snapshot += 1
+                except (ValueError, KeyError, TypeError):
+                    break
+                good_offset += len(line)
+
+        # ตัดส่วนท้ายที่เขียนไม่สมบูรณ์ (เครื่องดับระหว่างเขียน) ทิ้ง
+        if good_offset < os.path.getsize(self.ledger_path):
+            with open(self.ledger_path, 'r+b') as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _append_locked(self, movements, reason, ref=None):
+        """ต่อท้าย (product_id, delta) หลายรายการแล้ว fsync ครั้งเดียว
+
+        ทั้งชุดสำเร็จหรือไม่มีผลเลย: ถ้าเขียนหรือ fsync ไม่สำเร็จ ส่วนที่อาจเขียนไปแล้วถูกตัดทิ้ง
+        และสต็อกในหน่วยความจำไม่เปลี่ยน แล้วส่งข้อผิดพลาดต่อให้ผู้เรียก
+        """
+        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        lines = []
+        for seq, (product_id, delta) in enumerate(movements, self._seq + 1):
+            record = {"seq": seq, "product": product_id, "delta": delta,
+                      "reason": reason, "ref": ref, "time": now}
+            lines.append(json.dumps(record, ensure_ascii=False) + "\n")
+        start = self._file.tell()
+        try:
+            self._file.write("".join(lines))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        except OSError:
+            self._rollback_locked(start)
+            raise
+
+        self._seq += len(movements)
+        for product_id, delta in movements:
+            self.on_hand[product_id] = self.on_hand.get(product_id, 0) + delta
+            self._sync_product(product_id)
+        self._since_snapshot += len(movements)
+        if self._since_snapshot >= self.snapshot_every:
+            self._start_snapshot_locked()
+
+    def _rollback_locked(self, offset):
+        """ตัด ledger กลับไปที่ offset และเปิดไฟล์ใหม่ (ทิ้งข้อมูลที่ค้างในบัฟเฟอร์)"""
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        try:
+            with open(self.ledger_path, 'r+b') as f:
+                f.truncate(offset)
+        finally:
+            self._file = open(self.ledger_path, 'a', encoding='utf-8')
+
+    def _start_snapshot_locked(self):
+        if self._snapshot_thread is not None and self._snapshot_thread.is_alive():
+            return
+        snapshot = {"seq": self._seq, "offset": self._file.tell(),
+                    "stock": list(self.on_hand.items())}
+        self._since_snapshot = 0
+        self._snapshot_thread = threading.Thread(
+            target=self._write_snapshot, args=(snapshot,), name="inventory-snapshot")
+        self._snapshot_thread.start()
+
+    def _write_snapshot(self, snapshot):
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+    def snapshot(self):
+        """เขียน snapshot ทันที (รอจนเสร็จ)"""
+        with self._lock:
+            if self._snapshot_thread is not None:
+                self._snapshot_thread.join()
+            self._start_snapshot_locked()
+            thread = self._snapshot_thread
+        thread.join()
+
+    # ----- สินค้า -----
+
+    def _sync_product(self, product_id):
+        product = self.products.get(product_id)
+        if product is not None:
+            product['stock'] = self.on_hand.get(product_id, 0) - self.reserved.get(product_id, 0)
+
+    def attach(self, products):
+        """ผูกสินค้าเข้ากับสต็อก สินค้าที่ยังไม่เคยมีใน ledger ใช้ product['stock'] เป็นยอดยกมา"""
+        with self._lock:
+            opening = []
+            for product in products:
+                self.products[product['id']] = product
+                if product['id'] not in self.on_hand:
+                    opening.append((product['id'], product.get('stock', 0)))
+                self._sync_product(product['id'])
+            if opening:
+                self._append_locked(opening, 'opening')
+
+    def available(self, product_id):
+        with self._lock:
+            return self.on_hand.get(product_id, 0) - self.reserved.get(product_id, 0)
+
+    # ----- การจองและตัดสต็อก -----
+
+    def reserve(self, product, quantity=1):
+        """จองสินค้าสำหรับตะกร้า ถ้าไม่พอให้ OutOfStock"""
+        product_id = product['id']
+        with self._lock:
+            self.products.setdefault(product_id, product)
+            available = self.on_hand.get(product_id, 0) - self.reserved.get(product_id, 0)
+            if available < quantity:
+                raise OutOfStock(product['name'])
+            self.reserved[product_id] = self.reserved.get(product_id, 0) + quantity
+            self._sync_product(product_id)
+
+    def release(self, product, quantity):
+        """คืนสินค้าที่จองไว้ (เช่น ลบออกจากตะกร้า)"""
+        product_id = product['id']
+        with self._lock:
+            left = self.reserved.get(product_id, 0) - quantity
+            if left > 0:
+                self.reserved[product_id] = left
+            else:
+                self.reserved.pop(product_id, None)
+            self._sync_product(product_id)
+
+    def commit(self, items, ref=None):
+        """ตัดสต็อกตามรายการขาย (ตามที่จองไว้) ต่อท้าย ledger โดยไม่เขียนสต็อกทั้งหมดใหม่
+
+        ถ้าบันทึก ledger ไม่สำเร็จ สต็อกและการจองไม่เปลี่ยน
+        """
+        with self._lock:
+            movements = [(item['id'], -item.get('quantity', 1)) for item in items]
+            if movements:
+                self._append_locked(movements, 'sale', ref)
+            # คืนการจองหลังบันทึกสำเร็จเท่านั้น ถ้าบันทึกไม่ได้ ตะกร้ายังจองสินค้าไว้เหมือนเดิม
+            for product_id, delta in movements:
+                left = self.reserved.get(product_id, 0) + delta
+                if left > 0:
+                    self.reserved[product_id] = left
+                else:
+                    self.reserved.pop(product_id, None)
+                self._sync_product(product_id)
+
+    def receive(self, product, quantity, reason='receive', ref=None):
+        """รับสินค้าเข้า (หรือปรับยอดเมื่อ quantity ติดลบ)"""
+        with self._lock:
+            self.products.setdefault(product['id'], product)
+            self._append_locked([(product['id'], quantity)], reason, ref)
+
+    def close(self):
+        """เขียน snapshot ล่าสุด (ถ้ามีการเคลื่อนไหวหลัง snapshot) แล้วปิดไฟล์"""
+        if self._since_snapshot:
+            self.snapshot()
+        elif self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
@@ -0,0 +1,128 @@
+
+import bisect
+import collections
+import contextlib
+import datetime
+import json
+import os
+import threading
+import time
+
+
+# ขอบบนของช่อง histogram (มิลลิวินาที) ช่องสุดท้ายคือมากกว่าค่าสุดท้าย
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class LatencyHistogram:
+    """เวลาแฝงของขั้นตอนหนึ่ง: histogram สะสมทั้งหมด และค่าล่าสุด window ค่าสำหรับ percentile"""
+
+    def __init__(self, window=500):
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.recent = collections.deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, ms):
+        self.buckets[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.recent.append(ms)
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))]
+
+    def summary(self):
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile(50), 3),
+            "p95_ms": round(self.percentile(95), 3),
+            "p99_ms": round(self.percentile(99), 3),
+            "max_ms": round(self.max, 3),
+            "buckets": dict(zip([f"<={b}" for b in BUCKETS_MS] + [f">{BUCKETS_MS[-1]}"],
+                                self.buckets)),
+        }
+
+
+class Metrics:
+    """ตัวนับและเวลาแฝงของขั้นตอนสำคัญในการขาย (ชำระเงิน บันทึกประวัติ ใบเสร็จ QR)
+
+    ใช้จากหลายเธรดได้ ต้นทุนต่อครั้งคือ perf_counter สองครั้งกับล็อกหนึ่งครั้ง
+    """
+
+    def __init__(self, window=500):
+        self.window = window
+        self.histograms = {}
+        self.counters = collections.Counter()
+        self._lock = threading.Lock()
+        self._exporter = None
+        self._stop_export = threading.Event()
+
+    def record(self, name, seconds):
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram(self.window)
+            histogram.record(seconds * 1000)
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """จับเวลาบล็อก with (บันทึกแม้เกิดข้อผิดพลาด และนับ <name>.errors)"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.count(name + ".errors")
+            raise
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "time": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "timings": {name: h.summary() for name, h in sorted(self.histograms.items())},
+                "counters": dict(sorted(self.counters.items())),
+            }
+
+    def export(self, path):
+        """เขียนค่าปัจจุบันลงไฟล์ JSON (แทนที่ไฟล์เดิมทั้งไฟล์)"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def start_export(self, path, interval=60.0):
+        """ส่งออกค่าลงไฟล์ทุก interval วินาทีในเธรดพื้นหลัง"""
+        def run():
+            while not self._stop_export.wait(interval):
+                try:
+                    self.export(path)
+                except OSError:
+                    pass
+
+        self._stop_export.clear()
+        self._exporter = threading.Thread(target=run, name="metrics-export", daemon=True)
+        self._exporter.start()
+
+    def stop_export(self, path=None):
+        """หยุดเธรดส่งออก และเขียนค่าสุดท้ายลง path (ถ้ากำหนด)"""
+        self._stop_export.set()
+        if self._exporter is not None:
+            self._exporter.join()
+            self._exporter = None
+        if path is not None:
+            self.export(path)
+
+
+# ตัววัดของโปรแกรม ใช้ร่วมกันทุกโมดูลและทุกเธรด
+metrics = Metrics()
@@ -0,0 +1,138 @@
+
+"""ฟอนต์ภาษาไทยสำหรับ PDF (ใบเสร็จและรายงาน)
+
+ฟอนต์ TrueType ถูกอ่านและลงทะเบียนกับ reportlab ครั้งเดียวต่อโปรเซส เมื่อสร้าง PDF ครั้งแรก
+ทุกเอกสารจึงใช้ข้อมูล glyph และความกว้างตัวอักษรชุดเดียวกัน และฝังเฉพาะ glyph ที่ใช้จริง (subset)
+ถ้าไม่พบฟอนต์ไทยจะใช้ Helvetica แบบเดิม
+"""
+
+import os
+import threading
+
+
+# ฟอนต์ที่ค้นหาตามลำดับ: (ตัวปกติ, ตัวหนา) ตัวหนาไม่มีได้
+FONT_CANDIDATES = [
+    ("fonts/THSarabunNew.ttf", "fonts/THSarabunNew Bold.ttf"),
+    ("C:/Windows/Fonts/THSarabunNew.ttf", "C:/Windows/Fonts/THSarabunNew Bold.ttf"),
+    ("C:/Windows/Fonts/tahoma.ttf", "C:/Windows/Fonts/tahomabd.ttf"),
+    ("/usr/share/fonts/truetype/tlwg/Sarabun.ttf", "/usr/share/fonts/truetype/tlwg/Sarabun-Bold.ttf"),
+    ("/usr/share/fonts/truetype/tlwg/Garuda.ttf", "/usr/share/fonts/truetype/tlwg/Garuda-Bold.ttf"),
+    ("/usr/share/fonts/truetype/tlwg/Loma.ttf", "/usr/share/fonts/truetype/tlwg/Loma-Bold.ttf"),
+    ("/Library/Fonts/THSarabunNew.ttf", "/Library/Fonts/THSarabunNew Bold.ttf"),
+]
+
+FALLBACK_FONTS = ("Helvetica", "Helvetica-Bold")
+
+_lock = threading.Lock()
+_registered = {}        # path -> ชื่อฟอนต์ที่ลงทะเบียนแล้ว
+_found = None           # ผลการค้นหาใน FONT_CANDIDATES
+
+
+def register_font(path):
+    """ลงทะเบียนฟอนต์ TrueType (อ่านไฟล์ครั้งเดียวต่อ path) คืนค่าชื่อฟอนต์"""
+    with _lock:
+        name = _registered.get(path)
+        if name is None:
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            import reportlab_internals
+
+            name = f"PaymaThai{len(_registered) + 1}"
+            # asciiReadable=False: ฝังเฉพาะ glyph ที่ใช้จริง ไม่ใส่ ASCII ทั้งชุดใน subset แรก
+            font = TTFont(name, path, asciiReadable=False)
+            reportlab_internals.cache_subsets(font)
+            pdfmetrics.registerFont(font)
+            _registered[path] = name
+        return name
+
+
+def _find_candidates():
+    global _found
+    if _found is None:
+        _found = ()
+        for regular, bold in FONT_CANDIDATES:
+            if os.path.exists(regular):
+                _found = (regular, bold if os.path.exists(bold) else regular)
+                break
+    return _found
+
+
+def pdf_fonts(settings=None):
+    """(ฟอนต์ปกติ, ฟอนต์ตัวหนา) สำหรับวาด PDF
+
+    ใช้ pdf_font/pdf_font_bold จากการตั้งค่าร้านถ้ากำหนดไว้ ไม่เช่นนั้นค้นจาก FONT_CANDIDATES
+    """
+    regular = settings.get('pdf_font') if settings is not None else None
+    bold = settings.get('pdf_font_bold') if settings is not None else None
+    if not regular or not os.path.exists(regular):
+        regular, bold = None, None
+    elif bold and not os.path.exists(bold):
+        bold = None
+    if not regular:
+        regular, bold = _find_candidates() or (None, None)
+    if not regular:
+        return FALLBACK_FONTS
+    return register_font(regular), register_font(bold or regular)
+
+
+def benchmark(count=200, output_dir='receipts', font_path=None, bold_path=None):
+    """เวลาและขนาดใบเสร็จ PDF: Helvetica, ฟอนต์ไทยที่ลงทะเบียนครั้งเดียว และลงทะเบียนใหม่ทุกใบ"""
+    import time
+    from receipt_template import ReceiptGenerator
+    from store_settings import StoreSettings
+
+    settings = StoreSettings()
+    if font_path:
+        settings.values['pdf_font'] = font_path
+        settings.values['pdf_font_bold'] = bold_path or ''
+    if pdf_fonts(settings) == FALLBACK_FONTS:
+        print("ไม่พบฟอนต์ไทย (ระบุด้วย --font)")
+        return
+    regular, bold = font_path, bold_path
+    if not regular:
+        regular, bold = _find_candidates()
+
+    class HelveticaReceipt(ReceiptGenerator):
+        def load_fonts(self):
+            return FALLBACK_FONTS
+
+    class UncachedReceipt(ReceiptGenerator):
+        # แบบเดิม: อ่านไฟล์ฟอนต์และลงทะเบียนใหม่ทุกใบเสร็จ
+        def load_fonts(self):
+            from reportlab.pdfbase import pdfmetrics
+            from reportlab.pdfbase.ttfonts import TTFont
+            pdfmetrics.registerFont(TTFont("BenchThai", regular, asciiReadable=False))
+            pdfmetrics.registerFont(TTFont("BenchThai-Bold", bold or regular, asciiReadable=False))
+            return "BenchThai", "BenchThai-Bold"
+
+    os.makedirs(output_dir, exist_ok=True)
+    sale = {
+        'date': '2026-01-01 12:00:00',
+        'receipt_no': 'BENCH',
+        'items': [{"id": 1, "name": "น้ำดื่มตราช้าง", "price": 10, "category": "เครื่องดื่ม"}] * 8,
+        'total': 80,
+        'tax_rate': 7,
+    }
+    for name, generator in (("helvetica", HelveticaReceipt(output_dir, settings)),
+                            ("thai-cached", ReceiptGenerator(output_dir, settings)),
+                            ("thai-uncached", UncachedReceipt(output_dir, settings))):
+        generator.generate_receipt(dict(sale, receipt_no="WARMUP"))
+        started = time.perf_counter()
+        for i in range(count):
+            generator.generate_receipt(dict(sale, receipt_no=f"BENCH{i:05d}"))
+        elapsed = time.perf_counter() - started
+        size = os.path.getsize(generator.receipt_path(f"BENCH{count - 1:05d}"))
+        print(f"{name:14s} {elapsed / count * 1000:8.3f} ms/ใบ  {count / elapsed:8.1f} ใบ/วินาที  "
+              f"{size:7d} ไบต์/ใบ")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="เปรียบเทียบต้นทุนฟอนต์ไทยในใบเสร็จ PDF")
+    parser.add_argument("--count", type=int, default=200)
+    parser.add_argument("--output-dir", default="receipts")
+    parser.add_argument("--font", help="ไฟล์ฟอนต์ TrueType (ค่าเริ่มต้น: ค้นหาอัตโนมัติ)")
+    parser.add_argument("--bold-font", help="ไฟล์ฟอนต์ตัวหนา")
+    args = parser.parse_args()
+    benchmark(args.count, args.output_dir, args.font, args.bold_font)
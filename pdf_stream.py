@@ -0,0 +1,207 @@
+
+"""ตัวเขียน PDF แบบสตรีม: เขียนแต่ละหน้าลงไฟล์ทันทีที่วาดเสร็จ
+
+reportlab เก็บทุกหน้าไว้ในหน่วยความจำจนกว่าจะ save() ซึ่งไม่เหมาะกับรายงานหลายพันหน้า
+ตัวเขียนนี้เก็บเพียงตำแหน่งของอ็อบเจ็กต์ในไฟล์ (ตัวเลขไม่กี่ไบต์ต่อหน้า)
+การฝังฟอนต์ TrueType ใช้ส่วนภายในของ reportlab ผ่าน reportlab_internals เท่านั้น
+"""
+
+import os
+import zlib
+
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+import reportlab_internals
+
+
+def _escape(data):
+    return data.replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+
+
+def _num(value):
+    return f"{value:.2f}".rstrip('0').rstrip('.')
+
+
+class PageContent:
+    """คำสั่งวาดของหน้าเดียว (ข้อความและเส้น)"""
+
+    def __init__(self, writer, width, height):
+        self.writer = writer
+        self.width = width
+        self.height = height
+        self.fonts = {}
+        self._ops = []
+        self._font = None
+
+    def set_font(self, name, size):
+        self._font = (name, size)
+
+    def draw_string(self, x, y, text):
+        name, size = self._font
+        op = [f"BT {_num(x)} {_num(y)} Td".encode()]
+        # ฟอนต์ TrueType แบ่งข้อความเป็นช่วงตาม subset (subset ละ 256 ตัวอักษร)
+        for key, encoded in self.writer.encode_text(name, text):
+            if key not in self.fonts:
+                self.fonts[key] = self.writer.font_resource(key)
+            op.append(f"/{self.fonts[key]} {_num(size)} Tf ".encode() + b'(' + _escape(encoded) + b') Tj')
+        op.append(b'ET')
+        self._ops.append(b' '.join(op))
+
+    def draw_right_string(self, x, y, text):
+        name, size = self._font
+        self.draw_string(x - stringWidth(text, name, size), y, text)
+
+    def line(self, x1, y1, x2, y2):
+        self._ops.append(f"{_num(x1)} {_num(y1)} m {_num(x2)} {_num(y2)} l S".encode())
+
+    def data(self):
+        return b'\n'.join(self._ops)
+
+
+class StreamingPDFWriter:
+    """เขียน PDF ทีละหน้าโดยใช้หน่วยความจำคงที่
+
+    ฟอนต์มาตรฐานของ PDF (เช่น Helvetica) เข้ารหัสแบบ WinAnsi ส่วนฟอนต์ TrueType ที่ลงทะเบียนกับ
+    reportlab (เช่น ฟอนต์ไทยจาก pdf_fonts) ฝังเฉพาะ glyph ที่ใช้ในเอกสารตอนปิดไฟล์
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, path, pagesize=A4, compress=True):
+        reportlab_internals.check()
+        self.path = path
+        self.width, self.height = pagesize
+        self.compress = compress
+        self.page_count = 0
+        self._file = open(path, 'wb')
+        self._offsets = {}
+        self._page_ids = []
+        self._fonts = {}       # ชื่อฟอนต์ หรือ (ชื่อฟอนต์, subset) -> (ชื่อ resource, object id)
+        self._next_id = 3
+        self._file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _reserve(self):
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    def _write_object(self, object_id, body, stream=None):
+        self._offsets[object_id] = self._file.tell()
+        self._file.write(f"{object_id} 0 obj\n".encode() + body)
+        if stream is not None:
+            self._file.write(b'\nstream\n' + stream + b'\nendstream')
+        self._file.write(b'\nendobj\n')
+
+    def font_resource(self, key):
+        if key not in self._fonts:
+            self._fonts[key] = (f"F{len(self._fonts) + 1}", self._reserve())
+        return self._fonts[key][0]
+
+    def encode_text(self, font_name, text):
+        """list ของ (คีย์ฟอนต์, ไบต์) สำหรับวาดข้อความ"""
+        font = pdfmetrics.getFont(font_name)
+        if reportlab_internals.is_truetype(font):
+            return [((font_name, subset), chunk)
+                    for subset, chunk in reportlab_internals.split_text(font, text, self)]
+        return [(font_name, text.encode('cp1252', errors='replace'))]
+
+    def new_page(self):
+        return PageContent(self, self.width, self.height)
+
+    def write_page(self, page):
+        """เขียนหน้าลงไฟล์ทันที หลังจากนี้ไม่ต้องเก็บ page ไว้อีก"""
+        data = page.data()
+        content_id = self._reserve()
+        if self.compress:
+            data = zlib.compress(data)
+            header = f"<< /Length {len(data)} /Filter /FlateDecode >>"
+        else:
+            header = f"<< /Length {len(data)} >>"
+        self._write_object(content_id, header.encode(), data)
+
+        fonts = " ".join(f"/{resource} {self._fonts[name][1]} 0 R"
+                         for name, resource in page.fonts.items())
+        page_id = self._reserve()
+        self._write_object(page_id, (
+            f"<< /Type /Page /Parent {self.PAGES_ID} 0 R "
+            f"/MediaBox [0 0 {_num(self.width)} {_num(self.height)}] "
+            f"/Resources << /Font << {fonts} >> >> /Contents {content_id} 0 R >>").encode())
+        self._page_ids.append(page_id)
+        self.page_count += 1
+
+    def _write_stream(self, body, data):
+        object_id = self._reserve()
+        if self.compress:
+            data = zlib.compress(data)
+            body += " /Filter /FlateDecode"
+        self._write_object(object_id, f"<< {body} /Length {len(data)} >>".encode(), data)
+        return object_id
+
+    def _write_fonts(self):
+        for key, (_, object_id) in self._fonts.items():
+            if isinstance(key, tuple):
+                self._write_truetype_subset(object_id, *key)
+            else:
+                self._write_object(object_id, (
+                    f"<< /Type /Font /Subtype /Type1 /BaseFont /{key} "
+                    f"/Encoding /WinAnsiEncoding >>").encode())
+        self._release_fonts()
+
+    def _release_fonts(self):
+        """ล้างสถานะ subset ของเอกสารนี้ออกจากฟอนต์ TrueType ที่ใช้ร่วมกัน"""
+        for name in {key[0] for key in self._fonts if isinstance(key, tuple)}:
+            reportlab_internals.release_document(pdfmetrics.getFont(name), self)
+
+    def _write_truetype_subset(self, object_id, font_name, subset_index):
+        """ฝัง subset ของฟอนต์ TrueType (สูงสุด 256 ตัวอักษร) แบบเดียวกับ reportlab"""
+        font = pdfmetrics.getFont(font_name)
+        subset = reportlab_internals.subset_codes(font, self, subset_index)
+        base_name = reportlab_internals.subset_font_name(font, subset_index)
+
+        font_data = reportlab_internals.subset_font_file(font, subset)
+        font_file_id = self._write_stream(f"/Length1 {len(font_data)}", font_data)
+        descriptor = reportlab_internals.font_descriptor(font)
+        # Flags: symbolic (ใช้การเข้ารหัสของ subset เอง) ไม่ใช่ nonsymbolic
+        flags = (descriptor['flags'] & ~32) | 4
+        descriptor_id = self._reserve()
+        self._write_object(descriptor_id, (
+            f"<< /Type /FontDescriptor /FontName /{base_name} /Flags {flags} "
+            f"/Ascent {descriptor['ascent']} /Descent {descriptor['descent']} /CapHeight {descriptor['cap_height']} "
+            f"/FontBBox [{' '.join(str(v) for v in descriptor['bbox'])}] "
+            f"/ItalicAngle {descriptor['italic_angle']} /StemV {descriptor['stem_v']} "
+            f"/MissingWidth {descriptor['missing_width']} /FontFile2 {font_file_id} 0 R >>").encode())
+        to_unicode_id = self._write_stream("", reportlab_internals.to_unicode_cmap(base_name, subset))
+
+        widths = " ".join(_num(reportlab_internals.char_width(font, code)) for code in subset)
+        self._write_object(object_id, (
+            f"<< /Type /Font /Subtype /TrueType /BaseFont /{base_name} "
+            f"/FirstChar 0 /LastChar {len(subset) - 1} /Widths [{widths}] "
+            f"/FontDescriptor {descriptor_id} 0 R /ToUnicode {to_unicode_id} 0 R >>").encode())
+
+    def close(self):
+        """เขียนฟอนต์ ตารางหน้า และ xref แล้วปิดไฟล์"""
+        self._write_fonts()
+        kids = " ".join(f"{page_id} 0 R" for page_id in self._page_ids)
+        self._write_object(self.PAGES_ID, (
+            f"<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>").encode())
+        self._write_object(self.CATALOG_ID, f"<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>".encode())
+
+        xref_offset = self._file.tell()
+        size = self._next_id
+        lines = [f"xref\n0 {size}\n", "0000000000 65535 f \n"]
+        for object_id in range(1, size):
+            lines.append(f"{self._offsets.get(object_id, 0):010d} 00000 n \n")
+        self._file.write("".join(lines).encode())
+        self._file.write((f"trailer\n<< /Size {size} /Root {self.CATALOG_ID} 0 R >>\n"
+                          f"startxref\n{xref_offset}\n%%EOF\n").encode())
+        self._file.close()
+
+    def abort(self):
+        """ยกเลิกการเขียน ปิดและลบไฟล์ที่เขียนไม่เสร็จ"""
+        self._release_fonts()
+        self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,90 @@
+
+import json
+
+
+ALL_CATEGORIES = "ทั้งหมด"
+
+DEFAULT_PRODUCTS = [
+    {"id": 1, "name": "น้ำดื่ม", "price": 10, "category": "เครื่องดื่ม", "stock": 100},
+    {"id": 2, "name": "ขนมปัง", "price": 15, "category": "อาหาร", "stock": 50},
+    {"id": 3, "name": "นม", "price": 20, "category": "เครื่องดื่ม", "stock": 80},
+    {"id": 4, "name": "กาแฟ", "price": 25, "category": "เครื่องดื่ม", "stock": 60},
+    {"id": 5, "name": "บะหมี่กึ่งสำเร็จรูป", "price": 12, "category": "อาหาร", "stock": 120},
+    {"id": 6, "name": "น้ำอัดลม", "price": 18, "category": "เครื่องดื่ม", "stock": 90},
+    {"id": 7, "name": "ผลไม้", "price": 30, "category": "อาหาร", "stock": 40},
+    {"id": 8, "name": "ช็อคโกแลต", "price": 22, "category": "ขนม", "stock": 70},
+    {"id": 9, "name": "ข้าวกล่อง", "price": 45, "category": "อาหาร", "stock": 30},
+    {"id": 10, "name": "น้ำผลไม้", "price": 25, "category": "เครื่องดื่ม", "stock": 85}
+]
+
+
+class ProductCatalog:
+    """รายการสินค้าพร้อมดัชนีตามรหัสสินค้า บาร์โค้ด และหมวดหมู่
+
+    สินค้าค้นด้วยบาร์โค้ดได้จากฟิลด์ barcode และจากรหัสสินค้า (id) ที่พิมพ์เป็นข้อความ
+    """
+
+    def __init__(self, products=()):
+        self.products = []
+        self.by_id = {}
+        self.by_barcode = {}
+        self.by_category = {}
+        for product in products:
+            self.add(product)
+
+    @classmethod
+    def load(cls, path='data/products.json'):
+        """โหลดสินค้าจากไฟล์ ถ้าไม่มีไฟล์ใช้สินค้าตัวอย่าง"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return cls(json.load(f))
+        except (OSError, ValueError):
+            return cls(dict(p) for p in DEFAULT_PRODUCTS)
+
+    def add(self, product):
+        if product['id'] in self.by_id:
+            self.remove(product['id'])
+        self.products.append(product)
+        self.by_id[product['id']] = product
+        for code in self._codes(product):
+            self.by_barcode[code] = product
+        self.by_category.setdefault(product['category'], []).append(product)
+
+    def remove(self, product_id):
+        product = self.by_id.pop(product_id)
+        for code in self._codes(product):
+            if self.by_barcode.get(code) is product:
+                del self.by_barcode[code]
+        self.products.remove(product)
+        self.by_category[product['category']].remove(product)
+        if not self.by_category[product['category']]:
+            del self.by_category[product['category']]
+        return product
+
+    @staticmethod
+    def _codes(product):
+        codes = [str(product['id'])]
+        if product.get('barcode'):
+            codes.append(str(product['barcode']))
+        return codes
+
+    def get(self, product_id):
+        return self.by_id.get(product_id)
+
+    def find_barcode(self, code):
+        return self.by_barcode.get(code.strip())
+
+    def categories(self):
+        return list(self.by_category)
+
+    def in_category(self, category):
+        """สินค้าในหมวดหมู่ (ALL_CATEGORIES = ทั้งหมด) โดยไม่ต้องวนหาทั้งรายการ"""
+        if category == ALL_CATEGORIES:
+            return self.products
+        return self.by_category.get(category, [])
+
+    def __len__(self):
+        return len(self.products)
+
+    def __iter__(self):
+        return iter(self.products)
@@ -0,0 +1,134 @@
+
+import tkinter as tk
+
+
+def wheel_steps(delta):
+    """จำนวนขั้นที่ต้องเลื่อนจาก event.delta ของ <MouseWheel> (ค่าบวกคือเลื่อนลง)
+
+    Windows ส่ง delta ครั้งละ 120 ต่อขั้น แต่ macOS ส่งค่าเล็ก ๆ เช่น ±1 จึงใช้เครื่องหมายของ delta แทน
+    """
+    if abs(delta) < 120:
+        return (delta < 0) - (delta > 0)
+    return -int(delta / 120)
+
+
+class VirtualProductGrid:
+    """ตารางปุ่มสินค้าบน Canvas ที่สร้างปุ่มเฉพาะแถวที่มองเห็น
+
+    ปุ่มจะถูกสร้างเป็นชุดเดียวแล้วนำกลับมาใช้ใหม่ (เปลี่ยนข้อความ/คำสั่ง และย้ายตำแหน่ง)
+    เมื่อเลื่อนหรือเปลี่ยนหมวดหมู่ จำนวนวิดเจ็ตจึงขึ้นกับขนาดหน้าจอ ไม่ใช่จำนวนสินค้า
+    ถ้ากำหนด thumbnails (ThumbnailCache) ปุ่มของสินค้าที่มีภาพจะแสดงภาพย่อ ขอเฉพาะภาพของแถวที่มองเห็น
+    """
+
+    def __init__(self, canvas, scrollbar, on_select, columns=3, row_height=90, padding=5,
+                 thumbnails=None):
+        self.canvas = canvas
+        self.scrollbar = scrollbar
+        self.on_select = on_select
+        self.columns = columns
+        self.row_height = row_height
+        self.padding = padding
+        self.thumbnails = thumbnails
+
+        self.products = []
+        self._slots = []   # (window_id, button)
+        self._shown = []   # ข้อความที่แสดงอยู่ในแต่ละช่อง
+        self._cell_width = 0
+        self._pending = None
+
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.scrollbar.configure(command=self.canvas.yview)
+        self.canvas.bind("<Configure>", self._on_configure)
+        self._bind_wheel(self.canvas)
+
+    def set_products(self, products):
+        """แสดงรายการสินค้าใหม่ และเลื่อนกลับไปบนสุด"""
+        self.products = products
+        rows = (len(products) + self.columns - 1) // self.columns
+        self.canvas.configure(scrollregion=(0, 0, self._cell_width * self.columns,
+                                            rows * self.row_height))
+        self.canvas.yview_moveto(0)
+        self.render()
+
+    def refresh(self):
+        """วาดปุ่มที่มองเห็นใหม่ (เช่นเมื่อจำนวนคงเหลือเปลี่ยน)"""
+        self.render()
+
+    def _on_configure(self, event):
+        self._cell_width = max(1, event.width // self.columns)
+        rows = (len(self.products) + self.columns - 1) // self.columns
+        self.canvas.configure(scrollregion=(0, 0, event.width, rows * self.row_height))
+        for window_id, _ in self._slots:
+            self.canvas.itemconfigure(window_id, width=self._cell_width - 2 * self.padding)
+        self._schedule_render()
+
+    def _on_yscroll(self, first, last):
+        self.scrollbar.set(first, last)
+        self._schedule_render()
+
+    def _schedule_render(self):
+        # ปรับขนาดหน้าต่าง/เลื่อนส่งเหตุการณ์ถี่มาก วางปุ่มครั้งเดียวเมื่อ Tk ว่าง
+        if self._pending is None:
+            self._pending = self.canvas.after_idle(self.render)
+
+    def _on_thumbnail(self, source, photo):
+        self._schedule_render()
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", lambda e: self.canvas.yview_scroll(wheel_steps(e.delta), "units"))
+        widget.bind("<Button-4>", lambda e: self.canvas.yview_scroll(-1, "units"))
+        widget.bind("<Button-5>", lambda e: self.canvas.yview_scroll(1, "units"))
+
+    def _slot(self, index):
+        while len(self._slots) <= index:
+            button = tk.Button(self.canvas, bg='#3498db', fg='white',
+                               font=("TH Sarabun New", 10), relief=tk.RAISED, bd=1)
+            self._bind_wheel(button)
+            window_id = self.canvas.create_window(
+                0, 0, window=button, anchor="nw",
+                width=max(1, self._cell_width - 2 * self.padding),
+                height=self.row_height - 2 * self.padding)
+            self._slots.append((window_id, button))
+            self._shown.append(None)
+        return self._slots[index]
+
+    def render(self):
+        """วางปุ่มเฉพาะแถวที่อยู่ในพื้นที่มองเห็นของ Canvas"""
+        if self._pending is not None:
+            self.canvas.after_cancel(self._pending)
+            self._pending = None
+        if not self._cell_width:
+            return
+        top = self.canvas.canvasy(0)
+        bottom = top + self.canvas.winfo_height()
+        first_row = max(0, int(top // self.row_height))
+        last_row = int(bottom // self.row_height)
+
+        start = first_row * self.columns
+        end = min(len(self.products), (last_row + 1) * self.columns)
+
+        used = 0
+        sources = set()
+        for index in range(start, end):
+            product = self.products[index]
+            window_id, button = self._slot(used)
+            row, col = divmod(index, self.columns)
+            self.canvas.coords(window_id, col * self._cell_width + self.padding,
+                               row * self.row_height + self.padding)
+            text = f"{product['name']}\n{product['price']} บาท\nคงเหลือ: {product['stock']}"
+            photo = None
+            if self.thumbnails is not None and product.get('image'):
+                sources.add(product['image'])
+                photo = self.thumbnails.request(product['image'], self._on_thumbnail)
+            if self._shown[used] != (product['id'], text, photo):
+                button.config(text=text, image=photo or '', compound=tk.LEFT if photo else tk.NONE,
+                              command=lambda p=product: self.on_select(p))
+                button.image = photo    # ให้ภาพอยู่ตราบที่ปุ่มยังแสดง แม้ถูกนำออกจากแคช
+                self._shown[used] = (product['id'], text, photo)
+            self.canvas.itemconfigure(window_id, state='normal')
+            used += 1
+        if self.thumbnails is not None:
+            self.thumbnails.cancel_except(sources)
+
+        for window_id, _ in self._slots[used:]:
+            self.canvas.itemconfigure(window_id, state='hidden')
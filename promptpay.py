@@ -0,0 +1,72 @@
+
+"""สร้างข้อมูล QR พร้อมเพย์ตามมาตรฐาน EMVCo (Thai QR Payment)"""
+
+import re
+
+
+def _make_crc_table(poly=0x1021):
+    table = []
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & 0x8000 else (crc << 1)
+        table.append(crc & 0xFFFF)
+    return table
+
+
+CRC_TABLE = _make_crc_table()
+
+
+def crc16_update(crc, data):
+    """ต่อการคำนวณ CRC-16/CCITT-FALSE จากค่า crc เดิมด้วยข้อมูล data"""
+    table = CRC_TABLE
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ table[(crc >> 8) ^ byte]
+    return crc
+
+
+def crc16(data):
+    return crc16_update(0xFFFF, data)
+
+
+def tlv(tag, value):
+    return f"{tag}{len(value):02d}{value}"
+
+
+PROMPTPAY_AID = "A000000677010111"
+
+
+def format_promptpay_id(promptpay_id):
+    """แปลงเบอร์โทร/เลขประจำตัวผู้เสียภาษี/e-Wallet เป็น sub-tag ของพร้อมเพย์"""
+    digits = re.sub(r"\D", "", promptpay_id)
+    if len(digits) >= 15:
+        return tlv("03", digits)
+    if len(digits) >= 13:
+        return tlv("02", digits)
+    # เบอร์โทรศัพท์: 0812345678 -> 0066812345678
+    return tlv("01", ("0066" + digits.lstrip("0")).rjust(13, "0"))
+
+
+class PromptPayPayload:
+    """สร้าง payload พร้อมเพย์สำหรับยอดเงินต่างๆ ของผู้รับเงินรายเดียว
+
+    ส่วนหน้าของ payload (ทุก tag ก่อนยอดเงิน) ไม่เปลี่ยนตามยอด จึงคำนวณ CRC ของส่วนนี้ไว้ก่อน
+    แล้วต่อ CRC เฉพาะส่วนยอดเงินในแต่ละครั้ง
+    """
+
+    def __init__(self, promptpay_id):
+        self.promptpay_id = promptpay_id
+        merchant = tlv("00", PROMPTPAY_AID) + format_promptpay_id(promptpay_id)
+        self.prefix = "000201" + "010212" + tlv("29", merchant) + tlv("53", "764")
+        self.static_prefix = "000201" + "010211" + tlv("29", merchant) + tlv("53", "764")
+        self._prefix_crc = crc16(self.prefix.encode("ascii"))
+
+    def build(self, amount=None):
+        """payload สำหรับยอดเงิน amount (None = QR แบบไม่ระบุยอด)"""
+        if amount is None:
+            body = self.static_prefix + tlv("58", "TH") + "6304"
+            return body + f"{crc16(body.encode('ascii')):04X}"
+
+        suffix = tlv("54", f"{amount:.2f}") + tlv("58", "TH") + "6304"
+        crc = crc16_update(self._prefix_crc, suffix.encode("ascii"))
+        return self.prefix + suffix + f"{crc:04X}"
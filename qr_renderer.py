@@ -0,0 +1,70 @@
+
+import collections
+import concurrent.futures
+
+from metrics import metrics
+
+
+def render_qr_image(payload, size=200):
+    """เข้ารหัส payload เป็นภาพ QR (ทำงานนอกเธรดของ Tk ได้)"""
+    # qrcode และ PIL โหลดเมื่อสร้าง QR ครั้งแรก เพื่อให้เปิดโปรแกรมได้เร็ว
+    import qrcode
+    from PIL import Image
+
+    with metrics.timer('qr_encode'):
+        qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=6, border=2)
+        qr.add_data(payload)
+        qr.make(fit=True)
+        image = qr.make_image(fill_color="black", back_color="white").get_image()
+        # ภาพ QR เป็นสีขาวดำ ใช้ NEAREST ให้ขอบคมและเร็วกว่า LANCZOS
+        return image.resize((size, size), Image.Resampling.NEAREST)
+
+
+class QRImageCache:
+    """สร้างภาพ QR ในเธรดพื้นหลังและเก็บ PhotoImage ที่สร้างแล้วแบบ LRU ตาม payload"""
+
+    POLL_INTERVAL_MS = 20
+
+    def __init__(self, root, size=200, maxsize=32):
+        self.root = root
+        self.size = size
+        self.maxsize = maxsize
+        self._photos = collections.OrderedDict()
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="qr-render")
+
+    def request(self, payload, callback, on_error=None):
+        """เรียก callback(photo) บนเธรดของ Tk เมื่อภาพพร้อม คืนค่า True ถ้าได้จากแคชทันที"""
+        photo = self._photos.get(payload)
+        if photo is not None:
+            self._photos.move_to_end(payload)
+            metrics.count('qr_cache_hits')
+            callback(photo)
+            return True
+        metrics.count('qr_cache_misses')
+
+        future = self._executor.submit(render_qr_image, payload, self.size)
+        self.root.after(self.POLL_INTERVAL_MS, self._poll, payload, future, callback, on_error)
+        return False
+
+    def _poll(self, payload, future, callback, on_error):
+        if not future.done():
+            self.root.after(self.POLL_INTERVAL_MS, self._poll, payload, future, callback, on_error)
+            return
+        if future.exception() is not None:
+            if on_error is not None:
+                on_error(future.exception())
+            return
+
+        # PhotoImage ต้องสร้างบนเธรดของ Tk เท่านั้น
+        photo = self._photos.get(payload)
+        if photo is None:
+            from PIL import ImageTk
+            photo = ImageTk.PhotoImage(future.result())
+            self._photos[payload] = photo
+            while len(self._photos) > self.maxsize:
+                self._photos.popitem(last=False)
+        callback(photo)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,218 @@
+
+"""รวมไฟล์ใบเสร็จของวันที่ปิดแล้วเป็นไฟล์ archive วันละไฟล์ พร้อมดัชนีสำหรับพิมพ์ซ้ำ
+
+ไฟล์ใบเสร็จแยกทีละใบในโฟลเดอร์ receipts/ จะถูกต่อท้ายลง receipts/archive/<วันที่>.pack
+และบันทึกตำแหน่ง (offset, ความยาว) ตามเลขที่ใบเสร็จไว้ใน receipts/archive/index.db
+การพิมพ์ซ้ำจึงเป็นการค้นดัชนีหนึ่งครั้ง แล้ว seek และอ่านจากไฟล์ archive เพียงครั้งเดียว
+
+ตัวอย่าง:
+    python receipt_archive.py pack
+    python receipt_archive.py reprint PM202610181234 --output reprint.pdf
+"""
+
+import argparse
+import datetime
+import os
+import re
+import sqlite3
+import sys
+import threading
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    receipt_no TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    day TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    mtime REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (receipt_no, kind)
+);
+"""
+
+# นามสกุลไฟล์ใบเสร็จที่รวมเข้า archive (PDF และ ESC/POS)
+RECEIPT_KINDS = ('.pdf', '.escpos')
+
+# เลขที่ใบเสร็จที่สร้างจากหน้าจอมีวันที่อยู่ในตัว เช่น PM202610181234
+RECEIPT_DATE = re.compile(r'^PM(\d{4})(\d{2})(\d{2})\d+$')
+
+
+class ReceiptArchive:
+    """archive ใบเสร็จรายวันพร้อมดัชนีตามเลขที่ใบเสร็จ
+
+    แต่ละเธรดได้ connection ของดัชนีเป็นของตัวเอง จึงรวมไฟล์ในเธรดพื้นหลังได้
+    """
+
+    def __init__(self, receipts_dir='receipts'):
+        self.receipts_dir = receipts_dir
+        self.archive_dir = os.path.join(receipts_dir, 'archive')
+        os.makedirs(self.archive_dir, exist_ok=True)
+        self.index_path = os.path.join(self.archive_dir, 'index.db')
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.conn.executescript(SCHEMA)
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(receipts)")}
+        if 'mtime' not in columns:
+            # ดัชนีจากรุ่นก่อนไม่มีเวลาของไฟล์ (0 = ถือว่าเก่ากว่าแม่แบบใบเสร็จ)
+            with self.conn:
+                self.conn.execute(
+                    "ALTER TABLE receipts ADD COLUMN mtime REAL NOT NULL DEFAULT 0")
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.index_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def pack_path(self, day):
+        return os.path.join(self.archive_dir, f"{day}.pack")
+
+    # ----- การพิมพ์ซ้ำ -----
+
+    def lookup(self, receipt_no, kind=None):
+        """(วันที่, offset, ความยาว, นามสกุล) ของใบเสร็จใน archive หรือ None"""
+        if kind is None:
+            row = self.conn.execute(
+                "SELECT day, offset, length, kind FROM receipts WHERE receipt_no = ? "
+                "ORDER BY kind = '.pdf' DESC LIMIT 1", (receipt_no,)).fetchone()
+        else:
+            row = self.conn.execute(
+                "SELECT day, offset, length, kind FROM receipts WHERE receipt_no = ? AND kind = ?",
+                (receipt_no, kind)).fetchone()
+        return row
+
+    def archived_mtime(self, receipt_no, kind='.pdf'):
+        """เวลาแก้ไขของไฟล์ใบเสร็จตอนถูกรวมเข้า archive หรือ None ถ้ายังไม่ถูกรวม"""
+        row = self.conn.execute(
+            "SELECT mtime FROM receipts WHERE receipt_no = ? AND kind = ?",
+            (receipt_no, kind)).fetchone()
+        return None if row is None else row[0]
+
+    def read(self, receipt_no, kind=None):
+        """ข้อมูลใบเสร็จและนามสกุล (bytes, '.pdf') จาก archive หรือไฟล์ที่ยังไม่ถูกรวม
+        คืนค่า None ถ้าไม่พบ"""
+        entry = self.lookup(receipt_no, kind)
+        if entry is not None:
+            day, offset, length, kind = entry
+            with open(self.pack_path(day), 'rb') as f:
+                f.seek(offset)
+                return f.read(length), kind
+
+        for ext in ((kind,) if kind else RECEIPT_KINDS):
+            path = os.path.join(self.receipts_dir, receipt_no + ext)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    return f.read(), ext
+        return None
+
+    # ----- การรวมไฟล์ -----
+
+    def _loose_receipts(self):
+        """ไฟล์ใบเสร็จที่ยังไม่ถูกรวม: list ของ (เลขที่ใบเสร็จ, นามสกุล, path, mtime)"""
+        found = []
+        with os.scandir(self.receipts_dir) as entries:
+            for entry in entries:
+                receipt_no, ext = os.path.splitext(entry.name)
+                if ext in RECEIPT_KINDS and entry.is_file():
+                    found.append((receipt_no, ext, entry.path, entry.stat().st_mtime))
+        return found
+
+    @staticmethod
+    def receipt_day(receipt_no, mtime, sales_store=None):
+        """วันที่ขายของใบเสร็จ: จากเลขที่ใบเสร็จ จากประวัติการขาย หรือจากเวลาของไฟล์"""
+        match = RECEIPT_DATE.match(receipt_no)
+        if match:
+            return "-".join(match.groups())
+        if sales_store is not None:
+            sale = sales_store.find_by_receipt(receipt_no)
+            if sale is not None:
+                return sale['date'][:10]
+        return datetime.date.fromtimestamp(mtime).strftime("%Y-%m-%d")
+
+    def pack_closed_days(self, sales_store=None, today=None, cancelled=None):
+        """รวมใบเสร็จของทุกวันก่อนวันนี้เข้า archive คืนค่า (จำนวนใบ, จำนวนวัน)
+
+        ข้อมูลถูก fsync และบันทึกดัชนีก่อนลบไฟล์เดิม ถ้าโปรแกรมหยุดกลางทาง
+        การรันครั้งถัดไปจะรวมไฟล์ที่เหลือต่อได้ ไฟล์ของใบที่อยู่ในดัชนีแล้ว (เช่นสร้างใหม่ด้วย
+        regenerate_receipts.py) ถูกต่อท้ายอีกครั้งและดัชนีชี้ไปยังข้อมูลชุดใหม่
+        """
+        today = today or datetime.date.today().strftime("%Y-%m-%d")
+        by_day = {}
+        for receipt_no, ext, path, mtime in self._loose_receipts():
+            day = self.receipt_day(receipt_no, mtime, sales_store)
+            if day < today:
+                by_day.setdefault(day, []).append((receipt_no, ext, path, mtime))
+
+        packed = 0
+        for day in sorted(by_day):
+            if cancelled is not None and cancelled():
+                break
+            packed += self._pack_day(day, by_day[day])
+        return packed, len(by_day)
+
+    def _pack_day(self, day, receipts):
+        rows = []
+        with open(self.pack_path(day), 'ab') as pack:
+            for receipt_no, ext, path, mtime in sorted(receipts):
+                with open(path, 'rb') as f:
+                    data = f.read()
+                rows.append((receipt_no, ext, day, pack.tell(), len(data), mtime))
+                pack.write(data)
+            pack.flush()
+            os.fsync(pack.fileno())
+
+        conn = self.conn
+        with conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO receipts (receipt_no, kind, day, offset, length, mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows)
+        for receipt_no, ext, path, mtime in receipts:
+            os.remove(path)
+        return len(rows)
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="archive ใบเสร็จรายวันและการพิมพ์ซ้ำ")
+    parser.add_argument("--receipts-dir", default="receipts", help="โฟลเดอร์ใบเสร็จ")
+    parser.add_argument("--data-dir", default="data", help="โฟลเดอร์ข้อมูลการขาย")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("pack", help="รวมใบเสร็จของวันที่ปิดแล้ว")
+    reprint = sub.add_parser("reprint", help="พิมพ์ใบเสร็จซ้ำจากเลขที่ใบเสร็จ")
+    reprint.add_argument("receipt_no")
+    reprint.add_argument("--output", help="ไฟล์ปลายทาง (ค่าเริ่มต้น: ส่งตามการตั้งค่าร้าน)")
+    args = parser.parse_args(argv)
+
+    from sales_engine import SalesEngine
+
+    engine = SalesEngine(args.data_dir, args.receipts_dir)
+    try:
+        if args.command == "pack":
+            packed, days = engine.archive.pack_closed_days(engine.sales_store)
+            print(f"รวมใบเสร็จ {packed} ใบจาก {days} วัน")
+            return 0
+        path = engine.reprint(args.receipt_no, args.output)
+        if path is None:
+            print(f"ไม่พบใบเสร็จ {args.receipt_no}", file=sys.stderr)
+            return 1
+        print(f"พิมพ์ใบเสร็จ {args.receipt_no} ซ้ำ: {path}")
+        return 0
+    finally:
+        engine.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+
+import queue
+import threading
+
+
+class ReceiptRenderQueue:
+    """คิวสร้างใบเสร็จ PDF ในเธรดพื้นหลัง เพื่อไม่ให้หน้าจอค้างระหว่างพิมพ์
+
+    ผลลัพธ์จากเธรดทำงานจะถูกส่งกลับผ่านคิว และเรียก callback บนเธรดของ Tk
+    ด้วย root.after เท่านั้น (tkinter ไม่ปลอดภัยเมื่อเรียกจากหลายเธรด)
+    """
+
+    POLL_INTERVAL_MS = 50
+
+    def __init__(self, root, workers=2, max_pending=32, generator_factory=None):
+        self.root = root
+        self._jobs = queue.Queue(maxsize=max_pending)
+        self._results = queue.Queue()
+        self._pending = 0
+        self._polling = False
+        self._closed = False
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, args=(generator_factory,),
+                                      name=f"receipt-render-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, sale_data, on_done=None, on_error=None):
+        """ส่งงานสร้างใบเสร็จเข้าคิว คืนค่า False ถ้าคิวเต็มหรือปิดแล้ว"""
+        if self._closed:
+            return False
+        try:
+            self._jobs.put_nowait((sale_data, on_done, on_error))
+        except queue.Full:
+            return False
+        self._pending += 1
+        self._schedule_poll()
+        return True
+
+    @property
+    def pending(self):
+        return self._pending
+
+    def _worker(self, generator_factory):
+        # สร้างตัวสร้างใบเสร็จเมื่อมีงานแรก (import reportlab ในเธรดนี้ ไม่ใช่ตอนเปิดโปรแกรม)
+        generator = None
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                break
+            sale_data, on_done, on_error = job
+            try:
+                if generator is None:
+                    if generator_factory is None:
+                        from receipt_template import ReceiptGenerator as generator_factory
+                    generator = generator_factory()
+                path = generator.generate_receipt(sale_data)
+                self._results.put((on_done, (sale_data, path)))
+            except Exception as e:
+                self._results.put((on_error, (sale_data, e)))
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        self._dispatch_results()
+        if self._pending:
+            self._schedule_poll()
+
+    def _dispatch_results(self):
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._pending -= 1
+            if callback is not None:
+                callback(*args)
+
+    def shutdown(self):
+        """รอให้งานที่ค้างในคิวเสร็จทั้งหมด แล้วเรียก callback ที่เหลือก่อนปิด"""
+        if self._closed:
+            return
+        self._closed = True
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._dispatch_results()
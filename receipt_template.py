@@ -4,21 +4,37 @@ from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 import datetime
 import os
+from pdf_fonts import FALLBACK_FONTS, pdf_fonts
+from sales_store import sale_totals
+from store_settings import StoreSettings
+from thai_baht import baht_text, number_text
 
 class ReceiptGenerator:
-    def __init__(self):
+    def __init__(self, output_dir='receipts', settings=None):
         self.receipt_count = 0
+        self.output_dir = output_dir
+        self.settings = settings if settings is not None else StoreSettings()
+        self.font, self.bold_font = FALLBACK_FONTS
+    
+    def receipt_path(self, receipt_no):
+        """ตำแหน่งไฟล์ PDF ของใบเสร็จ"""
+        return f"{self.output_dir}/{receipt_no}.pdf"
     
     def generate_receipt(self, sale_data):
         """สร้างใบเสร็จรับเงิน"""
         # สร้างชื่อไฟล์
-        filename = f"receipts/{sale_data['receipt_no']}.pdf"
+        filename = self.receipt_path(sale_data['receipt_no'])
+        self.font, self.bold_font = self.load_fonts()
         
         # สร้าง PDF
         c = canvas.Canvas(filename, pagesize=A4)
         width, height = A4
         
-        # ข้อมูลบริษัท
+        # ส่วนคงที่ของใบเสร็จ (ชื่อร้าน ที่อยู่ และส่วนท้าย)
+        self.draw_static_header(c, width, height)
+        self.draw_footer(c, width, height)
+        
+        # ข้อมูลใบเสร็จ
         self.draw_header(c, width, height, sale_data)
         
         # รายการสินค้า
@@ -27,43 +43,48 @@ class ReceiptGenerator:
         # ยอดรวม
         self.draw_totals(c, width, height, sale_data)
         
-        # ท้ายใบเสร็จ
-        self.draw_footer(c, width, height)
-        
         c.save()
         return filename
     
-    def draw_header(self, c, width, height, sale_data):
-        """วาดส่วนหัวใบเสร็จ"""
+    def load_fonts(self):
+        """(ฟอนต์ปกติ, ฟอนต์ตัวหนา) ฟอนต์ไทยลงทะเบียนครั้งเดียวต่อโปรเซส (ครั้งแรกที่สร้างใบเสร็จ)"""
+        return pdf_fonts(self.settings)
+    
+    def draw_static_header(self, c, width, height):
+        """วาดส่วนหัวใบเสร็จที่ไม่เปลี่ยนตามการขาย"""
         # ชื่อร้าน
-        c.setFont("Helvetica-Bold", 18)
-        c.drawCentredString(width/2, height - 50, "PAYMA STORE")
+        c.setFont(self.bold_font, 18)
+        c.drawCentredString(width/2, height - 50, self.settings['store_name'].upper())
         
-        c.setFont("Helvetica", 10)
-        c.drawCentredString(width/2, height - 70, "123 ถนนพายมา แขวงพายมา เขตพายมา กรุงเทพ 10100")
-        c.drawCentredString(width/2, height - 85, "โทร: 02-123-4567 | อีเมล: info@payma.com")
+        c.setFont(self.font, 10)
+        c.drawCentredString(width/2, height - 70, self.settings['address'])
+        c.drawCentredString(width/2, height - 85, 
+                            f"โทร: {self.settings['phone']} | อีเมล: {self.settings['email']}")
         
         # เส้นคั่น
         c.line(50, height - 100, width - 50, height - 100)
         
         # ข้อมูลใบเสร็จ
-        c.setFont("Helvetica-Bold", 12)
+        c.setFont(self.bold_font, 12)
         c.drawString(50, height - 120, "ใบเสร็จรับเงิน")
         
-        c.setFont("Helvetica", 10)
-        c.drawString(50, height - 140, f"เลขที่: {sale_data['receipt_no']}")
-        c.drawString(50, height - 155, f"วันที่: {sale_data['date']}")
-        
+        c.setFont(self.font, 10)
         c.drawString(width - 150, height - 140, "ผู้ขาย: Payma System")
         c.drawString(width - 150, height - 155, "ผู้ซื้อ: ลูกค้าทั่วไป")
         
         # เส้นคั่น
         c.line(50, height - 170, width - 50, height - 170)
     
+    def draw_header(self, c, width, height, sale_data):
+        """วาดข้อมูลใบเสร็จที่เปลี่ยนทุกใบ (เลขที่และวันที่)"""
+        c.setFont(self.font, 10)
+        c.drawString(50, height - 140, f"เลขที่: {sale_data['receipt_no']}")
+        c.drawString(50, height - 155, f"วันที่: {sale_data['date']}")
+    
     def draw_items(self, c, width, height, sale_data):
         """วาดรายการสินค้า"""
         # หัวข้อตาราง
-        c.setFont("Helvetica-Bold", 10)
+        c.setFont(self.bold_font, 10)
         c.drawString(50, height - 190, "ลำดับ")
         c.drawString(100, height - 190, "รายการสินค้า")
         c.drawString(width - 150, height - 190, "จำนวน")
@@ -74,11 +95,12 @@ class ReceiptGenerator:
         # รายการสินค้า
         y_position = height - 210
         for i, item in enumerate(sale_data['items'], 1):
-            c.setFont("Helvetica", 9)
+            c.setFont(self.font, 9)
             c.drawString(50, y_position, str(i))
+            quantity = item.get('quantity', 1)
             c.drawString(100, y_position, item['name'])
-            c.drawString(width - 150, y_position, "1")
-            c.drawString(width - 80, y_position, f"{item['price']:,.2f}")
+            c.drawString(width - 150, y_position, str(quantity))
+            c.drawString(width - 80, y_position, f"{item['price'] * quantity:,.2f}")
             y_position -= 15
             
             if y_position < 100:  # ขึ้นหน้าใหม่ถ้าเนื้อที่ไม่พอ
@@ -90,13 +112,11 @@ class ReceiptGenerator:
     def draw_totals(self, c, width, height, sale_data):
         """วาดส่วนยอดรวม"""
         # คำนวณยอดรวมต่างๆ
-        subtotal = sale_data['total']
-        tax_amount = subtotal * (sale_data['tax_rate'] / 100)
-        grand_total = subtotal + tax_amount
+        subtotal, tax_amount, grand_total = sale_totals(sale_data)
         
         y_position = 300  # ตำแหน่งเริ่มต้น
         
-        c.setFont("Helvetica", 10)
+        c.setFont(self.font, 10)
         c.drawString(width - 150, y_position, "ยอดรวมก่อนภาษี:")
         c.drawString(width - 80, y_position, f"{subtotal:,.2f}")
         
@@ -105,18 +125,18 @@ class ReceiptGenerator:
         
         c.line(width - 150, y_position - 20, width - 50, y_position - 20)
         
-        c.setFont("Helvetica-Bold", 12)
+        c.setFont(self.bold_font, 12)
         c.drawString(width - 150, y_position - 35, "ยอดรวมสุทธิ:")
         c.drawString(width - 80, y_position - 35, f"{grand_total:,.2f}")
         
-        # ตัวเลขเป็นตัวหนังสือ (แบบง่ายๆ)
-        c.setFont("Helvetica", 9)
+        # ตัวเลขเป็นตัวหนังสือ
+        c.setFont(self.font, 9)
         thai_baht = self.number_to_thai_baht(grand_total)
         c.drawString(50, y_position - 50, f"ตัวอักษร: {thai_baht}")
     
     def draw_footer(self, c, width, height):
         """วาดส่วนท้ายใบเสร็จ"""
-        c.setFont("Helvetica", 8)
+        c.setFont(self.font, 8)
         c.drawCentredString(width/2, 100, "ขอบคุณที่ใช้บริการ Payma")
         c.drawCentredString(width/2, 85, "ใบเสร็จนี้เป็นหลักฐานการชำระเงินที่ถูกต้อง")
         c.drawCentredString(width/2, 70, "โปรดเก็บใบเสร็จนี้ไว้เป็นหลักฐานในการเคลมสินค้า")
@@ -129,59 +149,9 @@ class ReceiptGenerator:
         c.drawCentredString(width/2 + 75, 40, "ลูกค้า")
     
     def number_to_thai_baht(self, amount):
-        """แปลงตัวเลขเป็นตัวหนังสือภาษาไทย (แบบง่าย)"""
-        units = ['', 'สิบ', 'ร้อย', 'พัน', 'หมื่น', 'แสน', 'ล้าน']
-        numbers = ['ศูนย์', 'หนึ่ง', 'สอง', 'สาม', 'สี่', 'ห้า', 'หก', 'เจ็ด', 'แปด', 'เก้า']
-        
-        if amount == 0:
-            return "ศูนย์บาทถ้วน"
-        
-        # แยกส่วนบาทและสตางค์
-        baht = int(amount)
-        satang = int(round((amount - baht) * 100))
-        
-        # แปลงส่วนบาท
-        if baht == 0:
-            baht_text = ""
-        else:
-            baht_text = self.convert_number(baht) + "บาท"
-        
-        # แปลงส่วนสตางค์
-        if satang == 0:
-            satang_text = "ถ้วน"
-        else:
-            satang_text = self.convert_number(satang) + "สตางค์"
-        
-        return baht_text + satang_text
+        """แปลงตัวเลขเป็นตัวหนังสือภาษาไทย"""
+        return baht_text(amount)
     
     def convert_number(self, num):
         """แปลงตัวเลขเป็นตัวหนังสือ"""
-        if num == 0:
-            return ""
-        
-        numbers = ['', 'หนึ่ง', 'สอง', 'สาม', 'สี่', 'ห้า', 'หก', 'เจ็ด', 'แปด', 'เก้า']
-        units = ['', 'สิบ', 'ร้อย', 'พัน', 'หมื่น', 'แสน', 'ล้าน']
-        
-        text = ""
-        num_str = str(num)
-        length = len(num_str)
-        
-        for i, digit in enumerate(num_str):
-            digit_int = int(digit)
-            unit_index = length - i - 1
-            
-            if digit_int > 0:
-                if unit_index == 1 and digit_int == 2:
-                    text += "ยี่สิบ"
-                elif unit_index == 1 and digit_int == 1:
-                    text += "สิบ"
-                else:
-                    if digit_int == 1 and unit_index == 0 and i > 0:
-                        text += "เอ็ด"
-                    else:
-                        text += numbers[digit_int]
-                    
-                    if unit_index > 0:
-                        text += units[unit_index]
-        
-        return text
+        return number_text(num)
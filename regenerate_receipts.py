@@ -0,0 +1,137 @@
+
+"""สร้างใบเสร็จ PDF ใหม่จากประวัติการขายแบบไม่ต้องเปิดหน้าจอ
+
+ตัวอย่าง:
+    python regenerate_receipts.py --from 2026-10-01 --to 2026-10-31
+    python regenerate_receipts.py --receipt PM202610181234 --force
+"""
+
+import argparse
+import concurrent.futures
+import datetime
+import os
+import sys
+import time
+
+from receipt_archive import ReceiptArchive
+from receipt_template import ReceiptGenerator
+from sales_store import open_sales_store
+from store_settings import StoreSettings
+
+
+_generator = None
+
+
+def _init_worker(output_dir, settings_path):
+    global _generator
+    _generator = ReceiptGenerator(output_dir, StoreSettings(settings_path))
+
+
+def _render(sale_data):
+    return _generator.generate_receipt(sale_data)
+
+
+def iter_selected_sales(store, date_from=None, date_to=None, receipts=None):
+    """วนอ่านการขายตามช่วงวันที่ (รวมวันสุดท้าย) หรือตามเลขที่ใบเสร็จ"""
+    if receipts:
+        for receipt_no in receipts:
+            sale = store.find_by_receipt(receipt_no)
+            if sale is None:
+                print(f"ไม่พบใบเสร็จ {receipt_no}", file=sys.stderr)
+            else:
+                yield sale
+        return
+
+    end = None
+    if date_to:
+        end = (datetime.datetime.strptime(date_to, "%Y-%m-%d")
+               + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+    yield from store.iter_sales(date_from, end)
+
+
+def is_up_to_date(path, template_mtime, archive=None, receipt_no=None):
+    """ไฟล์ใบเสร็จ (หรือใบเสร็จนี้ใน archive) มีอยู่แล้วและใหม่กว่าแม่แบบใบเสร็จ"""
+    try:
+        return os.path.getmtime(path) >= template_mtime
+    except OSError:
+        pass
+    if archive is not None:
+        mtime = archive.archived_mtime(receipt_no, '.pdf')
+        return mtime is not None and mtime >= template_mtime
+    return False
+
+
+def regenerate(sales, output_dir='receipts', workers=None, force=False, max_in_flight=None,
+               settings_path='data/settings.json'):
+    """กระจายการสร้างใบเสร็จไปยัง process pool คืนค่า (สร้าง, ข้าม, ผิดพลาด, วินาที)"""
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 4
+    paths = ReceiptGenerator(output_dir, StoreSettings(settings_path))
+    archive = ReceiptArchive(output_dir)
+    template_mtime = os.path.getmtime(sys.modules[ReceiptGenerator.__module__].__file__)
+
+    rendered = skipped = failed = 0
+    started = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(output_dir, settings_path)) as pool:
+        in_flight = {}
+
+        def collect(done):
+            nonlocal rendered, failed
+            for future in done:
+                receipt_no = in_flight.pop(future)
+                try:
+                    future.result()
+                    rendered += 1
+                except Exception as e:
+                    failed += 1
+                    print(f"สร้างใบเสร็จ {receipt_no} ไม่สำเร็จ: {e}", file=sys.stderr)
+
+        for sale in sales:
+            if not force and is_up_to_date(paths.receipt_path(sale['receipt_no']), template_mtime,
+                                           archive, sale['receipt_no']):
+                skipped += 1
+                continue
+            # จำกัดจำนวนงานที่ค้างอยู่ เพื่อไม่ให้โหลดประวัติทั้งหมดเข้าหน่วยความจำ
+            if len(in_flight) >= max_in_flight:
+                done, _ = concurrent.futures.wait(
+                    in_flight, return_when=concurrent.futures.FIRST_COMPLETED)
+                collect(done)
+            in_flight[pool.submit(_render, sale)] = sale['receipt_no']
+
+        collect(concurrent.futures.wait(in_flight)[0])
+    archive.close()
+
+    return rendered, skipped, failed, time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="สร้างใบเสร็จ PDF ใหม่จากประวัติการขาย")
+    parser.add_argument("--data-dir", default="data", help="โฟลเดอร์ข้อมูลการขาย")
+    parser.add_argument("--backend", default="sqlite", choices=["sqlite", "journal"])
+    parser.add_argument("--output-dir", default="receipts", help="โฟลเดอร์สำหรับไฟล์ PDF")
+    parser.add_argument("--from", dest="date_from", help="วันที่เริ่มต้น (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="date_to", help="วันที่สิ้นสุด (YYYY-MM-DD รวมวันนี้)")
+    parser.add_argument("--receipt", action="append", help="เลขที่ใบเสร็จ (ระบุซ้ำได้)")
+    parser.add_argument("--workers", type=int, default=None, help="จำนวน process")
+    parser.add_argument("--force", action="store_true", help="สร้างใหม่แม้ไฟล์เป็นปัจจุบันแล้ว")
+    args = parser.parse_args(argv)
+
+    store = open_sales_store(args.backend, args.data_dir)
+    try:
+        sales = iter_selected_sales(store, args.date_from, args.date_to, args.receipt)
+        rendered, skipped, failed, elapsed = regenerate(
+            sales, args.output_dir, args.workers, args.force,
+            settings_path=os.path.join(args.data_dir, 'settings.json'))
+    finally:
+        store.close()
+
+    rate = rendered / elapsed if elapsed > 0 else 0.0
+    print(f"สร้าง {rendered} ใบ ข้าม {skipped} ใบ ผิดพลาด {failed} ใบ "
+          f"ใน {elapsed:.2f} วินาที ({rate:.1f} ใบ/วินาที)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
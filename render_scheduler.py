@@ -0,0 +1,44 @@
+
+import time
+
+from metrics import metrics
+
+
+class RenderScheduler:
+    """รวมการวาดหน้าจอที่ถูกขอหลายครั้งให้เหลือครั้งเดียวเมื่อ Tk ว่าง (after_idle)
+
+    ผู้เรียกทำเครื่องหมายส่วนที่ข้อมูลเปลี่ยน (invalidate) แทนการวาดทันที
+    สแกนสินค้า 20 ชิ้นติดกันจึงวาดตะกร้าและตารางสินค้าครั้งเดียว
+    เวลาวาดแต่ละรอบบันทึกใน metrics เป็น ui_frame และ ui_render.<ชื่อ>
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._views = {}        # ชื่อ -> ฟังก์ชันวาด
+        self._dirty = {}        # ชื่อที่ต้องวาดใหม่ (dict เพื่อคงลำดับ)
+        self._pending = None
+
+    def register(self, name, render):
+        self._views[name] = render
+
+    def invalidate(self, *names):
+        for name in names:
+            self._dirty[name] = True
+        metrics.count('ui_invalidations', len(names))
+        if self._pending is None:
+            self._pending = self.root.after_idle(self.flush)
+
+    def flush(self):
+        """วาดทุกส่วนที่ค้างอยู่ทันที (เช่นก่อนอ่านค่าที่เลือกจากวิดเจ็ต)"""
+        if self._pending is not None:
+            self.root.after_cancel(self._pending)
+            self._pending = None
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        started = time.perf_counter()
+        for name in dirty:
+            with metrics.timer('ui_render.' + name):
+                self._views[name]()
+        metrics.record('ui_frame', time.perf_counter() - started)
+        metrics.count('ui_frames')
@@ -0,0 +1,176 @@
+"""ตารางรายงานการขายแบบเสมือน (virtual) สำหรับหน้ารายงาน
+
+VirtualSalesTree แสดงแถวสรุปการขาย (วันที่, เลขที่ใบเสร็จ, จำนวนรายการ, ยอดรวม) ใน ttk.Treeview
+ที่มีแถวเท่าจำนวนที่มองเห็นเท่านั้น เมื่อเลื่อนจะเปลี่ยนค่าของแถวชุดเดิมแทนการสร้างแถวใหม่
+ข้อมูลมาจาก source ที่มี len() และ page(offset, limit, sort, descending):
+    StoreSummaries  การขายทั้งหมดในที่เก็บประวัติ อ่านทีละหน้าจาก SalesStore.summary_page
+    ListSummaries   แถวที่อยู่ในหน่วยความจำแล้ว เช่น ผลการค้นหา
+หน้าที่อ่านแล้วเก็บเป็นบล็อกไว้จำนวนจำกัด จำนวนการขายจึงไม่มีผลต่อหน่วยความจำและเวลาวาดหน้าจอ
+"""
+
+import collections
+
+from metrics import metrics
+from product_grid import wheel_steps
+from sales_store import SUMMARY_SORT_KEYS
+
+
+class StoreSummaries:
+    """แถวสรุปการขายทั้งหมดในที่เก็บประวัติ อ่านจากฐานข้อมูลทีละหน้าตามที่เลื่อน"""
+
+    def __init__(self, store):
+        self.store = store
+        self.total = store.count()
+
+    def __len__(self):
+        return self.total
+
+    def page(self, offset, limit, sort, descending):
+        return self.store.summary_page(offset, limit, sort, descending, total=self.total)
+
+
+class ListSummaries:
+    """แถวสรุปที่อยู่ในหน่วยความจำแล้ว (เช่นผลการค้นหา) เรียงในหน่วยความจำ"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self._sorted = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def page(self, offset, limit, sort, descending):
+        key = (sort, descending)
+        rows = self._sorted.get(key)
+        if rows is None:
+            position = SUMMARY_SORT_KEYS.index(sort)
+            rows = self._sorted[key] = sorted(self.rows, key=lambda row: row[position],
+                                              reverse=descending)
+        return rows[offset:offset + limit]
+
+
+class VirtualSalesTree:
+    """ตารางรายงาน (ttk.Treeview) ที่มีแถวเท่าจำนวนที่มองเห็นเท่านั้น
+
+    แถวใน Treeview ถูกสร้างชุดเดียวแล้วเปลี่ยนค่าเมื่อเลื่อน ข้อมูลอ่านจาก source ทีละบล็อก
+    (block_size แถว เก็บไว้ max_blocks บล็อก) แถบเลื่อนคำนวณจากจำนวนแถวทั้งหมดของ source
+    การเรียงทำโดย source (ดัชนีในฐานข้อมูล) คลิกหัวคอลัมน์เพื่อเรียง คลิกซ้ำเพื่อกลับลำดับ
+    ชื่อคอลัมน์ของ tree ต้องเป็นชื่อใน SUMMARY_SORT_KEYS
+    """
+
+    def __init__(self, tree, scrollbar, block_size=200, max_blocks=8):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.rows = int(tree.cget('height'))
+
+        self.source = ListSummaries([])
+        self.offset = 0
+        self.sort = 'date'
+        self.descending = True
+        self._blocks = collections.OrderedDict()
+        self._pending = None
+        self._headings = {column: tree.heading(column, 'text') for column in tree['columns']}
+        self._items = [tree.insert("", "end", values=()) for _ in range(self.rows)]
+
+        for column in tree['columns']:
+            tree.heading(column, command=lambda c=column: self.sort_by(c))
+        self.scrollbar.configure(command=self.yview)
+        for sequence, step in (("<Button-4>", -3), ("<Button-5>", 3)):
+            tree.bind(sequence, lambda e, s=step: self.scroll(s))
+        tree.bind("<MouseWheel>", lambda e: self.scroll(3 * wheel_steps(e.delta)))
+        tree.bind("<Prior>", lambda e: self.scroll(-self.rows))
+        tree.bind("<Next>", lambda e: self.scroll(self.rows))
+        self._update_headings()
+
+    def set_source(self, source):
+        """แสดงข้อมูลชุดใหม่ และเลื่อนกลับไปบนสุด"""
+        self.source = source
+        self.offset = 0
+        self._blocks.clear()
+        self.render()
+
+    def sort_by(self, column):
+        if column == self.sort:
+            self.descending = not self.descending
+        else:
+            self.sort, self.descending = column, column != 'receipt_no'
+        self.offset = 0
+        self._blocks.clear()
+        self._update_headings()
+        self.render()
+
+    def _update_headings(self):
+        for column, text in self._headings.items():
+            if column == self.sort:
+                text += " ▼" if self.descending else " ▲"
+            self.tree.heading(column, text=text)
+
+    # ----- การเลื่อน -----
+
+    def yview(self, *args):
+        """คำสั่งจากแถบเลื่อน: moveto <สัดส่วน> หรือ scroll <n> units|pages"""
+        if args[0] == 'moveto':
+            offset = int(float(args[1]) * len(self.source))
+        else:
+            step = int(args[1]) * (self.rows if args[2] == 'pages' else 1)
+            offset = self.offset + step
+        self._move(offset)
+
+    def scroll(self, rows):
+        self._move(self.offset + rows)
+        return "break"
+
+    def _move(self, offset):
+        offset = max(0, min(offset, len(self.source) - self.rows))
+        if offset == self.offset:
+            return
+        self.offset = offset
+        # ลากแถบเลื่อนส่งคำสั่งถี่มาก วาดครั้งเดียวเมื่อว่าง
+        if self._pending is None:
+            self._pending = self.tree.after_idle(self.render)
+
+    # ----- การวาด -----
+
+    def _block(self, number):
+        rows = self._blocks.get(number)
+        if rows is None:
+            with metrics.timer('report_page'):
+                rows = self.source.page(number * self.block_size, self.block_size,
+                                        self.sort, self.descending)
+            self._blocks[number] = rows
+            if len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(number)
+        return rows
+
+    def visible_rows(self):
+        first, last = self.offset, min(len(self.source), self.offset + self.rows)
+        rows = []
+        for number in range(first // self.block_size, (last - 1) // self.block_size + 1):
+            block = self._block(number)
+            start = number * self.block_size
+            rows.extend(block[max(0, first - start):last - start])
+        return rows
+
+    def render(self):
+        self._pending = None
+        selected = self.tree.selection()
+        if selected:
+            self.tree.selection_remove(*selected)
+        rows = self.visible_rows() if len(self.source) else []
+        for index, item in enumerate(self._items):
+            if index < len(rows):
+                date, receipt_no, item_count, total = rows[index]
+                self.tree.item(item, values=(date, receipt_no, item_count, f"{total:,.2f}"))
+                self.tree.move(item, "", index)
+            else:
+                self.tree.detach(item)
+
+        total = len(self.source)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.rows) / total))
+        else:
+            self.scrollbar.set(0, 1)
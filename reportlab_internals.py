@@ -0,0 +1,170 @@
+"""ส่วนภายในของ reportlab ที่ pdf_stream ใช้ฝังฟอนต์ TrueType แบบ subset เอง
+
+reportlab ไม่มี API สาธารณะสำหรับเขียน PDF ทีละหน้าพร้อมฟอนต์ TrueType แบบ subset
+การเรียกส่วนภายในทั้งหมดจึงรวมไว้ในโมดูลนี้ที่เดียว ตรวจแล้วกับ reportlab รุ่นใน TESTED_VERSIONS
+(ตรงกับ requirements.txt) check() ทดลองทุกฟังก์ชันกับฟอนต์ Vera.ttf ที่มากับ reportlab
+ถ้า reportlab เปลี่ยนไปจะหยุดด้วยข้อผิดพลาดที่ชัดเจนแทนการเขียน PDF ที่เสียหาย
+
+ตรวจเมื่อเปลี่ยนรุ่น reportlab:
+    python reportlab_internals.py
+"""
+
+import collections
+import os
+import sys
+import threading
+
+import reportlab
+from reportlab.pdfbase.ttfonts import SUBSETN, TTFont, makeToUnicodeCMap
+
+
+# รุ่น (major, minor) ที่ตรวจแล้ว
+TESTED_VERSIONS = ((4, 0), (4, 1), (4, 2), (4, 3), (4, 4), (5, 0))
+
+_lock = threading.Lock()
+_checked = None         # True เมื่อผ่าน หรือข้อผิดพลาดที่พบ
+
+
+def is_truetype(font):
+    """ฟอนต์ที่ฝัง glyph แบบ subset ต่อเอกสาร (TrueType) ไม่ใช่ฟอนต์มาตรฐานของ PDF"""
+    return bool(font._dynamicFont)
+
+
+def split_text(font, text, doc):
+    """list ของ (ลำดับ subset, ไบต์) ของข้อความ ตัวอักษรถูกจองใน subset ของเอกสาร doc
+
+    reportlab เก็บสถานะ subset ใน WeakKeyDictionary doc จึงต้องอ้างอิงแบบ weakref ได้
+    """
+    return font.splitString(text, doc)
+
+
+def subset_codes(font, doc, index):
+    """รหัส unicode ของตัวอักษรใน subset ลำดับ index ของเอกสาร doc"""
+    return font.state[doc].subsets[index]
+
+
+def release_document(font, doc):
+    """ล้างสถานะ subset ของเอกสาร doc ออกจากฟอนต์ที่ใช้ร่วมกัน"""
+    font.state.pop(doc, None)
+
+
+def subset_font_name(font, index):
+    """ชื่อฟอนต์ของ subset ในไฟล์ PDF เช่น AAAAAA+Sarabun"""
+    face = font.face
+    return b''.join((SUBSETN(index), b'+', face.name, face.subfontNameX)).decode('latin-1')
+
+
+def subset_font_file(font, subset):
+    """ข้อมูลไฟล์ฟอนต์ TrueType ที่มีเฉพาะตัวอักษรใน subset"""
+    return font.face.makeSubset(subset)
+
+
+def cache_subsets(font, maxsize=64):
+    """ห่อ makeSubset ของฟอนต์ให้ใช้ได้จากหลายเธรด และจำผลของชุดตัวอักษรที่ซ้ำกัน
+
+    makeSubset อ่านไฟล์ฟอนต์ด้วยตำแหน่งอ่านร่วมกัน จึงต้องไม่ทำพร้อมกันหลายเธรด
+    ใบเสร็จส่วนใหญ่ใช้ตัวอักษรชุดเดิม (หัว/ท้ายใบเสร็จและชื่อสินค้าประจำ) จึงไม่ต้องสร้าง subset ใหม่ทุกใบ
+    """
+    make_subset = font.face.makeSubset
+    lock = threading.Lock()
+    cache = collections.OrderedDict()
+
+    def cached_make_subset(subset):
+        key = tuple(subset)
+        with lock:
+            data = cache.get(key)
+            if data is None:
+                data = cache[key] = make_subset(subset)
+                if len(cache) > maxsize:
+                    cache.popitem(last=False)
+            else:
+                cache.move_to_end(key)
+            return data
+
+    font.face.makeSubset = cached_make_subset
+
+
+def font_descriptor(font):
+    """ค่าสำหรับ FontDescriptor ของ PDF"""
+    face = font.face
+    return {
+        'flags': face.flags, 'ascent': face.ascent, 'descent': face.descent,
+        'cap_height': face.capHeight, 'bbox': list(face.bbox), 'italic_angle': face.italicAngle,
+        'stem_v': face.stemV, 'missing_width': face.defaultWidth,
+    }
+
+
+def char_width(font, code):
+    return font.face.getCharWidth(code)
+
+
+def to_unicode_cmap(base_name, subset):
+    """ToUnicode CMap (ไบต์) ของ subset สำหรับค้นหาและคัดลอกข้อความใน PDF"""
+    return makeToUnicodeCMap(base_name, subset).encode('latin-1')
+
+
+class _Document:
+    """เอกสารจำลองสำหรับ _self_test (แทน StreamingPDFWriter)"""
+
+
+def _expect(ok, what):
+    # ไม่ใช้ assert เพราะ python -O ตัดทิ้ง
+    if not ok:
+        raise RuntimeError(what)
+
+
+def _self_test():
+    path = os.path.join(os.path.dirname(reportlab.__file__), 'fonts', 'Vera.ttf')
+    font = TTFont('PaymaInternalsCheck', path, asciiReadable=False)
+    doc = _Document()
+    _expect(is_truetype(font), "_dynamicFont")
+    # ไบต์ของข้อความต้องชี้ไปยังตัวอักษรเดิมใน subset (pdf_stream เขียน subset นี้เป็นฟอนต์)
+    chunks = split_text(font, "AB", doc)
+    codes = [subset_codes(font, doc, index)[byte] for index, data in chunks for byte in data]
+    _expect(codes == [ord('A'), ord('B')], f"splitString/state.subsets: {chunks!r}")
+    subset = subset_codes(font, doc, 0)
+    name = subset_font_name(font, 0)
+    _expect(name.endswith('+BitstreamVeraSans-Roman'), f"subset name: {name!r}")
+    cache_subsets(font)
+    data = subset_font_file(font, subset)
+    _expect(data[:4] == b'\x00\x01\x00\x00', "makeSubset")
+    _expect(subset_font_file(font, list(subset)) is data, "face.makeSubset (cache_subsets)")
+    descriptor = font_descriptor(font)
+    _expect(all(isinstance(value, (int, float)) for key, value in descriptor.items() if key != 'bbox'),
+            f"FontDescriptor: {descriptor!r}")
+    _expect(len(descriptor['bbox']) == 4, "bbox")
+    _expect(char_width(font, ord('A')) > 0, "getCharWidth")
+    cmap = to_unicode_cmap(name, subset)
+    _expect(b'beginbfrange' in cmap or b'beginbfchar' in cmap, "makeToUnicodeCMap")
+    release_document(font, doc)
+    _expect(doc not in font.state, "state.pop")
+
+
+def check():
+    """ตรวจ (ครั้งเดียวต่อโปรเซส) ว่า reportlab ที่ติดตั้งยังมีส่วนภายในที่ใช้ครบ ไม่ผ่านจะ raise RuntimeError"""
+    global _checked
+    with _lock:
+        if _checked is None:
+            try:
+                _self_test()
+                _checked = True
+            except Exception as e:
+                _checked = e
+    if _checked is not True:
+        raise RuntimeError(f"reportlab {reportlab.Version} ใช้กับตัวเขียน PDF แบบสตรีมไม่ได้ "
+                           f"(ตรวจแล้วเฉพาะรุ่นใน requirements.txt): {_checked!r}") from _checked
+
+
+def tested_version():
+    major, minor = (int(part) for part in reportlab.Version.split('.')[:2])
+    return (major, minor) in TESTED_VERSIONS
+
+
+if __name__ == "__main__":
+    try:
+        check()
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    note = "" if tested_version() else " (รุ่นนี้ยังไม่อยู่ใน TESTED_VERSIONS)"
+    print(f"reportlab {reportlab.Version}: ส่วนภายในที่ใช้ครบ{note}")
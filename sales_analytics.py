@@ -0,0 +1,228 @@
+
+import numpy as np
+
+from sales_store import SQLiteSalesStore
+
+
+class _Column:
+    """อาร์เรย์ NumPy ที่ขยายขนาดได้ (เพิ่มความจุเป็นสองเท่าเมื่อเต็ม)"""
+
+    def __init__(self, dtype, capacity=1024):
+        self.data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    def extend(self, values):
+        values = np.asarray(values, dtype=self.data.dtype)
+        needed = self.size + len(values)
+        if needed > len(self.data):
+            capacity = max(needed, len(self.data) * 2)
+            grown = np.empty(capacity, dtype=self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+        self.data[self.size:needed] = values
+        self.size = needed
+
+    @property
+    def values(self):
+        return self.data[:self.size]
+
+
+class SalesAnalytics:
+    """ข้อมูลการขายแบบคอลัมน์ (NumPy) สำหรับสรุปยอดแบบ vectorized
+
+    เก็บระดับรายการสินค้า: เวลา, รหัสการขาย, รหัสสินค้า, หมวดหมู่, จำนวน, ยอดเงิน
+    และระดับการขาย: เวลา, ยอดรวม
+    รหัสสินค้าและหมวดหมู่ถูกแปลงเป็นรหัสตัวเลขต่อเนื่องเพื่อใช้กับ np.bincount
+    """
+
+    def __init__(self):
+        self.item_ts = _Column('datetime64[s]')
+        self.item_sale = _Column(np.int64)
+        self.item_product = _Column(np.int32)
+        self.item_category = _Column(np.int16)
+        self.item_quantity = _Column(np.int32)
+        self.item_amount = _Column(np.float64)
+
+        self.sale_ts = _Column('datetime64[s]')
+        self.sale_total = _Column(np.float64)
+
+        self.product_codes = {}      # product key -> รหัสต่อเนื่อง
+        self.product_names = []
+        self.category_codes = {}
+        self.category_names = []
+
+    # ----- การเพิ่มข้อมูล -----
+
+    def _product_code(self, key, name):
+        code = self.product_codes.get(key)
+        if code is None:
+            code = self.product_codes[key] = len(self.product_names)
+            self.product_names.append(name)
+        return code
+
+    def _category_code(self, category):
+        category = category or "ไม่ระบุ"
+        code = self.category_codes.get(category)
+        if code is None:
+            code = self.category_codes[category] = len(self.category_names)
+            self.category_names.append(category)
+        return code
+
+    def append_sales(self, sales):
+        """เพิ่มการขายหลายรายการ (รูปแบบเดียวกับ sale_data)"""
+        item_rows = []
+        sale_dates, sale_totals = [], []
+        sale_index = self.sale_ts.size
+        for sale in sales:
+            sale_dates.append(sale['date'])
+            sale_totals.append(sale['total'])
+            for item in sale['items']:
+                quantity = item.get('quantity', 1)
+                key = item.get('id')
+                if key is None:
+                    key = item['name']
+                item_rows.append((sale['date'], sale_index, self._product_code(key, item['name']),
+                                  self._category_code(item.get('category')),
+                                  quantity, item['price'] * quantity))
+            sale_index += 1
+        self._extend_sales(sale_dates, sale_totals)
+        self._extend_items(item_rows)
+
+    def append_sale(self, sale):
+        self.append_sales([sale])
+
+    def _extend_sales(self, dates, totals):
+        self.sale_ts.extend(np.array(dates, dtype='datetime64[s]'))
+        self.sale_total.extend(totals)
+
+    def _extend_items(self, rows):
+        if not rows:
+            return
+        dates, sale_ids, products, categories, quantities, amounts = zip(*rows)
+        self.item_ts.extend(np.array(dates, dtype='datetime64[s]'))
+        self.item_sale.extend(sale_ids)
+        self.item_product.extend(products)
+        self.item_category.extend(categories)
+        self.item_quantity.extend(quantities)
+        self.item_amount.extend(amounts)
+
+    @classmethod
+    def from_store(cls, store, upto=None):
+        """สร้างจากที่เก็บประวัติ โดยอ่านเฉพาะการขาย upto รายการแรก (None = ทั้งหมด)"""
+        analytics = cls()
+        if isinstance(store, SQLiteSalesStore):
+            analytics._load_sqlite(store, upto)
+        else:
+            sales = store.sales if upto is None else store.sales[:upto]
+            analytics.append_sales(sales)
+        return analytics
+
+    def _load_sqlite(self, store, upto, batch_size=100000):
+        # อ่านตรงจาก SQLite เป็นชุดใหญ่ เร็วกว่าการประกอบ dict ของการขายทีละรายการ
+        # เวลาของแต่ละรายการสินค้านำมาจากการขายที่เป็นเจ้าของ จึงไม่ต้อง JOIN
+        upto = upto if upto is not None else store.count()
+        sales = store.conn.execute(
+            "SELECT id, date, total FROM sales WHERE id <= ? ORDER BY id", (upto,)).fetchall()
+        if not sales:
+            return
+        sale_ids, dates, totals = zip(*sales)
+        sale_ids = np.array(sale_ids, dtype=np.int64)
+        base = self.sale_ts.size
+        self._extend_sales(dates, totals)
+        sale_ts = self.sale_ts.values
+
+        cursor = store.conn.execute(
+            "SELECT sale_id, COALESCE(product_id, name), name, category, quantity, price * quantity "
+            "FROM sale_items WHERE sale_id <= ? ORDER BY sale_id, line_no", (upto,))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            ids, keys, names, categories, quantities, amounts = zip(*rows)
+            index = base + np.searchsorted(sale_ids, np.array(ids, dtype=np.int64))
+            self.item_ts.extend(sale_ts[index])
+            self.item_sale.extend(index)
+            self.item_product.extend([self._product_code(key, name) for key, name in zip(keys, names)])
+            self.item_category.extend([self._category_code(category) for category in categories])
+            self.item_quantity.extend(quantities)
+            self.item_amount.extend(amounts)
+
+    # ----- การสรุปยอด -----
+
+    def _mask(self, ts, start=None, end=None):
+        """ตัวกรองช่วงเวลา [start, end) เป็นสตริงวันที่ หรือ None ถ้าไม่กรอง"""
+        if start is None and end is None:
+            return None
+        mask = np.ones(len(ts), dtype=bool)
+        if start is not None:
+            mask &= ts >= np.datetime64(start)
+        if end is not None:
+            mask &= ts < np.datetime64(end)
+        return mask
+
+    def _select(self, column, mask):
+        values = column.values
+        return values if mask is None else values[mask]
+
+    def by_hour(self, start=None, end=None):
+        """(จำนวนการขาย, ยอดรวม) ของแต่ละชั่วโมง 0-23 เป็นอาร์เรย์ยาว 24"""
+        mask = self._mask(self.sale_ts.values, start, end)
+        ts = self._select(self.sale_ts, mask)
+        hours = (ts.astype('datetime64[h]') - ts.astype('datetime64[D]')).astype(np.int64)
+        counts = np.bincount(hours, minlength=24)
+        totals = np.bincount(hours, weights=self._select(self.sale_total, mask), minlength=24)
+        return counts, totals
+
+    def by_day(self, start=None, end=None):
+        """list ของ (วันที่, จำนวนการขาย, ยอดรวม) เรียงตามวันที่"""
+        mask = self._mask(self.sale_ts.values, start, end)
+        days = self._select(self.sale_ts, mask).astype('datetime64[D]')
+        if not len(days):
+            return []
+        unique_days, inverse = np.unique(days, return_inverse=True)
+        counts = np.bincount(inverse)
+        totals = np.bincount(inverse, weights=self._select(self.sale_total, mask))
+        return [(str(day), int(count), float(total))
+                for day, count, total in zip(unique_days, counts, totals)]
+
+    def by_product(self, start=None, end=None):
+        """(จำนวนชิ้น, ยอดขาย) ต่อรหัสสินค้าต่อเนื่อง"""
+        mask = self._mask(self.item_ts.values, start, end)
+        products = self._select(self.item_product, mask)
+        size = len(self.product_names)
+        quantities = np.bincount(products, weights=self._select(self.item_quantity, mask),
+                                 minlength=size)
+        amounts = np.bincount(products, weights=self._select(self.item_amount, mask), minlength=size)
+        return quantities, amounts
+
+    def by_category(self, start=None, end=None):
+        """list ของ (หมวดหมู่, จำนวนชิ้น, ยอดขาย) เรียงตามยอดขาย"""
+        mask = self._mask(self.item_ts.values, start, end)
+        categories = self._select(self.item_category, mask)
+        size = len(self.category_names)
+        quantities = np.bincount(categories, weights=self._select(self.item_quantity, mask),
+                                 minlength=size)
+        amounts = np.bincount(categories, weights=self._select(self.item_amount, mask), minlength=size)
+        order = np.argsort(-amounts)
+        return [(self.category_names[i], int(quantities[i]), float(amounts[i]))
+                for i in order if quantities[i]]
+
+    def top_products(self, n=10, start=None, end=None, by='amount'):
+        """n สินค้าขายดี list ของ (ชื่อ, จำนวนชิ้น, ยอดขาย)"""
+        quantities, amounts = self.by_product(start, end)
+        key = amounts if by == 'amount' else quantities
+        n = min(n, len(key))
+        if n == 0:
+            return []
+        top = np.argpartition(-key, n - 1)[:n]
+        top = top[np.argsort(-key[top])]
+        return [(self.product_names[i], int(quantities[i]), float(amounts[i]))
+                for i in top if quantities[i]]
+
+    @property
+    def line_item_count(self):
+        return self.item_ts.size
+
+    @property
+    def sale_count(self):
+        return self.sale_ts.size
@@ -0,0 +1,206 @@
+
+import datetime
+import os
+import random
+import socket
+
+from cart import Cart
+from inventory import Inventory, OutOfStock
+from metrics import metrics
+from product_catalog import ProductCatalog
+from receipt_archive import ReceiptArchive
+from sales_store import open_sales_store, sale_totals
+from store_settings import StoreSettings
+
+
+class SalesEngine:
+    """ขั้นตอนการขายทั้งหมดโดยไม่ขึ้นกับหน้าจอ: ตะกร้า ยอดรวม บันทึกการขาย และใบเสร็จ
+
+    PaymaApp ใช้คลาสนี้เป็นแกนหลัก และชุดทดสอบประสิทธิภาพ (benchmark.py) เรียกใช้ได้โดยไม่ต้องมีจอ
+    """
+
+    def __init__(self, data_dir='data', receipts_dir='receipts', sales_backend='sqlite',
+                 settings=None, catalog=None, load_history=True):
+        self.data_dir = data_dir
+        self.receipts_dir = receipts_dir
+        self.sales_backend = sales_backend
+        for folder in (data_dir, receipts_dir):
+            os.makedirs(folder, exist_ok=True)
+
+        self.catalog = catalog if catalog is not None else ProductCatalog.load(
+            os.path.join(data_dir, 'products.json'))
+        self.cart = Cart()
+        # สต็อกจริงอยู่ใน ledger ของ Inventory (products.json ใช้เป็นยอดยกมาครั้งแรกเท่านั้น)
+        self.inventory = Inventory(data_dir)
+        self.inventory.attach(self.catalog.products)
+        self.settings = settings if settings is not None else StoreSettings(
+            os.path.join(data_dir, 'settings.json'))
+        # load_history=False: ผู้เรียกจะเรียก load_sales_history() เอง (เช่น ในเธรดพื้นหลัง)
+        self.sales_store = None
+        if load_history:
+            self.load_sales_history()
+        self._receipt_generator = None
+        self._unsaved_sale = None      # การขายที่ตัดสต็อกแล้วแต่บันทึกประวัติไม่สำเร็จ
+        self.archive = ReceiptArchive(receipts_dir)
+        self.sync_client = None
+
+    def new_receipt_generator(self):
+        """ตัวสร้างใบเสร็จใหม่ที่ใช้การตั้งค่าเดียวกัน (สำหรับเธรดพื้นหลังแต่ละเธรด)"""
+        # reportlab โหลดเมื่อสร้างใบเสร็จครั้งแรก
+        from escpos_receipt import TerminalReceiptGenerator
+        return TerminalReceiptGenerator(self.settings, self.receipts_dir)
+
+    @property
+    def receipt_generator(self):
+        if self._receipt_generator is None:
+            self._receipt_generator = self.new_receipt_generator()
+        return self._receipt_generator
+
+    # ----- ประวัติการขาย -----
+
+    def load_sales_history(self):
+        """เปิดที่เก็บประวัติการขาย (ย้ายข้อมูลจาก sales_history.json ครั้งแรก)"""
+        self.sales_store = open_sales_store(self.sales_backend, self.data_dir)
+        return self.sales_store
+
+    def save_sales_history(self, sale_data):
+        """บันทึกการขายหนึ่งรายการลงที่เก็บประวัติ"""
+        with metrics.timer('save_sales_history'):
+            self.sales_store.add_sale(sale_data)
+
+    def start_sync(self):
+        """เริ่ม (หรือเริ่มใหม่) การส่งการขายไปยังเซิร์ฟเวอร์รวมยอดตามการตั้งค่า sync_server"""
+        if self.sync_client is not None:
+            self.sync_client.close()
+            self.sync_client = None
+        server = self.settings.get('sync_server')
+        if server:
+            from sync_client import SyncClient
+            terminal_id = self.settings.get('terminal_id') or socket.gethostname()
+            self.sync_client = SyncClient(server, terminal_id, self.data_dir)
+        return self.sync_client
+
+    # ----- ตะกร้าสินค้า -----
+
+    def add_to_cart(self, product, quantity=1):
+        """จองสต็อกแล้วเพิ่มสินค้าลงตะกร้า คืนค่า (ตำแหน่งแถว, เป็นแถวใหม่หรือไม่)"""
+        self._cancel_unsaved_sale()
+        self.inventory.reserve(product, quantity)
+        return self.cart.add(product, quantity)
+
+    def scan(self, code, quantity=1):
+        """เพิ่มสินค้าจากบาร์โค้ด คืนค่า (สินค้า, ตำแหน่งแถว, เป็นแถวใหม่หรือไม่) หรือ None ถ้าไม่พบ"""
+        product = self.catalog.find_barcode(code)
+        if product is None:
+            return None
+        return (product,) + self.add_to_cart(product, quantity)
+
+    def remove_from_cart(self, index):
+        self._cancel_unsaved_sale()
+        line = self.cart.remove_at(index)
+        self.inventory.release(*line)
+        return line
+
+    def clear_cart(self):
+        self._cancel_unsaved_sale()
+        for product, quantity in self.cart:
+            self.inventory.release(product, quantity)
+        self.cart.clear()
+
+    def _cancel_unsaved_sale(self):
+        """ผู้ขายแก้ตะกร้าแทนการชำระเงินซ้ำหลังบันทึกไม่สำเร็จ: คืนสต็อกที่ตัดไปแล้วและจองสินค้าในตะกร้าใหม่"""
+        sale = self._unsaved_sale
+        if sale is None:
+            return
+        for product, quantity in self.cart:
+            self.inventory.receive(product, quantity, reason='void', ref=sale['receipt_no'])
+            self.inventory.reserve(product, quantity)
+        self._unsaved_sale = None
+
+    def totals(self):
+        """(ยอดรวมก่อนภาษี, ภาษี, ยอดรวมสุทธิ) ของตะกร้าปัจจุบัน"""
+        return sale_totals({'total': self.cart.total, 'tax_rate': self.settings['tax_rate']})
+
+    # ----- การชำระเงิน -----
+
+    def new_sale(self, now=None):
+        """ข้อมูลการขายจากตะกร้าปัจจุบัน (ยังไม่บันทึก)"""
+        now = now or datetime.datetime.now()
+        return {
+            'date': now.strftime("%Y-%m-%d %H:%M:%S"),
+            'receipt_no': f"PM{now.strftime('%Y%m%d')}{random.randint(1000, 9999)}",
+            'items': self.cart.sale_items(),
+            'total': self.cart.total,
+            'tax_rate': self.settings['tax_rate']
+        }
+
+    def checkout(self, now=None):
+        """ตัดสต็อกและบันทึกการขายของตะกร้าปัจจุบันแล้วล้างตะกร้า คืนค่าข้อมูลการขาย
+
+        ถ้าไม่สำเร็จตะกร้ายังอยู่ เรียกซ้ำได้โดยไม่บันทึกการขายหรือตัดสต็อกสองครั้ง
+        """
+        if not self.cart:
+            raise ValueError("ตะกร้าว่างเปล่า")
+        with metrics.timer('checkout'):
+            sale_data = self._unsaved_sale
+            if sale_data is None:
+                sale_data = self.new_sale(now)
+                # ตัดสต็อกก่อน (ทั้งชุดหรือไม่มีผลเลย) ถ้าไม่สำเร็จยังไม่มีการขายถูกบันทึก
+                with metrics.timer('inventory_commit'):
+                    self.inventory.commit(sale_data['items'], sale_data['receipt_no'])
+                self._unsaved_sale = sale_data
+            # ถ้าบันทึกประวัติไม่สำเร็จ การชำระเงินซ้ำบันทึกการขายเดิม (เลขที่ใบเสร็จเดิม) โดยไม่ตัดสต็อกซ้ำ
+            self.save_sales_history(sale_data)
+            self._unsaved_sale = None
+            if self.sync_client is not None:
+                self.sync_client.enqueue(sale_data)
+            self.cart.clear()
+        metrics.count('checkouts')
+        return sale_data
+
+    def render_receipt(self, sale_data):
+        """สร้างใบเสร็จทันที คืนค่าตำแหน่งไฟล์"""
+        return self.receipt_generator.generate_receipt(sale_data)
+
+    def reprint(self, receipt_no, output=None):
+        """พิมพ์ใบเสร็จซ้ำตามรูปแบบใบเสร็จของเครื่องนี้ คืนค่าปลายทาง หรือ None ถ้าไม่พบ
+
+        อ่านจาก archive/ไฟล์เดิมก่อน ถ้าไม่มีจึงสร้างใหม่จากประวัติการขาย
+        output: เขียนลงไฟล์นี้แทนการส่งไปยังเครื่องพิมพ์
+        """
+        kind = '.escpos' if self.settings.get('receipt_backend') == 'escpos' else '.pdf'
+        found = self.archive.read(receipt_no, kind)
+        if found is None:
+            sale = self.sales_store.find_by_receipt(receipt_no) if self.sales_store else None
+            if sale is None:
+                # ไม่มีในประวัติ ใช้ใบเสร็จรูปแบบอื่นที่เก็บไว้ (ถ้ามี)
+                found = self.archive.read(receipt_no)
+                if found is None:
+                    return None
+            elif kind == '.escpos':
+                found = self.receipt_generator.escpos.render(sale), kind
+            else:
+                path = self.receipt_generator.pdf.generate_receipt(sale)
+                if output is None:
+                    return path
+                with open(path, 'rb') as f:
+                    found = f.read(), kind
+
+        data, kind = found
+        if output is None and kind == '.escpos':
+            target = self.settings.get('printer_target') or self.receipts_dir
+            return self.receipt_generator.escpos.send(data, target, receipt_no)
+        if output is None:
+            os.makedirs(os.path.join(self.receipts_dir, 'reprints'), exist_ok=True)
+            output = os.path.join(self.receipts_dir, 'reprints', receipt_no + kind)
+        with open(output, 'wb') as f:
+            f.write(data)
+        return output
+
+    def close(self):
+        if self.sync_client is not None:
+            self.sync_client.close()
+        self.archive.close()
+        self.inventory.close()
+        if self.sales_store is not None:
+            self.sales_store.close()
@@ -0,0 +1,165 @@
+
+import json
+import os
+import threading
+import time
+
+
+class SalesJournal:
+    """บันทึกการขายแบบต่อท้าย (append-only) พร้อม snapshot และการกู้คืนหลังระบบล่ม
+
+    ไฟล์ snapshot คือ data/sales_history.json รูปแบบเดิม (list ของการขาย)
+    ส่วนการขายใหม่จะต่อท้ายไฟล์ journal ทีละบรรทัดในรูปแบบ {"seq": n, "sale": {...}}
+    โดย seq คือลำดับของการขายในประวัติทั้งหมด ทำให้ข้ามรายการที่อยู่ใน snapshot แล้วได้
+    """
+
+    def __init__(self, data_dir='data', sync_every=1, sync_interval=None, compact_every=1000):
+        self.snapshot_path = os.path.join(data_dir, 'sales_history.json')
+        self.journal_path = os.path.join(data_dir, 'sales_journal.jsonl')
+        self.rotated_path = self.journal_path + '.old'
+
+        # group commit: fsync ทุก sync_every รายการ หรือเมื่อครบ sync_interval วินาที
+        self.sync_every = max(1, sync_every)
+        self.sync_interval = sync_interval
+        self.compact_every = compact_every
+
+        self._file = None
+        self._seq = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._records_since_compact = 0
+        self._lock = threading.Lock()
+        self._compact_thread = None
+
+    def load(self):
+        """อ่าน snapshot แล้วเล่นซ้ำ journal ที่ต่อท้าย คืนค่าประวัติการขายทั้งหมด"""
+        sales = []
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                sales = json.load(f)
+
+        # journal ที่ถูกหมุนออกไประหว่าง compaction ที่ยังไม่เสร็จ ต้องเล่นซ้ำก่อน
+        pending = 0
+        for path in (self.rotated_path, self.journal_path):
+            for seq, sale in self._replay(path):
+                if seq == len(sales):
+                    sales.append(sale)
+                    pending += 1
+
+        self._seq = len(sales)
+        self._records_since_compact = pending
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+        return sales
+
+    def _replay(self, path):
+        """อ่านรายการจาก journal และตัดส่วนท้ายที่เขียนไม่สมบูรณ์ทิ้ง"""
+        if not os.path.exists(path):
+            return []
+
+        records = []
+        good_offset = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line.decode('utf-8'))
+                    records.append((record['seq'], record['sale']))
+                except (ValueError, KeyError, TypeError):
+                    break
+                good_offset += len(line)
+
+        if good_offset < os.path.getsize(path):
+            with open(path, 'r+b') as f:
+                f.truncate(good_offset)
+                f.flush()
+                os.fsync(f.fileno())
+        return records
+
+    def append(self, sale):
+        """ต่อท้ายการขายหนึ่งรายการลง journal"""
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.journal_path, 'a', encoding='utf-8')
+            record = {"seq": self._seq, "sale": sale}
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._seq += 1
+            self._unsynced += 1
+            self._records_since_compact += 1
+
+            if self._unsynced >= self.sync_every or (
+                    self.sync_interval is not None
+                    and time.monotonic() - self._last_sync >= self.sync_interval):
+                self._sync_locked()
+
+    def sync(self):
+        """บังคับ fsync รายการที่ค้างอยู่ทั้งหมด"""
+        with self._lock:
+            self._sync_locked()
+
+    def _sync_locked(self):
+        if self._file and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def needs_compaction(self):
+        return (self._records_since_compact >= self.compact_every
+                and not self.is_compacting())
+
+    def is_compacting(self):
+        return self._compact_thread is not None and self._compact_thread.is_alive()
+
+    def compact(self, sales, background=True):
+        """รวม journal เข้าไปใน snapshot ใหม่
+
+        journal ปัจจุบันจะถูกหมุนเป็นไฟล์ .old และเปิดไฟล์ใหม่รับการขายต่อทันที
+        จากนั้นเขียน snapshot ในเธรดพื้นหลัง แล้วจึงลบไฟล์ .old ทิ้ง
+        """
+        if self.is_compacting():
+            self._compact_thread.join()
+
+        with self._lock:
+            self._sync_locked()
+            snapshot = list(sales[:self._seq])
+            if self._file:
+                self._file.close()
+            # หากยังมีไฟล์ .old ค้างจากรอบก่อน ให้ต่อท้ายรวมกันก่อนหมุน
+            if not os.path.exists(self.journal_path):
+                pass
+            elif os.path.exists(self.rotated_path):
+                with open(self.journal_path, 'rb') as src, open(self.rotated_path, 'ab') as dst:
+                    dst.write(src.read())
+                os.remove(self.journal_path)
+            else:
+                os.replace(self.journal_path, self.rotated_path)
+            self._file = open(self.journal_path, 'a', encoding='utf-8')
+            self._records_since_compact = 0
+
+        if background:
+            self._compact_thread = threading.Thread(
+                target=self._write_snapshot, args=(snapshot,), name="sales-compaction")
+            self._compact_thread.start()
+        else:
+            self._write_snapshot(snapshot)
+
+    def _write_snapshot(self, snapshot):
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        if os.path.exists(self.rotated_path):
+            os.remove(self.rotated_path)
+
+    def close(self):
+        """รอ compaction ที่ค้างอยู่ fsync และปิดไฟล์ journal"""
+        if self._compact_thread is not None:
+            self._compact_thread.join()
+        with self._lock:
+            if self._file:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
@@ -0,0 +1,135 @@
+
+import datetime
+
+from pdf_fonts import pdf_fonts
+from pdf_stream import StreamingPDFWriter
+from sales_store import sale_item_count
+
+
+class ReportCancelled(Exception):
+    pass
+
+
+class SalesReportWriter:
+    """รายงานการขาย PDF แบบสตรีม อ่านการขายทีละรายการและเขียนทีละหน้า
+
+    มีแถวยอดรวมรายวันและยอดแยกตามหมวดหมู่ของแต่ละวัน พร้อมสรุปหมวดหมู่ท้ายรายงาน
+    หน่วยความจำที่ใช้ขึ้นกับจำนวนหมวดหมู่ ไม่ใช่จำนวนการขาย
+    """
+
+    columns = [("วันที่", 50), ("เลขที่ใบเสร็จ", 170), ("จำนวนรายการ", 300), ("ยอดรวม (บาท)", 400)]
+
+    def __init__(self, path, title="รายงานการขาย - Payma System", period="", settings=None):
+        self.writer = StreamingPDFWriter(path)
+        # ฟอนต์ไทยชุดเดียวกับใบเสร็จ (ลงทะเบียนครั้งเดียวต่อโปรเซส)
+        self.font, self.bold_font = pdf_fonts(settings)
+        self.title = title
+        self.period = period
+        self.page = None
+        self.y = 0
+
+    # ----- การจัดหน้า -----
+
+    def _new_page(self):
+        if self.page is not None:
+            self._finish_page()
+        self.page = self.writer.new_page()
+        height = self.writer.height
+        y = height - 60
+        if self.writer.page_count == 0:
+            self.page.set_font(self.bold_font, 16)
+            self.page.draw_string(50, y, self.title)
+            y -= 22
+            self.page.set_font(self.font, 10)
+            self.page.draw_string(50, y, f"วันที่ออกรายงาน: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M')}"
+                                  + (f"   ช่วงเวลา: {self.period}" if self.period else ""))
+            y -= 30
+
+        self.page.set_font(self.bold_font, 10)
+        for header, x in self.columns:
+            self.page.draw_string(x, y, header)
+        self.page.line(50, y - 5, self.writer.width - 50, y - 5)
+        self.y = y - 20
+
+    def _finish_page(self):
+        self.page.set_font(self.font, 8)
+        self.page.draw_string(self.writer.width - 100, 30, f"หน้า {self.writer.page_count + 1}")
+        self.writer.write_page(self.page)
+        self.page = None
+
+    def _row(self, values, bold=False, indent=0):
+        if self.page is None or self.y < 60:
+            self._new_page()
+        self.page.set_font(self.bold_font if bold else self.font, 9)
+        for (_, x), value in zip(self.columns, values):
+            if value:
+                self.page.draw_string(x + indent, self.y, value)
+        self.y -= 14
+
+    # ----- เนื้อหารายงาน -----
+
+    def _day_subtotal(self, day, count, total, categories):
+        self._row([f"รวมวันที่ {day}", f"{count} ใบเสร็จ", "", f"{total:,.2f}"], bold=True)
+        for category, (quantity, amount) in sorted(categories.items(), key=lambda c: -c[1][1]):
+            self._row(["", f"- {category}", str(quantity), f"{amount:,.2f}"], indent=10)
+        self.y -= 6
+
+    def write(self, sales, total_sales=None, progress=None, cancelled=None, progress_every=500):
+        """เขียนรายงานจาก iterator ของการขาย คืนค่าจำนวนการขายที่เขียน
+
+        progress(done, total) ถูกเรียกทุก progress_every รายการ
+        cancelled() คืนค่า True เมื่อต้องการยกเลิก (ไฟล์ที่เขียนไม่เสร็จจะถูกลบ)
+        """
+        try:
+            done = 0
+            current_day = None
+            day_count = day_total = 0
+            day_categories = {}
+            grand_total = 0
+            all_categories = {}
+
+            for sale in sales:
+                day = sale['date'][:10]
+                if day != current_day:
+                    if current_day is not None:
+                        self._day_subtotal(current_day, day_count, day_total, day_categories)
+                    current_day, day_count, day_total, day_categories = day, 0, 0, {}
+
+                self._row([sale['date'], sale['receipt_no'], str(sale_item_count(sale)),
+                           f"{sale['total']:,.2f}"])
+                day_count += 1
+                day_total += sale['total']
+                grand_total += sale['total']
+                for item in sale['items']:
+                    quantity = item.get('quantity', 1)
+                    category = item.get('category') or "ไม่ระบุ"
+                    for bucket in (day_categories, all_categories):
+                        entry = bucket.setdefault(category, [0, 0])
+                        entry[0] += quantity
+                        entry[1] += item['price'] * quantity
+
+                done += 1
+                if done % progress_every == 0:
+                    if cancelled is not None and cancelled():
+                        raise ReportCancelled()
+                    if progress is not None:
+                        progress(done, total_sales)
+
+            if current_day is not None:
+                self._day_subtotal(current_day, day_count, day_total, day_categories)
+
+            # สรุปท้ายรายงาน
+            self.y -= 10
+            self._row(["สรุปทั้งหมด", f"{done} ใบเสร็จ", "", f"{grand_total:,.2f}"], bold=True)
+            for category, (quantity, amount) in sorted(all_categories.items(), key=lambda c: -c[1][1]):
+                self._row(["", f"- {category}", str(quantity), f"{amount:,.2f}"], indent=10)
+
+            self._finish_page()
+            self.writer.close()
+            if progress is not None:
+                progress(done, total_sales)
+            return done
+        except BaseException:
+            self.writer.abort()
+            raise
+
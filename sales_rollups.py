@@ -0,0 +1,104 @@
+
+import json
+import os
+
+
+def rollup_keys(sale):
+    """แยกการขายหนึ่งรายการเป็น (วัน, ชั่วโมง, รายการสินค้า) สำหรับอัปเดตยอดสรุป
+
+    รายการสินค้าคืนค่าเป็น list ของ (product_id, name, quantity, amount)
+    """
+    day = sale['date'][:10]
+    hour = int(sale['date'][11:13] or 0)
+    lines = {}
+    for item in sale['items']:
+        quantity = item.get('quantity', 1)
+        key = item.get('id')
+        if key is None:
+            key = item['name']
+        if key in lines:
+            lines[key][2] += quantity
+            lines[key][3] += item['price'] * quantity
+        else:
+            lines[key] = [key, item['name'], quantity, item['price'] * quantity]
+    return day, hour, [tuple(line) for line in lines.values()]
+
+
+class SalesRollups:
+    """ยอดสรุปรายวัน รายชั่วโมง และรายสินค้า ที่อัปเดตทีละการขาย"""
+
+    def __init__(self):
+        self.daily = {}      # day -> [count, total]
+        self.hourly = {}     # day -> {hour: [count, total]}
+        self.products = {}   # day -> {product_id: [name, quantity, amount]}
+        self.sale_count = 0
+
+    def apply(self, sale):
+        day, hour, lines = rollup_keys(sale)
+
+        daily = self.daily.setdefault(day, [0, 0])
+        daily[0] += 1
+        daily[1] += sale['total']
+
+        hourly = self.hourly.setdefault(day, {}).setdefault(hour, [0, 0])
+        hourly[0] += 1
+        hourly[1] += sale['total']
+
+        products = self.products.setdefault(day, {})
+        for product_id, name, quantity, amount in lines:
+            product = products.setdefault(product_id, [name, 0, 0])
+            product[1] += quantity
+            product[2] += amount
+
+        self.sale_count += 1
+
+    def rebuild(self, sales):
+        """สร้างยอดสรุปใหม่ทั้งหมดจากประวัติการขาย"""
+        self.__init__()
+        for sale in sales:
+            self.apply(sale)
+
+    def daily_summary(self, day):
+        count, total = self.daily.get(day, (0, 0))
+        return count, total
+
+    def hourly_summary(self, day):
+        hours = self.hourly.get(day, {})
+        return [(hour, count, total) for hour, (count, total) in sorted(hours.items())]
+
+    def product_summary(self, day):
+        products = self.products.get(day, {})
+        rows = [(product_id, name, quantity, amount)
+                for product_id, (name, quantity, amount) in products.items()]
+        return sorted(rows, key=lambda row: row[3], reverse=True)
+
+    def save(self, path):
+        """บันทึกยอดสรุปลงไฟล์ (เขียนไฟล์ชั่วคราวแล้วแทนที่)"""
+        data = {
+            "sale_count": self.sale_count,
+            "daily": self.daily,
+            "hourly": {day: {str(h): v for h, v in hours.items()}
+                       for day, hours in self.hourly.items()},
+            "products": {day: [[pid] + v for pid, v in products.items()]
+                         for day, products in self.products.items()},
+        }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """โหลดยอดสรุปจากไฟล์ คืนค่า False ถ้าไม่มีไฟล์หรืออ่านไม่ได้"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.sale_count = data['sale_count']
+            self.daily = data['daily']
+            self.hourly = {day: {int(h): v for h, v in hours.items()}
+                           for day, hours in data['hourly'].items()}
+            self.products = {day: {row[0]: row[1:] for row in rows}
+                             for day, rows in data['products'].items()}
+            return True
+        except (OSError, ValueError, KeyError):
+            self.__init__()
+            return False
@@ -0,0 +1,154 @@
+
+"""ค้นหาประวัติการขายจากข้อความในช่องค้นหา
+
+ข้อความแยกด้วยช่องว่าง ทุกคำต้องตรง (AND):
+    PM202610 หรือ #PM2026     เลขที่ใบเสร็จขึ้นต้นด้วย
+    2026-10-18                วันที่
+    2026-10                   ทั้งเดือน
+    2026-10-01..2026-10-07    ช่วงวันที่ (รวมวันสุดท้าย)
+    วันนี้ / เมื่อวาน / 7วัน   ช่วงวันที่ย้อนหลังจากวันนี้
+    id:5 หรือ 5               รหัสสินค้า
+    คำอื่น ๆ                  ชื่อสินค้ามีคำนี้อยู่
+
+คำที่ดูเหมือนวันที่แต่ไม่มีอยู่จริง (เช่น 2026-02-30) หรือรหัสสินค้าที่ยาวเกินไปถือเป็นคำค้นชื่อสินค้า
+
+SQLiteSalesStore ตอบคำค้นด้วยดัชนีในฐานข้อมูล (ชื่อสินค้า -> รหัสสินค้า -> การขาย,
+เลขที่ใบเสร็จ และวันที่) ที่อัปเดตในทรานแซกชันเดียวกับการบันทึกการขาย
+"""
+
+import datetime
+import re
+
+
+DAY = re.compile(r'^\d{4}-\d{2}-\d{2}$')
+MONTH = re.compile(r'^\d{4}-\d{2}$')
+DAY_RANGE = re.compile(r'^(\d{4}-\d{2}-\d{2})\.\.(\d{4}-\d{2}-\d{2})$')
+LAST_DAYS = re.compile(r'^(\d+)วัน$')
+PRODUCT_ID = re.compile(r'^(?:id:)?(\d+)$', re.IGNORECASE)
+# เลขที่ใบเสร็จ PM + ปีเดือนวัน (ดู SalesEngine.new_sale)
+RECEIPT_DATE = re.compile(r'^PM(\d{4})(\d{2})?(\d{2})?')
+# รหัสสินค้าต้องเก็บเป็น INTEGER ของ SQLite ได้
+MAX_PRODUCT_ID = 2 ** 63 - 1
+
+
+def _next_day(day):
+    return (datetime.date.fromisoformat(day) + datetime.timedelta(days=1)).isoformat()
+
+
+class SalesQuery:
+    """เงื่อนไขค้นหาที่แยกจากข้อความ ทุกเงื่อนไขต้องตรง"""
+
+    def __init__(self):
+        self.start = None           # วันที่เริ่ม (รวม) YYYY-MM-DD
+        self.end = None             # วันที่สิ้นสุด (ไม่รวม)
+        self.receipt_prefix = None
+        self.product_ids = []       # รหัสสินค้าที่ต้องอยู่ในการขาย (ทุกตัว)
+        self.names = []             # คำที่ต้องอยู่ในชื่อสินค้าของการขาย (ทุกคำ)
+
+    def __bool__(self):
+        return bool(self.start or self.end or self.receipt_prefix or self.product_ids or self.names)
+
+    def narrow_dates(self, start, end):
+        if self.start is None or start > self.start:
+            self.start = start
+        if self.end is None or end < self.end:
+            self.end = end
+
+    def matches(self, sale):
+        """ตรวจการขายหนึ่งรายการ (สำหรับที่เก็บที่ไม่มีดัชนี)"""
+        if self.start is not None and sale['date'] < self.start:
+            return False
+        if self.end is not None and sale['date'] >= self.end:
+            return False
+        if self.receipt_prefix and not sale['receipt_no'].startswith(self.receipt_prefix):
+            return False
+        ids = {item.get('id') for item in sale['items']}
+        if any(product_id not in ids for product_id in self.product_ids):
+            return False
+        names = [item['name'].casefold() for item in sale['items']]
+        return all(any(word in name for name in names) for word in self.names)
+
+
+def _receipt_dates(prefix):
+    """ช่วงวันที่ที่เลขที่ใบเสร็จขึ้นต้นด้วย prefix ออกได้ หรือ None"""
+    match = RECEIPT_DATE.match(prefix)
+    if not match:
+        return None
+    year, month, day = match.groups()
+    try:
+        if day:
+            start = datetime.date(int(year), int(month), int(day))
+            return start.isoformat(), _next_day(start.isoformat())
+        if month:
+            start = datetime.date(int(year), int(month), 1)
+            end = datetime.date(start.year + start.month // 12, start.month % 12 + 1, 1)
+        else:
+            start = datetime.date(int(year), 1, 1)
+            end = datetime.date(start.year + 1, 1, 1)
+    except ValueError:
+        return None
+    return start.isoformat(), end.isoformat()
+
+
+def _word_dates(word, today):
+    """ช่วงวันที่ (start, end) ที่คำค้นหมายถึง หรือ None ถ้าไม่ใช่คำระบุวันที่ที่ถูกต้อง"""
+    try:
+        match = DAY_RANGE.match(word)
+        if match:
+            datetime.date.fromisoformat(match.group(1))
+            return match.group(1), _next_day(match.group(2))
+        if DAY.match(word):
+            return word, _next_day(word)
+        if MONTH.match(word):
+            start = datetime.date.fromisoformat(f"{word}-01")
+            end = datetime.date(start.year + start.month // 12, start.month % 12 + 1, 1)
+            return start.isoformat(), end.isoformat()
+        if word in ("วันนี้", "today"):
+            return today.isoformat(), (today + datetime.timedelta(days=1)).isoformat()
+        if word in ("เมื่อวาน", "yesterday"):
+            return (today - datetime.timedelta(days=1)).isoformat(), today.isoformat()
+        match = LAST_DAYS.match(word)
+        if match:
+            days = int(match.group(1))
+            return ((today - datetime.timedelta(days=days - 1)).isoformat(),
+                    (today + datetime.timedelta(days=1)).isoformat())
+    except (ValueError, OverflowError):
+        pass
+    return None
+
+
+def parse_query(text, today=None):
+    """แปลงข้อความค้นหาเป็น SalesQuery"""
+    today = today or datetime.date.today()
+    query = SalesQuery()
+    for word in text.split():
+        dates = _word_dates(word, today)
+        match = PRODUCT_ID.match(word)
+        if dates:
+            query.narrow_dates(*dates)
+        elif word.startswith('#') or word[:2].upper() == 'PM':
+            query.receipt_prefix = word.lstrip('#').upper()
+            # ใบเสร็จออกในวันที่ตามเลขที่ จึงค้นตามดัชนีวันที่ได้
+            dates = _receipt_dates(query.receipt_prefix)
+            if dates:
+                query.narrow_dates(*dates)
+        elif match and int(match.group(1)) <= MAX_PRODUCT_ID:
+            query.product_ids.append(int(match.group(1)))
+        else:
+            query.names.append(word.casefold())
+    return query
+
+
+def report_period(kind, today=None):
+    """ช่วงวันที่ [start, end) ของรายงานและบทวิเคราะห์: 'today', 'month', 'year' หรือ 'all' (None, None)"""
+    today = today or datetime.date.today()
+    if kind == 'today':
+        start, end = today, today + datetime.timedelta(days=1)
+    elif kind == 'month':
+        start = today.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+    elif kind == 'year':
+        start, end = today.replace(month=1, day=1), today.replace(year=today.year + 1, month=1, day=1)
+    else:
+        return None, None
+    return start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")
@@ -0,0 +1,566 @@
+
+import abc
+import bisect
+import datetime
+import heapq
+import os
+import sqlite3
+import threading
+
+from sales_journal import SalesJournal
+from sales_rollups import SalesRollups, rollup_keys
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sales (
+    id INTEGER PRIMARY KEY,
+    receipt_no TEXT NOT NULL,
+    date TEXT NOT NULL,
+    total REAL NOT NULL,
+    tax_rate REAL NOT NULL,
+    item_count INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sales_date ON sales(date);
+CREATE INDEX IF NOT EXISTS idx_sales_receipt_no ON sales(receipt_no);
+-- เรียงตารางรายงานตามจำนวนรายการ/ยอดรวม (ดัชนีรวม rowid จึงเรียง (คอลัมน์, id) ได้ทันที)
+CREATE INDEX IF NOT EXISTS idx_sales_item_count ON sales(item_count);
+CREATE INDEX IF NOT EXISTS idx_sales_total ON sales(total);
+
+CREATE TABLE IF NOT EXISTS sale_items (
+    sale_id INTEGER NOT NULL REFERENCES sales(id),
+    line_no INTEGER NOT NULL,
+    product_id INTEGER,
+    name TEXT NOT NULL,
+    price REAL NOT NULL,
+    category TEXT,
+    quantity INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (sale_id, line_no)
+);
+-- ดัชนีค้นหา: รหัสสินค้า -> การขาย (covering index เรียงตาม sale_id)
+DROP INDEX IF EXISTS idx_sale_items_product;
+CREATE INDEX IF NOT EXISTS idx_sale_items_product_sale ON sale_items(product_id, sale_id);
+
+-- ชื่อสินค้าทุกชื่อที่เคยขาย สำหรับค้นหาชื่อ -> รหัสสินค้า
+CREATE TABLE IF NOT EXISTS product_names (
+    product_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (product_id, name)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollup_daily (
+    day TEXT PRIMARY KEY,
+    sale_count INTEGER NOT NULL,
+    total REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS rollup_hourly (
+    day TEXT NOT NULL,
+    hour INTEGER NOT NULL,
+    sale_count INTEGER NOT NULL,
+    total REAL NOT NULL,
+    PRIMARY KEY (day, hour)
+);
+
+CREATE TABLE IF NOT EXISTS rollup_product (
+    day TEXT NOT NULL,
+    product_id NOT NULL,
+    name TEXT NOT NULL,
+    quantity INTEGER NOT NULL,
+    amount REAL NOT NULL,
+    PRIMARY KEY (day, product_id)
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# สร้างตารางยอดสรุปใหม่จากตาราง sales/sale_items
+REBUILD_ROLLUPS = (
+    "DELETE FROM rollup_daily",
+    "DELETE FROM rollup_hourly",
+    "DELETE FROM rollup_product",
+    """INSERT INTO rollup_daily (day, sale_count, total)
+       SELECT substr(date, 1, 10), COUNT(*), SUM(total) FROM sales GROUP BY 1""",
+    """INSERT INTO rollup_hourly (day, hour, sale_count, total)
+       SELECT substr(date, 1, 10), CAST(substr(date, 12, 2) AS INTEGER), COUNT(*), SUM(total)
+       FROM sales GROUP BY 1, 2""",
+    """INSERT INTO rollup_product (day, product_id, name, quantity, amount)
+       SELECT substr(s.date, 1, 10), COALESCE(i.product_id, i.name), MAX(i.name),
+              SUM(i.quantity), SUM(i.price * i.quantity)
+       FROM sale_items i JOIN sales s ON s.id = i.sale_id GROUP BY 1, 2""",
+)
+
+
+# คอลัมน์ที่เรียงตารางรายงานได้ (ตามลำดับในแถวสรุป)
+SUMMARY_SORT_KEYS = ('date', 'receipt_no', 'item_count', 'total')
+
+
+def sale_totals(sale):
+    """(ยอดรวมก่อนภาษี, ภาษี, ยอดรวมสุทธิ) ของการขาย ตัวเลขเดียวกับที่พิมพ์บนใบเสร็จและใช้ใน QR พร้อมเพย์"""
+    subtotal = sale['total']
+    tax = subtotal * (sale['tax_rate'] / 100)
+    return subtotal, tax, subtotal + tax
+
+
+def sale_item_count(sale):
+    """จำนวนชิ้นสินค้าในการขาย (ประวัติเดิมเก็บหนึ่งรายการต่อชิ้น ไม่มี quantity)"""
+    return sum(item.get('quantity', 1) for item in sale['items'])
+
+
+class SalesStore(abc.ABC):
+    """API กลางสำหรับเก็บและค้นหาประวัติการขาย"""
+
+    @abc.abstractmethod
+    def add_sale(self, sale):
+        """บันทึกการขายหนึ่งรายการ"""
+
+    @abc.abstractmethod
+    def recent_sales(self, limit=20):
+        """การขายล่าสุด limit รายการ เรียงจากเก่าไปใหม่"""
+
+    def recent_summaries(self, limit=20):
+        """แถว (วันที่, เลขที่ใบเสร็จ, จำนวนรายการ, ยอดรวม) ล่าสุดสำหรับตารางรายงาน"""
+        return [(s['date'], s['receipt_no'], sale_item_count(s), s['total'])
+                for s in self.recent_sales(limit)]
+
+    @abc.abstractmethod
+    def daily_summary(self, day):
+        """คืนค่า (จำนวนการขาย, ยอดรวม) ของวันที่ day (YYYY-MM-DD)"""
+
+    @abc.abstractmethod
+    def hourly_summary(self, day):
+        """list ของ (ชั่วโมง, จำนวนการขาย, ยอดรวม) ของวันที่ day"""
+
+    @abc.abstractmethod
+    def product_summary(self, day):
+        """list ของ (product_id, ชื่อ, จำนวน, ยอดขาย) ของวันที่ day เรียงตามยอดขาย"""
+
+    @abc.abstractmethod
+    def rebuild_rollups(self):
+        """สร้างยอดสรุปใหม่จากประวัติการขายทั้งหมด"""
+
+    @abc.abstractmethod
+    def find_by_receipt(self, receipt_no):
+        """การขายของเลขที่ใบเสร็จ (รายการล่าสุดถ้าซ้ำ) หรือ None"""
+
+    @abc.abstractmethod
+    def iter_sales(self, start=None, end=None):
+        """วนอ่านการขายตามลำดับเวลา start/end เป็นสตริงวันที่ (end ไม่รวม)"""
+
+    @abc.abstractmethod
+    def count(self, start=None, end=None):
+        """จำนวนการขายทั้งหมด หรือเฉพาะช่วงวันที่ [start, end)"""
+
+    @abc.abstractmethod
+    def summary_page(self, offset, limit, sort='date', descending=True, total=None):
+        """แถวสรุปลำดับที่ offset ถึง offset+limit เมื่อเรียงตาม sort (หนึ่งใน SUMMARY_SORT_KEYS)
+
+        แถวที่ค่า sort เท่ากันเรียงตามลำดับการบันทึก total คือจำนวนการขายทั้งหมด (ถ้ารู้แล้ว)
+        """
+
+    def search(self, query, limit=200):
+        """แถว (วันที่, เลขที่ใบเสร็จ, จำนวนรายการ, ยอดรวม) ที่ตรงกับ SalesQuery เรียงจากใหม่ไปเก่า"""
+        found = ((sale['date'], sale['receipt_no'], sale_item_count(sale), sale['total'])
+                 for sale in self.iter_sales(query.start, query.end) if query.matches(sale))
+        return heapq.nlargest(limit, found, key=lambda row: row[0])
+
+    def close(self):
+        pass
+
+
+class JournalSalesStore(SalesStore):
+    """เก็บประวัติในหน่วยความจำ บันทึกลงไฟล์ผ่าน SalesJournal"""
+
+    def __init__(self, data_dir='data', **journal_options):
+        self.journal = SalesJournal(data_dir, **journal_options)
+        try:
+            self.sales = self.journal.load()
+        except (OSError, ValueError):
+            self.sales = []
+
+        if self.journal.needs_compaction():
+            self.journal.compact(self.sales)
+
+        # ยอดสรุปบันทึกไว้ข้าง snapshot ถ้าไม่ตรงกับประวัติให้สร้างใหม่
+        self.rollups_path = os.path.join(data_dir, 'sales_rollups.json')
+        self.rollups = SalesRollups()
+        if not self.rollups.load(self.rollups_path) or self.rollups.sale_count != len(self.sales):
+            self.rebuild_rollups()
+        self._summary_order = {}    # sort -> [(ค่า, ตำแหน่งใน self.sales)] เรียงจากน้อยไปมาก
+
+    def add_sale(self, sale):
+        # เขียน journal ก่อน ถ้าไม่สำเร็จประวัติในหน่วยความจำต้องไม่มีการขายนี้
+        self.journal.append(sale)
+        self.sales.append(sale)
+        self.rollups.apply(sale)
+        if self.journal.needs_compaction():
+            self.journal.compact(self.sales)
+            self.rollups.save(self.rollups_path)
+
+    def recent_sales(self, limit=20):
+        return self.sales[-limit:]
+
+    def daily_summary(self, day):
+        return self.rollups.daily_summary(day)
+
+    def hourly_summary(self, day):
+        return self.rollups.hourly_summary(day)
+
+    def product_summary(self, day):
+        return self.rollups.product_summary(day)
+
+    def rebuild_rollups(self):
+        self.rollups.rebuild(self.sales)
+
+    def find_by_receipt(self, receipt_no):
+        for sale in reversed(self.sales):
+            if sale['receipt_no'] == receipt_no:
+                return sale
+        return None
+
+    def iter_sales(self, start=None, end=None):
+        for sale in self.sales:
+            if start is not None and sale['date'] < start:
+                continue
+            if end is not None and sale['date'] >= end:
+                continue
+            yield sale
+
+    def count(self, start=None, end=None):
+        if start is None and end is None:
+            return len(self.sales)
+        return sum(1 for _ in self.iter_sales(start, end))
+
+    def _summary(self, index):
+        sale = self.sales[index]
+        return (sale['date'], sale['receipt_no'], sale_item_count(sale), sale['total'])
+
+    def summary_page(self, offset, limit, sort='date', descending=True, total=None):
+        # เรียงครั้งแรกครั้งเดียว การขายใหม่แทรกเข้าตำแหน่งด้วย bisect
+        position = SUMMARY_SORT_KEYS.index(sort)
+        order = self._summary_order.get(sort)
+        if order is None:
+            order = self._summary_order[sort] = sorted(
+                (self._summary(index)[position], index) for index in range(len(self.sales)))
+        for index in range(len(order), len(self.sales)):
+            bisect.insort(order, (self._summary(index)[position], index))
+
+        if descending:
+            stop = len(order) - offset
+            indexes = [index for _, index in reversed(order[max(0, stop - limit):max(0, stop)])]
+        else:
+            indexes = [index for _, index in order[offset:offset + limit]]
+        return [self._summary(index) for index in indexes]
+
+    def close(self):
+        self.journal.close()
+        self.rollups.save(self.rollups_path)
+
+
+
+class SQLiteSalesStore(SalesStore):
+    """เก็บประวัติการขายใน SQLite พร้อมดัชนีบนวันที่และเลขที่ใบเสร็จ
+
+    แต่ละเธรดจะได้ connection ของตัวเอง จึงเรียกใช้จากเธรดพื้นหลังได้
+    """
+
+    def __init__(self, path='data/sales.db'):
+        self.path = path
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self.conn.executescript(SCHEMA)
+        if not self.get_meta('rollups_built'):
+            self.rebuild_rollups()
+        if not self.get_meta('search_index_built'):
+            self.rebuild_search_index()
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            # FULL: WAL ถูก fsync ทุกครั้งที่ commit การขายจึงไม่หายเมื่อไฟดับ (เท่ากับ SalesJournal)
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def add_sale(self, sale):
+        with self.conn:
+            self._insert(self.conn, sale)
+
+    def add_sales(self, sales):
+        """เพิ่มการขายหลายรายการในทรานแซกชันเดียว"""
+        with self.conn:
+            for sale in sales:
+                self._insert(self.conn, sale)
+
+    def _insert(self, conn, sale):
+        cur = conn.execute(
+            "INSERT INTO sales (receipt_no, date, total, tax_rate, item_count) VALUES (?, ?, ?, ?, ?)",
+            (sale['receipt_no'], sale['date'], sale['total'], sale.get('tax_rate', 7),
+             sale_item_count(sale)))
+        sale_id = cur.lastrowid
+        conn.executemany(
+            "INSERT INTO sale_items (sale_id, line_no, product_id, name, price, category, quantity) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(sale_id, i, item.get('id'), item['name'], item['price'], item.get('category'),
+              item.get('quantity', 1))
+             for i, item in enumerate(sale['items'])])
+        conn.executemany(
+            "INSERT OR IGNORE INTO product_names (product_id, name) VALUES (?, ?)",
+            [(item['id'], item['name']) for item in sale['items'] if item.get('id') is not None])
+
+        # อัปเดตยอดสรุปในทรานแซกชันเดียวกับการขาย
+        day, hour, lines = rollup_keys(sale)
+        conn.execute(
+            "INSERT INTO rollup_daily (day, sale_count, total) VALUES (?, 1, ?) "
+            "ON CONFLICT(day) DO UPDATE SET sale_count = sale_count + 1, total = total + excluded.total",
+            (day, sale['total']))
+        conn.execute(
+            "INSERT INTO rollup_hourly (day, hour, sale_count, total) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT(day, hour) DO UPDATE SET sale_count = sale_count + 1, total = total + excluded.total",
+            (day, hour, sale['total']))
+        conn.executemany(
+            "INSERT INTO rollup_product (day, product_id, name, quantity, amount) VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT(day, product_id) DO UPDATE SET quantity = quantity + excluded.quantity, "
+            "amount = amount + excluded.amount",
+            [(day,) + line for line in lines])
+        return sale_id
+
+    def _load_items(self, sale_ids):
+        items = {sale_id: [] for sale_id in sale_ids}
+        if not sale_ids:
+            return items
+        placeholders = ",".join("?" * len(sale_ids))
+        rows = self.conn.execute(
+            f"SELECT * FROM sale_items WHERE sale_id IN ({placeholders}) ORDER BY sale_id, line_no",
+            list(sale_ids))
+        for row in rows:
+            item = {"id": row['product_id'], "name": row['name'],
+                    "price": row['price'], "category": row['category']}
+            if row['quantity'] != 1:
+                item['quantity'] = row['quantity']
+            items[row['sale_id']].append(item)
+        return items
+
+    def _to_sales(self, rows):
+        items = self._load_items([row['id'] for row in rows])
+        return [{
+            'date': row['date'],
+            'receipt_no': row['receipt_no'],
+            'items': items[row['id']],
+            'total': row['total'],
+            'tax_rate': row['tax_rate'],
+        } for row in rows]
+
+    def recent_sales(self, limit=20):
+        rows = self.conn.execute(
+            "SELECT * FROM sales ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        return self._to_sales(rows[::-1])
+
+    def recent_summaries(self, limit=20):
+        """แถวสรุปล่าสุดโดยไม่ต้องโหลดรายการสินค้า"""
+        rows = self.conn.execute(
+            "SELECT date, receipt_no, item_count, total FROM sales ORDER BY id DESC LIMIT ?",
+            (limit,)).fetchall()
+        return [tuple(row) for row in reversed(rows)]
+
+    def daily_summary(self, day):
+        row = self.conn.execute(
+            "SELECT sale_count, total FROM rollup_daily WHERE day = ?", (day,)).fetchone()
+        return (row[0], row[1]) if row else (0, 0)
+
+    def hourly_summary(self, day):
+        rows = self.conn.execute(
+            "SELECT hour, sale_count, total FROM rollup_hourly WHERE day = ? ORDER BY hour", (day,))
+        return [tuple(row) for row in rows]
+
+    def product_summary(self, day):
+        rows = self.conn.execute(
+            "SELECT product_id, name, quantity, amount FROM rollup_product WHERE day = ? "
+            "ORDER BY amount DESC", (day,))
+        return [tuple(row) for row in rows]
+
+    def rebuild_rollups(self):
+        # executescript สั่ง COMMIT ก่อนทำงาน จึงใช้ execute ทีละคำสั่งใน transaction เดียว
+        # ถ้าคำสั่งใดไม่สำเร็จ ยอดสรุปเดิมยังอยู่ครบ
+        with self.conn:
+            self.conn.execute("BEGIN")
+            for statement in REBUILD_ROLLUPS:
+                self.conn.execute(statement)
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('rollups_built', '1')")
+
+    def summary_page(self, offset, limit, sort='date', descending=True, total=None):
+        """อ่านหนึ่งหน้าจากดัชนีของคอลัมน์ที่เรียง (covering index) แล้วจึงอ่านแถวเฉพาะหน้านั้น
+
+        หน้าที่อยู่ครึ่งหลังอ่านจากปลายอีกด้านของดัชนี จึงข้ามแถวไม่เกินครึ่งตาราง
+        """
+        if sort not in SUMMARY_SORT_KEYS:
+            raise ValueError(f"เรียงตาม {sort} ไม่ได้")
+        reverse = total is not None and offset > total // 2
+        if reverse:
+            descending = not descending
+            limit = min(limit, total - offset)
+            offset = max(0, total - offset - limit)
+        direction = "DESC" if descending else "ASC"
+        rows = self.conn.execute(
+            f"SELECT s.date, s.receipt_no, s.item_count, s.total FROM "
+            f"(SELECT id, {sort} AS k FROM sales ORDER BY {sort} {direction}, id {direction} "
+            f"LIMIT ? OFFSET ?) p JOIN sales s ON s.id = p.id "
+            f"ORDER BY p.k {direction}, p.id {direction}",
+            (limit, offset)).fetchall()
+        rows = [tuple(row) for row in rows]
+        return rows[::-1] if reverse else rows
+
+    def rebuild_search_index(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM product_names")
+            self.conn.execute(
+                "INSERT OR IGNORE INTO product_names (product_id, name) "
+                "SELECT DISTINCT product_id, name FROM sale_items WHERE product_id IS NOT NULL")
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('search_index_built', '1')")
+
+    def _estimate_at_least(self, sql, args, threshold):
+        """True ถ้าคำค้นมีผลลัพธ์อย่างน้อย threshold แถว (นับไม่เกิน threshold แถว)"""
+        return self.conn.execute(
+            f"SELECT COUNT(*) FROM ({sql} LIMIT ?)", list(args) + [threshold]).fetchone()[0] >= threshold
+
+    def search(self, query, limit=200, selective=20000):
+        """ค้นหาด้วยดัชนี: คำที่มีผลลัพธ์น้อย (ไม่เกิน selective แถว) ใช้ดัชนีของคำนั้นหาการขาย
+        คำที่มีผลลัพธ์มากตรวจทีละการขายขณะไล่จากการขายล่าสุด ซึ่งจะเจอครบ limit แถวได้เร็ว"""
+        conn = self.conn
+        where = ["s.date >= ?", "s.date < ?"]
+        args = [query.start or "", query.end or "\uffff"]
+        # มีคำที่ผลลัพธ์น้อย: หาจากดัชนีของคำนั้นแล้วเรียงเอง แทนการไล่ดัชนีวันที่ทั้งตาราง
+        selective_term = False
+
+        if query.receipt_prefix:
+            receipt_args = [query.receipt_prefix, query.receipt_prefix + "\uffff"]
+            common = self._estimate_at_least(
+                "SELECT 1 FROM sales WHERE receipt_no >= ? AND receipt_no < ?", receipt_args, selective)
+            # เครื่องหมาย + ปิดการใช้ดัชนีเลขที่ใบเสร็จ (ให้ไล่ตามดัชนีวันที่แทน)
+            column = "+s.receipt_no" if common else "s.receipt_no"
+            selective_term = selective_term or not common
+            where.append(f"{column} >= ? AND {column} < ?")
+            args += receipt_args
+
+        product_terms = [[product_id] for product_id in query.product_ids]
+        for word in query.names:
+            escaped = word.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            ids = [row[0] for row in conn.execute(
+                "SELECT DISTINCT product_id FROM product_names WHERE name LIKE ? ESCAPE '\\'",
+                (f"%{escaped}%",))]
+            if not ids:
+                return []
+            product_terms.append(ids)
+
+        for ids in product_terms:
+            placeholders = ",".join("?" * len(ids))
+            postings = f"SELECT sale_id FROM sale_items WHERE product_id IN ({placeholders})"
+            if self._estimate_at_least(postings, ids, selective):
+                # ตรวจเฉพาะรายการของการขายนั้น (คีย์หลัก sale_id) ไม่ใช่ค้นทุกรหัสสินค้าในรายการ
+                where.append(f"EXISTS (SELECT 1 FROM sale_items i WHERE i.sale_id = s.id "
+                             f"AND +i.product_id IN ({placeholders}))")
+            else:
+                where.append(f"s.id IN ({postings})")
+                selective_term = True
+            args += ids
+
+        order = "+s.date" if selective_term else "s.date"
+        rows = conn.execute(
+            f"SELECT s.date, s.receipt_no, s.item_count, s.total FROM sales s "
+            f"WHERE {' AND '.join(where)} ORDER BY {order} DESC, s.id DESC LIMIT ?",
+            args + [limit])
+        return [tuple(row) for row in rows]
+
+    def find_by_receipt(self, receipt_no):
+        rows = self.conn.execute(
+            "SELECT * FROM sales WHERE receipt_no = ? ORDER BY id DESC LIMIT 1",
+            (receipt_no,)).fetchall()
+        sales = self._to_sales(rows)
+        return sales[0] if sales else None
+
+    def iter_sales(self, start=None, end=None, batch_size=500):
+        query = "SELECT * FROM sales WHERE date >= ? AND date < ? AND id > ? ORDER BY id LIMIT ?"
+        start = start or ""
+        end = end or "\uffff"
+        last_id = 0
+        while True:
+            rows = self.conn.execute(query, (start, end, last_id, batch_size)).fetchall()
+            if not rows:
+                break
+            yield from self._to_sales(rows)
+            last_id = rows[-1]['id']
+
+    def count(self, start=None, end=None):
+        if start is None and end is None:
+            return self.conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM sales WHERE date >= ? AND date < ?",
+            (start or "", end or "\uffff")).fetchone()[0]
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+def migrate_json_history(store, data_dir='data'):
+    """ย้ายประวัติจาก data/sales_history.json (และ journal) เข้า SQLite ครั้งเดียว
+
+    คืนค่าจำนวนการขายที่ย้าย หรือ 0 ถ้าเคยย้ายแล้ว/ไม่มีไฟล์เดิม
+    """
+    if store.get_meta('migrated_from_json'):
+        return 0
+
+    journal = SalesJournal(data_dir)
+    if not (os.path.exists(journal.snapshot_path) or os.path.exists(journal.journal_path)):
+        store.set_meta('migrated_from_json', datetime.datetime.now().isoformat())
+        return 0
+
+    sales = journal.load()
+    journal.close()
+    with store.conn:
+        for sale in sales:
+            store._insert(store.conn, sale)
+        store.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                           ('migrated_from_json', datetime.datetime.now().isoformat()))
+    return len(sales)
+
+
+def open_sales_store(backend='sqlite', data_dir='data'):
+    """เปิดที่เก็บประวัติการขายตาม backend ('sqlite' หรือ 'journal')"""
+    if backend == 'journal':
+        return JournalSalesStore(data_dir)
+
+    store = SQLiteSalesStore(os.path.join(data_dir, 'sales.db'))
+    migrate_json_history(store, data_dir)
+    return store
+
+
+if __name__ == "__main__":
+    import sys
+
+    data_dir = sys.argv[1] if len(sys.argv) > 1 else 'data'
+    store = SQLiteSalesStore(os.path.join(data_dir, 'sales.db'))
+    migrated = migrate_json_history(store, data_dir)
+    print(f"ย้ายข้อมูล {migrated} รายการ (รวมในฐานข้อมูล {store.count()} รายการ)")
+    store.close()
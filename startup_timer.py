@@ -0,0 +1,28 @@
+
+import sys
+import time
+
+
+HEAVY_MODULES = ('reportlab', 'numpy', 'qrcode', 'PIL')
+
+
+class StartupTimer:
+    """จับเวลาแต่ละขั้นตอนตอนเปิดโปรแกรม (python app.py --startup-time)"""
+
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.last = self.started
+        self.marks = []
+
+    def mark(self, name):
+        now = time.perf_counter()
+        self.marks.append((name, now - self.last, now - self.started))
+        self.last = now
+
+    def report(self, file=None):
+        file = file or sys.stderr
+        print("เวลาเปิดโปรแกรม:", file=file)
+        for name, step, total in self.marks:
+            print(f"  {name:32s} {step * 1000:8.1f} ms  (สะสม {total * 1000:8.1f} ms)", file=file)
+        loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+        print(f"  ไลบรารีขนาดใหญ่ที่โหลดแล้ว: {', '.join(loaded) or 'ไม่มี'}", file=file)
@@ -0,0 +1,67 @@
+
+import json
+import os
+import threading
+
+
+DEFAULT_SETTINGS = {
+    "store_name": "Payma Store",
+    "address": "123 ถนนพายมา แขวงพายมา เขตพายมา กรุงเทพ 10100",
+    "phone": "02-123-4567",
+    "email": "info@payma.com",
+    "tax_rate": 7,
+    # หมายเลขพร้อมเพย์ของร้าน (เบอร์โทรหรือเลขประจำตัวผู้เสียภาษี)
+    "promptpay_id": "0812345678",
+    # ใบเสร็จของเครื่องนี้: 'pdf' หรือ 'escpos' (เครื่องพิมพ์ความร้อน)
+    "receipt_backend": "pdf",
+    "printer_target": "receipts",
+    # เซิร์ฟเวอร์รวมยอดขายหลายเครื่อง (host:port) เว้นว่างถ้าไม่ใช้ และชื่อเครื่องนี้
+    "sync_server": "",
+    "terminal_id": "",
+    # ฟอนต์ TrueType ภาษาไทยสำหรับใบเสร็จ/รายงาน PDF (เว้นว่างเพื่อค้นหาอัตโนมัติ)
+    "pdf_font": "",
+    "pdf_font_bold": "",
+}
+
+
+class StoreSettings:
+    """การตั้งค่าร้านที่บันทึกใน data/settings.json
+
+    version จะเพิ่มขึ้นทุกครั้งที่ค่ามีการเปลี่ยน เพื่อให้แคชที่อิงการตั้งค่ารู้ว่าต้องสร้างใหม่
+    """
+
+    def __init__(self, path='data/settings.json'):
+        self.path = path
+        self.values = dict(DEFAULT_SETTINGS)
+        self.version = 0
+        self._lock = threading.Lock()
+        self.load()
+
+    def __getitem__(self, key):
+        return self.values[key]
+
+    def get(self, key, default=None):
+        return self.values.get(key, default)
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.values.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w', encoding='utf-8') as f:
+            json.dump(self.values, f, ensure_ascii=False, indent=2)
+
+    def update(self, **values):
+        """อัปเดตค่าและบันทึกลงไฟล์ คืนค่า True ถ้ามีค่าเปลี่ยน"""
+        with self._lock:
+            changed = {k: v for k, v in values.items() if self.values.get(k) != v}
+            if not changed:
+                return False
+            self.values.update(changed)
+            self.version += 1
+            self.save()
+            return True
@@ -0,0 +1,240 @@
+
+import asyncio
+import json
+import os
+import threading
+
+
+class SyncClient:
+    """ส่งการขายใหม่ของเครื่องนี้ไปยังเซิร์ฟเวอร์รวมยอด (sync_server.py) ในเธรดพื้นหลัง
+
+    การขายจะถูกเขียนและ fsync ลงคิวออฟไลน์ (data/sync_outbox.jsonl) ตั้งแต่ enqueue แล้วส่งเป็นชุด
+    ถ้าเซิร์ฟเวอร์ไม่ตอบจะลองใหม่โดยรอนานขึ้นเรื่อย ๆ (สูงสุด max_backoff วินาที)
+    รายการที่เซิร์ฟเวอร์ยืนยันแล้ว (acked) บันทึกใน data/sync_state.json
+    """
+
+    def __init__(self, server, terminal_id, data_dir='data', batch_size=200,
+                 flush_interval=0.2, max_backoff=30.0, timeout=10.0):
+        host, _, port = server.rpartition(":")
+        self.host = host or '127.0.0.1'
+        self.port = int(port)
+        self.terminal_id = terminal_id
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        os.makedirs(data_dir, exist_ok=True)
+        self.outbox_path = os.path.join(data_dir, 'sync_outbox.jsonl')
+        self.state_path = os.path.join(data_dir, 'sync_state.json')
+
+        self.acked = 0
+        self.last_error = None
+        self._last_record = None
+        self._pending = self._load_outbox()     # list ของ (seq, sale) ที่ยังไม่ได้รับการยืนยัน
+        last_seq = self._last_record[0] if self._last_record else 0
+        self._next_seq = max(last_seq, self.acked) + 1
+        self._incoming = []
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._stopping = False
+        self._loop = asyncio.new_event_loop()
+        self._wake = None
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._run(),),
+                                        name="sales-sync", daemon=True)
+        self._thread.start()
+
+    # ----- คิวออฟไลน์ -----
+
+    def _load_outbox(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.acked = json.load(f)['acked']
+        except (OSError, ValueError, KeyError):
+            self.acked = 0
+
+        pending = []
+        try:
+            with open(self.outbox_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break   # บรรทัดท้ายที่เขียนไม่สมบูรณ์
+                    self._last_record = (record['seq'], record['sale'])
+                    if record['seq'] > self.acked:
+                        pending.append(self._last_record)
+        except OSError:
+            pass
+        return pending
+
+    def _write_outbox(self, records):
+        """ต่อท้ายคิวออฟไลน์ (ผู้เรียกถือ self._lock เพื่อไม่ให้ชนกับการเขียนไฟล์ใหม่ทั้งไฟล์)"""
+        with open(self.outbox_path, 'a', encoding='utf-8') as f:
+            for seq, sale in records:
+                f.write(json.dumps({"seq": seq, "sale": sale}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._last_record = records[-1]
+
+    def _save_acked(self):
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({"acked": self.acked}, f)
+        os.replace(tmp_path, self.state_path)
+        # ส่งครบทุกรายการแล้ว เริ่มไฟล์คิวใหม่ โดยเก็บรายการสุดท้ายไว้ให้รู้ seq ถัดไป
+        # (ถ้า sync_state.json หาย รายการนี้จะถูกส่งซ้ำและเซิร์ฟเวอร์จะข้ามไปเอง)
+        with self._lock:
+            if not self._pending and not self._incoming and self._last_record is not None:
+                self._rewrite_outbox([self._last_record])
+
+    def _rewrite_outbox(self, records):
+        """เขียนคิวออฟไลน์ใหม่ทั้งไฟล์ (ผู้เรียกถือ self._lock)"""
+        tmp_path = self.outbox_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for seq, sale in records:
+                f.write(json.dumps({"seq": seq, "sale": sale}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.outbox_path)
+
+    # ----- API สำหรับหน้าจอ -----
+
+    def enqueue(self, sale):
+        """เพิ่มการขายเข้าคิวส่ง รายการถูก fsync ลงคิวออฟไลน์ก่อนคืนค่า (ไม่รอการส่ง)
+
+        ถ้าเขียนไฟล์ไม่ได้ (เช่นดิสก์เต็ม) รายการยังอยู่ในคิวในหน่วยความจำและถูกส่งตามปกติ
+        แต่จะหายถ้าโปรแกรมปิดก่อนส่งสำเร็จ ข้อผิดพลาดเก็บไว้ใน last_error
+        """
+        with self._lock:
+            record = (self._next_seq, sale)
+            try:
+                self._write_outbox([record])
+            except OSError as e:
+                self.last_error = e
+            self._incoming.append(record)
+            self._next_seq += 1
+            self._idle.clear()
+        self._loop.call_soon_threadsafe(self._signal)
+
+    def _signal(self):
+        if self._wake is not None:
+            self._wake.set()
+
+    @property
+    def pending(self):
+        with self._lock:
+            return len(self._pending) + len(self._incoming)
+
+    def wait_idle(self, timeout=None):
+        """รอจนเซิร์ฟเวอร์ยืนยันทุกรายการในคิว คืนค่า True ถ้าส่งครบ"""
+        return self._idle.wait(timeout)
+
+    def summary(self, day, timeout=5.0):
+        """ยอดสรุปรวมทุกเครื่องของวันหนึ่งจากเซิร์ฟเวอร์ (เรียกจากเธรดอื่นที่ไม่ใช่ของ Tk)"""
+        future = asyncio.run_coroutine_threadsafe(
+            self._request({"op": "summary", "day": day}), self._loop)
+        return future.result(timeout)
+
+    def close(self, timeout=2.0):
+        """หยุดส่ง รายการที่ยังไม่ได้ส่งจะอยู่ในคิวออฟไลน์และส่งต่อเมื่อเปิดโปรแกรมครั้งถัดไป"""
+        self._stopping = True
+        self._loop.call_soon_threadsafe(self._signal)
+        self._thread.join(timeout)
+
+    # ----- การส่งในเธรดพื้นหลัง -----
+
+    async def _request(self, message):
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port), self.timeout)
+        try:
+            writer.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+            await writer.drain()
+            return json.loads(await asyncio.wait_for(reader.readline(), self.timeout))
+        finally:
+            writer.close()
+
+    async def _run(self):
+        self._wake = asyncio.Event()
+        connection = None
+        backoff = 0.5
+        while True:
+            # รับรายการใหม่จากหน้าจอ (enqueue เขียนลงคิวออฟไลน์แล้ว)
+            with self._lock:
+                self._pending.extend(self._incoming)
+                self._incoming = []
+
+            if not self._pending:
+                with self._lock:
+                    if not self._incoming:
+                        self._idle.set()
+                if self._stopping:
+                    break
+                self._wake.clear()
+                await self._wake.wait()
+                # รอสักครู่เพื่อรวมการขายที่ตามมาเป็นชุดเดียว
+                await asyncio.sleep(self.flush_interval)
+                continue
+
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(
+                        asyncio.open_connection(self.host, self.port, limit=16 * 1024 * 1024),
+                        self.timeout)
+                await self._push(connection)
+                backoff = 0.5
+                self.last_error = None
+            except (OSError, asyncio.TimeoutError, ValueError) as e:
+                self.last_error = e
+                if connection is not None:
+                    connection[1].close()
+                    connection = None
+                if self._stopping:
+                    break
+                # ออฟไลน์: รอแล้วลองใหม่ (ตื่นเร็วขึ้นได้เมื่อถูกสั่งปิด)
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), backoff)
+                except asyncio.TimeoutError:
+                    pass
+                backoff = min(backoff * 2, self.max_backoff)
+
+        if connection is not None:
+            connection[1].close()
+
+    async def _push(self, connection):
+        reader, writer = connection
+        batch = self._pending[:self.batch_size]
+        message = {"op": "push", "terminal": self.terminal_id,
+                   "batch": [{"seq": seq, "sale": sale} for seq, sale in batch]}
+        writer.write(json.dumps(message, ensure_ascii=False).encode() + b"\n")
+        await writer.drain()
+        line = await asyncio.wait_for(reader.readline(), self.timeout)
+        if not line:
+            raise ConnectionResetError("เซิร์ฟเวอร์ปิดการเชื่อมต่อ")
+        reply = json.loads(line)
+        if not reply.get('ok'):
+            if reply.get('error') == 'seq regression':
+                self._renumber(reply['acked'])
+                return
+            raise ValueError(reply.get('error'))
+
+        self.acked = reply['acked']
+        with self._lock:
+            self._pending = [record for record in self._pending if record[0] > self.acked]
+            self._next_seq = max(self._next_seq, self.acked + 1)
+        self._save_acked()
+
+    def _renumber(self, acked):
+        """เซิร์ฟเวอร์มี seq ของเครื่องนี้ถึง acked แล้ว (เครื่องเริ่มนับใหม่ เช่นโฟลเดอร์ข้อมูลถูกล้าง)
+        ให้เลขใหม่ต่อจาก acked กับทุกรายการที่ยังไม่ได้ส่ง แล้วเขียนคิวออฟไลน์ใหม่"""
+        with self._lock:
+            sales = [sale for _, sale in self._pending + self._incoming]
+            records = [(acked + 1 + i, sale) for i, sale in enumerate(sales)]
+            self._pending = records[:len(self._pending)]
+            self._incoming = records[len(self._pending):]
+            self._next_seq = acked + 1 + len(records)
+            self._rewrite_outbox(records)
+            if records:
+                self._last_record = records[-1]
+        self.acked = acked
+        self._save_acked()
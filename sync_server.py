@@ -0,0 +1,220 @@
+
+"""เซิร์ฟเวอร์รวมยอดขายจากหลายเครื่อง (asyncio) สำหรับใช้ภายในร้าน
+
+แต่ละเครื่องส่งการขายใหม่มาเป็นชุดพร้อมเลขลำดับ (seq) ของเครื่องนั้น เซิร์ฟเวอร์บันทึกลง SQLite
+พร้อมยอดสรุปรวมทุกเครื่อง และจำ seq ล่าสุดของแต่ละเครื่องในทรานแซกชันเดียวกัน
+การส่งซ้ำหลังเชื่อมต่อใหม่จึงไม่ทำให้ยอดซ้ำ
+
+โปรโตคอล: JSON หนึ่งบรรทัดต่อข้อความ ผ่าน TCP
+    {"op": "push", "terminal": "T1", "batch": [{"seq": 1, "sale": {...}}, ...]}
+        -> {"ok": true, "acked": <seq ล่าสุดที่บันทึกแล้ว>}
+        -> {"ok": false, "error": "seq regression", "acked": <seq ล่าสุด>}  (เครื่องเริ่มนับ seq ใหม่)
+    {"op": "summary", "day": "YYYY-MM-DD"}
+        -> {"ok": true, "daily": [จำนวน, ยอดรวม], "hourly": [...], "products": [...], "terminals": {...}}
+
+ตัวอย่าง:
+    python sync_server.py serve --port 8765
+    python sync_server.py loadtest --terminals 8 --sales 2000
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from sales_store import SQLiteSalesStore
+
+
+# ขนาดสูงสุดของหนึ่งบรรทัด (ชุดการขายหลายร้อยรายการ)
+LINE_LIMIT = 16 * 1024 * 1024
+
+
+class SyncServer:
+    """รับการขายจากหลายเครื่องและเก็บยอดสรุปรวม"""
+
+    def __init__(self, data_dir='sync_data', host='127.0.0.1', port=8765):
+        os.makedirs(data_dir, exist_ok=True)
+        self.host = host
+        self.port = port
+        self.store = SQLiteSalesStore(os.path.join(data_dir, 'sales.db'))
+        # SQLite ทำงานในเธรดเดียว ไม่บล็อก event loop และไม่ต้องแย่งล็อกฐานข้อมูล
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="sync-db")
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                  limit=LINE_LIMIT)
+        # port=0 ให้ระบบเลือกพอร์ตว่าง (ใช้ตอนทดสอบ)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await asyncio.get_running_loop().run_in_executor(self._executor, self.store.close)
+        self._executor.shutdown()
+
+    async def _handle(self, reader, writer):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                    if message.get('op') == 'push':
+                        reply = await loop.run_in_executor(self._executor, self.apply_push,
+                                                           message['terminal'], message['batch'])
+                    elif message.get('op') == 'summary':
+                        reply = await loop.run_in_executor(self._executor, self.summary,
+                                                           message['day'])
+                    else:
+                        reply = {"ok": False, "error": "unknown op"}
+                except (ValueError, KeyError, TypeError) as e:
+                    reply = {"ok": False, "error": str(e)}
+                writer.write(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _terminal_state(self, terminal):
+        value = self.store.get_meta(f"terminal:{terminal}")
+        return json.loads(value) if value else {"seq": 0, "count": 0, "total": 0}
+
+    def _already_stored(self, sale):
+        stored = self.store.find_by_receipt(sale['receipt_no'])
+        return (stored is not None and stored['date'] == sale['date']
+                and abs(stored['total'] - sale['total']) < 0.005)
+
+    def apply_push(self, terminal, batch):
+        """บันทึกชุดการขายของเครื่องหนึ่ง ข้ามรายการที่ seq ไม่เกินที่เคยบันทึกแล้ว
+
+        รายการที่ seq ไม่เกินที่บันทึกแล้วต้องเป็นการส่งซ้ำของการขายเดิม ถ้าเป็นการขายใหม่
+        แปลว่าเครื่องนั้นเริ่มนับ seq ใหม่ (เช่นโฟลเดอร์ข้อมูลถูกล้าง) จึงปฏิเสธทั้งชุด
+        แทนการข้ามเงียบ ๆ เครื่องจะเลื่อน seq ต่อจาก acked แล้วส่งใหม่
+        """
+        conn = self.store.conn
+        state = self._terminal_state(terminal)
+        for record in batch:
+            if record['seq'] <= state['seq'] and not self._already_stored(record['sale']):
+                return {"ok": False, "error": "seq regression", "acked": state['seq']}
+        with conn:
+            for record in batch:
+                if record['seq'] <= state['seq']:
+                    continue
+                self.store._insert(conn, record['sale'])
+                state['seq'] = record['seq']
+                state['count'] += 1
+                state['total'] += record['sale']['total']
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                         (f"terminal:{terminal}", json.dumps(state)))
+        return {"ok": True, "acked": state['seq']}
+
+    def summary(self, day):
+        """ยอดสรุปรวมทุกเครื่องของวันหนึ่ง"""
+        terminals = {row[0][len("terminal:"):]: json.loads(row[1]) for row in self.store.conn.execute(
+            "SELECT key, value FROM meta WHERE key LIKE 'terminal:%'")}
+        return {
+            "ok": True,
+            "daily": list(self.store.daily_summary(day)),
+            "hourly": self.store.hourly_summary(day),
+            "products": self.store.product_summary(day),
+            "terminals": terminals,
+        }
+
+
+async def serve(data_dir, host, port):
+    server = await SyncServer(data_dir, host, port).start()
+    print(f"เซิร์ฟเวอร์รวมยอดขายรอที่ {server.host}:{server.port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+async def load_test(terminals=4, sales_per_terminal=1000, batch_size=200):
+    """จำลองหลายเครื่องบน localhost ส่งการขายพร้อมกัน แล้วตรวจยอดรวมที่เซิร์ฟเวอร์"""
+    from product_catalog import DEFAULT_PRODUCTS
+    from sync_client import SyncClient
+
+    work_dir = tempfile.mkdtemp(prefix="payma-sync-")
+    server = await SyncServer(os.path.join(work_dir, 'server'), port=0).start()
+    serving = asyncio.ensure_future(server.serve_forever())
+    loop = asyncio.get_running_loop()
+    day = datetime.date.today().strftime("%Y-%m-%d")
+
+    def run_terminal(index):
+        client = SyncClient(f"127.0.0.1:{server.port}", f"T{index}",
+                            os.path.join(work_dir, f"T{index}"), batch_size=batch_size)
+        expected = 0
+        for n in range(sales_per_terminal):
+            product = DEFAULT_PRODUCTS[(index + n) % len(DEFAULT_PRODUCTS)]
+            sale = {'date': f"{day} {n % 24:02d}:00:00", 'receipt_no': f"T{index}-{n}",
+                    'items': [{"id": product['id'], "name": product['name'],
+                               "price": product['price'], "category": product['category'],
+                               "quantity": 1}],
+                    'total': product['price'], 'tax_rate': 7}
+            client.enqueue(sale)
+            expected += sale['total']
+        client.wait_idle(timeout=120)
+        client.close()
+        return expected
+
+    started = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=terminals) as pool:
+        expected = sum(await asyncio.gather(
+            *(loop.run_in_executor(pool, run_terminal, i) for i in range(terminals))))
+    elapsed = time.perf_counter() - started
+
+    count, total = (await loop.run_in_executor(server._executor, server.summary, day))['daily']
+    serving.cancel()
+    await server.close()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    sent = terminals * sales_per_terminal
+    print(f"{terminals} เครื่อง ส่ง {sent:,} รายการใน {elapsed:.2f} วินาที "
+          f"({sent / elapsed:,.0f} รายการ/วินาที)")
+    print(f"เซิร์ฟเวอร์ได้รับ {count:,} รายการ ยอดรวม {total:,.2f} (คาดไว้ {expected:,.2f})")
+    return count == sent and abs(total - expected) < 0.01
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="เซิร์ฟเวอร์รวมยอดขายหลายเครื่อง")
+    sub = parser.add_subparsers(dest="command", required=True)
+    run = sub.add_parser("serve", help="เปิดเซิร์ฟเวอร์")
+    run.add_argument("--data-dir", default="sync_data")
+    run.add_argument("--host", default="0.0.0.0")
+    run.add_argument("--port", type=int, default=8765)
+    test = sub.add_parser("loadtest", help="ทดสอบโหลดด้วยเครื่องจำลองบน localhost")
+    test.add_argument("--terminals", type=int, default=4)
+    test.add_argument("--sales", type=int, default=1000, help="จำนวนการขายต่อเครื่อง")
+    test.add_argument("--batch-size", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        try:
+            asyncio.run(serve(args.data_dir, args.host, args.port))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    ok = asyncio.run(load_test(args.terminals, args.sales, args.batch_size))
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
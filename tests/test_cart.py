@@ -0,0 +1,31 @@
+from cart import Cart
+
+
+def product(product_id, price=10):
+    return {"id": product_id, "name": f"สินค้า {product_id}", "price": price}
+
+
+def test_add_returns_row_after_removals():
+    cart = Cart()
+    products = [product(i) for i in range(5)]
+    for p in products:
+        cart.add(p)
+    cart.remove_at(1)
+    cart.remove_at(0)
+    assert cart.add(products[4]) == (2, False)
+    assert cart.add(products[2]) == (0, False)
+    assert cart.add(products[0]) == (3, True)
+    assert cart.line_text(3).startswith("สินค้า 0 x1")
+
+
+def test_total_does_not_drift():
+    cart = Cart()
+    coffee, water = product(1, 0.1), product(2, 19.99)
+    for _ in range(1000):
+        cart.add(coffee)
+        cart.add(water, 3)
+    assert cart.total == 60070.0
+    cart.remove_at(1)
+    cart.remove_at(0)
+    assert cart.total == 0
+    assert not cart
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from inventory import Inventory
+from product_catalog import DEFAULT_PRODUCTS, ProductCatalog
+from sales_engine import SalesEngine
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = SalesEngine(str(tmp_path / "data"), str(tmp_path / "receipts"), 'journal',
+                         catalog=ProductCatalog(dict(p) for p in DEFAULT_PRODUCTS))
+    yield engine
+    engine.close()
+
+
+def fail(*args, **kwargs):
+    raise OSError("disk full")
+
+
+def test_failed_inventory_commit_records_nothing(engine, monkeypatch):
+    first, second = engine.catalog.products[:2]
+    on_hand = {p['id']: engine.inventory.on_hand[p['id']] for p in (first, second)}
+    engine.add_to_cart(first, 2)
+    engine.add_to_cart(second)
+    ledger_size = os.path.getsize(engine.inventory.ledger_path)
+
+    monkeypatch.setattr(os, 'fsync', fail)
+    with pytest.raises(OSError):
+        engine.checkout()
+    monkeypatch.undo()
+
+    assert engine.sales_store.count() == 0
+    assert os.path.getsize(engine.inventory.ledger_path) == ledger_size
+    assert engine.cart.count == 3
+    assert engine.inventory.reserved[first['id']] == 2
+
+    sale = engine.checkout()
+    assert engine.sales_store.count() == 1
+    assert engine.inventory.on_hand[first['id']] == on_hand[first['id']] - 2
+    assert engine.inventory.on_hand[second['id']] == on_hand[second['id']] - 1
+    assert not engine.cart
+
+    # ledger ที่อ่านใหม่ต้องตัดสต็อกครั้งเดียว
+    reloaded = Inventory(engine.data_dir)
+    try:
+        assert reloaded.on_hand[first['id']] == on_hand[first['id']] - 2
+    finally:
+        reloaded.close()
+    assert [s['receipt_no'] for s in engine.sales_store.sales] == [sale['receipt_no']]
+
+
+def test_retry_after_failed_save_does_not_commit_stock_twice(engine, monkeypatch):
+    product = engine.catalog.products[0]
+    on_hand = engine.inventory.on_hand[product['id']]
+    engine.add_to_cart(product, 2)
+
+    monkeypatch.setattr(engine.sales_store.journal, 'append', fail)
+    with pytest.raises(OSError):
+        engine.checkout()
+    monkeypatch.undo()
+    assert engine.sales_store.count() == 0
+    assert engine.cart.count == 2
+
+    engine.checkout()
+    assert engine.sales_store.count() == 1
+    assert engine.inventory.on_hand[product['id']] == on_hand - 2
+
+
+def test_editing_cart_after_failed_save_returns_stock(engine, monkeypatch):
+    first, second = engine.catalog.products[:2]
+    on_hand = engine.inventory.on_hand[first['id']]
+    engine.add_to_cart(first, 2)
+
+    monkeypatch.setattr(engine.sales_store.journal, 'append', fail)
+    with pytest.raises(OSError):
+        engine.checkout()
+    monkeypatch.undo()
+
+    engine.add_to_cart(second)
+    assert engine.inventory.on_hand[first['id']] == on_hand
+    assert engine.inventory.reserved[first['id']] == 2
+    engine.checkout()
+    assert engine.inventory.on_hand[first['id']] == on_hand - 2
+    assert engine.sales_store.count() == 1
@@ -0,0 +1,12 @@
+import pytest
+
+from product_grid import wheel_steps
+
+
+@pytest.mark.parametrize("delta, steps", [
+    (120, -1), (-120, 1), (240, -2), (-360, 3),     # Windows
+    (1, -1), (-1, 1), (7, -1), (-3, 1),             # macOS
+    (0, 0),
+])
+def test_wheel_steps(delta, steps):
+    assert wheel_steps(delta) == steps
@@ -0,0 +1,32 @@
+
+from product_catalog import DEFAULT_PRODUCTS, ProductCatalog
+from promptpay import PromptPayPayload
+from sales_engine import SalesEngine
+from sales_store import sale_totals
+
+
+def payload_amount(builder, payload):
+    """ยอดเงินใน tag 54 (ต่อจากส่วนหน้าที่ไม่เปลี่ยนตามยอด)"""
+    rest = payload[len(builder.prefix):]
+    assert rest.startswith("54")
+    return rest[4:4 + int(rest[2:4])]
+
+
+def test_qr_amount_matches_receipt_total(tmp_path):
+    engine = SalesEngine(str(tmp_path / "data"), str(tmp_path / "receipts"), 'journal',
+                         catalog=ProductCatalog(dict(p) for p in DEFAULT_PRODUCTS))
+    try:
+        engine.settings.values['tax_rate'] = 7
+        engine.add_to_cart(engine.catalog.products[0], 3)
+        engine.add_to_cart(engine.catalog.products[1])
+
+        _, _, total = engine.totals()
+        builder = PromptPayPayload("0812345678")
+        payload = builder.build(total)
+
+        _, tax, grand_total = sale_totals(engine.new_sale())
+        assert tax > 0
+        assert payload_amount(builder, payload) == f"{grand_total:.2f}"
+        assert payload_amount(builder, payload) != f"{engine.cart.total:.2f}"
+    finally:
+        engine.close()
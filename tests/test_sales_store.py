@@ -0,0 +1,40 @@
+import sqlite3
+
+import pytest
+
+import sales_store
+from sales_store import SQLiteSalesStore
+
+
+def sale(receipt_no, date, quantity=1):
+    return {'date': date, 'receipt_no': receipt_no, 'tax_rate': 7, 'total': 20 * quantity,
+            'items': [{'id': 1, 'name': 'น้ำดื่ม', 'price': 20, 'category': None, 'quantity': quantity}]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SQLiteSalesStore(str(tmp_path / "sales.db"))
+    store.add_sales([sale("R1", "2026-01-01 09:15:00", 2), sale("R2", "2026-01-01 10:30:00"),
+                     sale("R3", "2026-01-02 09:00:00", 3)])
+    yield store
+    store.close()
+
+
+def summaries(store):
+    return [(store.daily_summary(day), store.hourly_summary(day), store.product_summary(day))
+            for day in ("2026-01-01", "2026-01-02")]
+
+
+def test_rebuild_rollups_matches_incremental(store):
+    before = summaries(store)
+    store.rebuild_rollups()
+    assert summaries(store) == before
+
+
+def test_failed_rebuild_keeps_old_rollups(store, monkeypatch):
+    before = summaries(store)
+    monkeypatch.setattr(sales_store, 'REBUILD_ROLLUPS',
+                        sales_store.REBUILD_ROLLUPS[:3] + ("INSERT INTO no_such_table VALUES (1)",))
+    with pytest.raises(sqlite3.OperationalError):
+        store.rebuild_rollups()
+    assert summaries(store) == before
@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from thai_baht import baht_text, baht_text_many, number_text
+
+
+def old_convert_number(num):
+    """convert_number เดิมของ ReceiptGenerator (อ่านได้ถึง 9,999,999)"""
+    if num == 0:
+        return ""
+    numbers = ['', 'หนึ่ง', 'สอง', 'สาม', 'สี่', 'ห้า', 'หก', 'เจ็ด', 'แปด', 'เก้า']
+    units = ['', 'สิบ', 'ร้อย', 'พัน', 'หมื่น', 'แสน', 'ล้าน']
+    text = ""
+    num_str = str(num)
+    length = len(num_str)
+    for i, digit in enumerate(num_str):
+        digit_int = int(digit)
+        unit_index = length - i - 1
+        if digit_int > 0:
+            if unit_index == 1 and digit_int == 2:
+                text += "ยี่สิบ"
+            elif unit_index == 1 and digit_int == 1:
+                text += "สิบ"
+            else:
+                if digit_int == 1 and unit_index == 0 and i > 0:
+                    text += "เอ็ด"
+                else:
+                    text += numbers[digit_int]
+                if unit_index > 0:
+                    text += units[unit_index]
+    return text
+
+
+def old_baht_text(baht, satang):
+    """number_to_thai_baht เดิม (รับบาทและสตางค์แยกกัน เลี่ยงการปัดเศษแบบเดิม)"""
+    if baht == 0 and satang == 0:
+        return "ศูนย์บาทถ้วน"
+    text = old_convert_number(baht) + "บาท" if baht else ""
+    return text + (old_convert_number(satang) + "สตางค์" if satang else "ถ้วน")
+
+
+SAMPLE = sorted(set(range(0, 2100)) | {10 ** k + d for k in range(2, 7) for d in (-1, 0, 1, 10, 11, 21)}
+                | set(random.Random(14).sample(range(10 ** 7), 2000)))
+
+
+def test_number_text_matches_old_convert_number():
+    for num in SAMPLE:
+        assert number_text(num) == old_convert_number(num), num
+
+
+def test_baht_text_matches_old_conversion():
+    rng = random.Random(1400)
+    for baht in SAMPLE[::7]:
+        satang = rng.randrange(100)
+        assert baht_text(baht + satang / 100) == old_baht_text(baht, satang), (baht, satang)
+
+
+@pytest.mark.parametrize("amount, text", [
+    (0, "ศูนย์บาทถ้วน"),
+    (0.0, "ศูนย์บาทถ้วน"),
+    (0.001, "ศูนย์บาทถ้วน"),
+    (0.01, "หนึ่งสตางค์"),
+    (0.5, "ห้าสิบสตางค์"),
+    (21.21, "ยี่สิบเอ็ดบาทยี่สิบเอ็ดสตางค์"),
+    (1.005, "หนึ่งบาทถ้วน"),
+    (0.999, "หนึ่งบาทถ้วน"),
+    (99.995, "หนึ่งร้อยบาทถ้วน"),
+    (1234.56, "หนึ่งพันสองร้อยสามสิบสี่บาทห้าสิบหกสตางค์"),
+    (1000000, "หนึ่งล้านบาทถ้วน"),
+    (1000001, "หนึ่งล้านเอ็ดบาทถ้วน"),
+    (10000000, "สิบล้านบาทถ้วน"),
+    (11000000, "สิบเอ็ดล้านบาทถ้วน"),
+    (21000021, "ยี่สิบเอ็ดล้านยี่สิบเอ็ดบาทถ้วน"),
+    (100000000, "หนึ่งร้อยล้านบาทถ้วน"),
+    (1000000000000, "หนึ่งล้านล้านบาทถ้วน"),
+    (1000001000000, "หนึ่งล้านเอ็ดล้านบาทถ้วน"),
+])
+def test_baht_text_edge_cases(amount, text):
+    assert baht_text(amount) == text
+
+
+def test_number_text_rejects_negative():
+    with pytest.raises(ValueError):
+        number_text(-1)
+
+
+def test_baht_text_many_keeps_order():
+    assert baht_text_many([1, 2, 1]) == ["หนึ่งบาทถ้วน", "สองบาทถ้วน", "หนึ่งบาทถ้วน"]
@@ -0,0 +1,70 @@
+
+"""แปลงจำนวนเงินเป็นตัวหนังสือภาษาไทย (บาท/สตางค์) ด้วยตารางที่คำนวณไว้ล่วงหน้า
+
+ตัวเลขถูกแบ่งเป็นกลุ่มละ 6 หลัก แต่ละกลุ่มที่สูงขึ้นต่อท้ายด้วย "ล้าน" (เช่น หนึ่งล้านล้าน)
+เลขหนึ่งในหลักหน่วยอ่านว่า "เอ็ด" เมื่อมีหลักอื่นนำหน้า และเลขสองในหลักสิบอ่านว่า "ยี่"
+"""
+
+from functools import lru_cache
+
+DIGITS = ['', 'หนึ่ง', 'สอง', 'สาม', 'สี่', 'ห้า', 'หก', 'เจ็ด', 'แปด', 'เก้า']
+UNITS = ['', 'สิบ', 'ร้อย', 'พัน', 'หมื่น', 'แสน']
+
+
+def _tens_table(leading):
+    """คำอ่านของ 0-99 (leading=True เมื่อมีหลักที่สูงกว่านำหน้า)"""
+    table = []
+    for value in range(100):
+        tens, ones = divmod(value, 10)
+        text = {0: '', 1: 'สิบ', 2: 'ยี่สิบ'}.get(tens, DIGITS[tens] + 'สิบ')
+        if ones == 1 and (tens or leading):
+            text += 'เอ็ด'
+        else:
+            text += DIGITS[ones]
+        table.append(text)
+    return table
+
+
+# คำอ่าน 0-99 แบบไม่มีหลักนำหน้า / มีหลักนำหน้า
+TENS = _tens_table(False)
+TENS_LEADING = _tens_table(True)
+
+# คำอ่านของ 0-9999 ในหลักร้อยถึงแสน (ค่าในกลุ่มหารด้วย 100) เช่น 35 -> "สามพันห้าร้อย"
+HUNDREDS = ["".join(DIGITS[int(d)] + UNITS[5 - i] for i, d in enumerate(f"{value:04d}") if d != '0')
+            for value in range(10000)]
+
+
+def number_text(num):
+    """อ่านจำนวนเต็มบวกเป็นตัวหนังสือ (0 คืนค่าสตริงว่าง)"""
+    if num < 0:
+        raise ValueError("จำนวนต้องไม่ติดลบ")
+    groups = []
+    while num:
+        num, group = divmod(num, 1000000)
+        groups.append(group)
+
+    parts = []
+    for index in range(len(groups) - 1, -1, -1):
+        group = groups[index]
+        if group:
+            high, low = divmod(group, 100)
+            leading = bool(high) or index < len(groups) - 1
+            parts.append(HUNDREDS[high] + (TENS_LEADING if leading else TENS)[low])
+        if index:
+            parts.append('ล้าน')
+    return "".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def baht_text(amount):
+    """จำนวนเงินเป็นตัวหนังสือ เช่น 1234.5 -> หนึ่งพันสองร้อยสามสิบสี่บาทห้าสิบสตางค์"""
+    baht, satang = divmod(int(round(amount * 100)), 100)
+    if baht == 0 and satang == 0:
+        return "ศูนย์บาทถ้วน"
+    text = number_text(baht) + "บาท" if baht else ""
+    return text + (number_text(satang) + "สตางค์" if satang else "ถ้วน")
+
+
+def baht_text_many(amounts):
+    """แปลงจำนวนเงินหลายรายการ (เช่น ทุกแถวของรายงาน) จำนวนที่ซ้ำกันจะใช้ผลจากแคช"""
+    return [baht_text(amount) for amount in amounts]
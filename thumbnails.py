@@ -0,0 +1,279 @@
+
+"""ภาพย่อสินค้าสำหรับตารางสินค้า
+
+สินค้าที่มีฟิลด์ "image" (ตำแหน่งไฟล์ภาพ เช่น images/water.jpg) จะแสดงภาพย่อบนปุ่ม
+ภาพต้นฉบับถูกเปิดและย่อในเธรดพื้นหลังเท่านั้น แล้วเก็บเป็น PNG ใน data/thumbnails
+ตั้งชื่อตาม SHA-1 ของเนื้อไฟล์ต้นฉบับและขนาด ภาพเดียวกันจึงย่อครั้งเดียวแม้เปิดโปรแกรมใหม่
+เธรดของ Tk สร้างเฉพาะ PhotoImage จากภาพย่อที่เปิดไว้แล้ว และเก็บแบบ LRU ตามงบหน่วยความจำ
+"""
+
+import collections
+import concurrent.futures
+import hashlib
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+from metrics import metrics
+
+
+class ThumbnailStore:
+    """ภาพย่อบนดิสก์ (ใช้จากหลายเธรดได้)
+
+    index.json จำ SHA-1 ของไฟล์ต้นฉบับตามตำแหน่ง เวลาแก้ไข และขนาดไฟล์
+    ไฟล์ที่ไม่เปลี่ยนจึงไม่ต้องอ่านทั้งไฟล์เพื่อหา hash ใหม่ทุกครั้งที่เปิดโปรแกรม
+    """
+
+    def __init__(self, cache_dir='data/thumbnails', max_bytes=200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self._lock = threading.Lock()
+        self._index = {}        # ตำแหน่งไฟล์ต้นฉบับ -> [mtime_ns, ขนาด, sha1]
+        self._index_changed = False
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                self._index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def source_hash(self, source):
+        stat = os.stat(source)
+        key = os.path.abspath(source)
+        with self._lock:
+            entry = self._index.get(key)
+        if entry is not None and entry[0] == stat.st_mtime_ns and entry[1] == stat.st_size:
+            return entry[2]
+        digest = hashlib.sha1()
+        with open(source, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        with self._lock:
+            self._index[key] = [stat.st_mtime_ns, stat.st_size, digest.hexdigest()]
+            self._index_changed = True
+        return digest.hexdigest()
+
+    def path_for(self, digest, size):
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}-{size[0]}x{size[1]}.png")
+
+    def thumbnail(self, source, size):
+        """ตำแหน่งภาพย่อของ source ขนาดไม่เกิน size (กว้าง, สูง) สร้างถ้ายังไม่มี"""
+        path = self.path_for(self.source_hash(source), size)
+        try:
+            os.utime(path)      # ใช้ล่าสุด สำหรับ prune
+            metrics.count('thumbnail_disk_hits')
+            return path
+        except FileNotFoundError:
+            pass                # ยังไม่มี หรือ prune เพิ่งลบไป: สร้างใหม่
+
+        from PIL import Image
+
+        metrics.count('thumbnail_misses')
+        with metrics.timer('thumbnail_make'):
+            with Image.open(source) as image:
+                # JPEG ถอดรหัสที่ความละเอียดต่ำได้เลย (เร็วกว่าเปิดเต็มขนาดแล้วย่อหลายเท่า)
+                image.draft('RGB', (size[0] * 2, size[1] * 2))
+                image = image.convert('RGBA')
+                image.thumbnail(size, Image.Resampling.LANCZOS)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                image.save(tmp_path, 'PNG')
+                os.replace(tmp_path, path)
+        return path
+
+    def load(self, source, size):
+        """เปิดภาพย่อเป็น PIL Image (อ่านข้อมูลครบแล้ว ส่งข้ามเธรดได้)"""
+        from PIL import Image
+
+        try:
+            image = Image.open(self.thumbnail(source, size))
+        except FileNotFoundError:
+            # prune ลบไฟล์ระหว่างสร้างกับเปิด: สร้างใหม่อีกครั้ง
+            image = Image.open(self.thumbnail(source, size))
+        with image:
+            image.load()
+            return image
+
+    def prune(self):
+        """ลบภาพย่อที่ไม่ได้ใช้นานที่สุดจนขนาดรวมไม่เกิน max_bytes คืนค่าจำนวนไฟล์ที่ลบ"""
+        files = []
+        for folder, _, names in os.walk(self.cache_dir):
+            for name in names:
+                if name.endswith('.png'):
+                    path = os.path.join(folder, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        removed = 0
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def save_index(self):
+        with self._lock:
+            if not self._index_changed:
+                return
+            data = dict(self._index)
+            self._index_changed = False
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.index_path)
+
+
+class ThumbnailCache:
+    """PhotoImage ของภาพย่อสินค้า: LRU ในหน่วยความจำตามงบ budget_bytes และสร้างภาพในเธรดพื้นหลัง
+
+    request() คืนค่าภาพทันทีถ้าอยู่ในหน่วยความจำ ไม่เช่นนั้นส่งงานเข้าเธรดพื้นหลัง
+    แล้วเรียก callback(source, photo) บนเธรดของ Tk เมื่อภาพพร้อม
+    """
+
+    POLL_INTERVAL_MS = 30
+    # ภาพที่สร้างไม่สำเร็จจะลองใหม่เมื่อขอครั้งถัดไปหลังผ่านไปกี่วินาที (เช่นเพิ่งคัดลอกไฟล์ภาพมา)
+    RETRY_AFTER = 60.0
+
+    def __init__(self, root, store, size=(64, 64), budget_bytes=16 * 1024 * 1024, workers=2):
+        self.root = root
+        self.store = store
+        self.size = size
+        self.budget_bytes = budget_bytes
+        self.memory_bytes = 0
+        self._photos = collections.OrderedDict()    # source -> (PhotoImage, ไบต์โดยประมาณ)
+        self._waiting = {}                          # source -> (future, [callback])
+        self._failed = {}                           # source -> เวลาที่ล้มเหลว (time.monotonic)
+        self._results = queue.Queue()
+        self._polling = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="thumbnail")
+        self._executor.submit(store.prune)
+
+    def request(self, source, callback):
+        entry = self._photos.get(source)
+        if entry is not None:
+            self._photos.move_to_end(source)
+            metrics.count('thumbnail_memory_hits')
+            return entry[0]
+        failed_at = self._failed.get(source)
+        if failed_at is not None and time.monotonic() - failed_at < self.RETRY_AFTER:
+            return None
+        waiting = self._waiting.get(source)
+        if waiting is not None:
+            waiting[1].append(callback)
+            return None
+
+        future = self._executor.submit(self.store.load, source, self.size)
+        self._waiting[source] = (future, [callback])
+        future.add_done_callback(lambda f: self._results.put((source, f)))
+        self._schedule_poll()
+        return None
+
+    def cancel_except(self, sources):
+        """ยกเลิกงานที่ยังไม่เริ่มของภาพที่ไม่อยู่ใน sources (เช่นเลื่อนผ่านไปแล้ว)"""
+        for source, (future, _) in list(self._waiting.items()):
+            if source not in sources and future.cancel():
+                del self._waiting[source]
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        self._polling = False
+        while True:
+            try:
+                source, future = self._results.get_nowait()
+            except queue.Empty:
+                break
+            waiting = self._waiting.get(source)
+            if waiting is None or waiting[0] is not future:
+                continue    # งานที่ถูกยกเลิก (อาจขอภาพเดิมใหม่แล้ว)
+            del self._waiting[source]
+            error = future.exception()
+            if error is not None:
+                # ไฟล์หายหรือไม่ใช่ภาพ: แสดงปุ่มแบบข้อความแทน และลองใหม่หลัง RETRY_AFTER วินาที
+                if source not in self._failed:
+                    print(f"สร้างภาพย่อ {source} ไม่สำเร็จ: {error}", file=sys.stderr)
+                self._failed[source] = time.monotonic()
+                metrics.count('thumbnail_errors')
+                continue
+            self._failed.pop(source, None)
+            # PhotoImage ต้องสร้างบนเธรดของ Tk (ภาพย่อเล็ก ใช้เวลาไม่มาก)
+            from PIL import ImageTk
+
+            image = future.result()
+            photo = ImageTk.PhotoImage(image)
+            self._remember(source, photo, image.width * image.height * 4)
+            for callback in waiting[1]:
+                callback(source, photo)
+        if self._waiting:
+            self._schedule_poll()
+
+    def _remember(self, source, photo, size):
+        self._photos[source] = (photo, size)
+        self.memory_bytes += size
+        # ภาพที่ถูกนำออกยังแสดงบนปุ่มได้ (ปุ่มถือ reference ไว้) จนกว่าจะเปลี่ยนภาพ
+        while self.memory_bytes > self.budget_bytes and len(self._photos) > 1:
+            _, (_, evicted) = self._photos.popitem(last=False)
+            self.memory_bytes -= evicted
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            self.store.save_index()
+        except OSError:
+            pass
+
+
+def warm(products, store, size=(64, 64), workers=4):
+    """สร้างภาพย่อของสินค้าทั้งหมดล่วงหน้า คืนค่า (จำนวนภาพ, จำนวนที่ผิดพลาด)"""
+    sources = sorted({product['image'] for product in products if product.get('image')})
+    errors = 0
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        for future in [executor.submit(store.thumbnail, source, size) for source in sources]:
+            try:
+                future.result()
+            except Exception:
+                errors += 1
+    store.save_index()
+    return len(sources), errors
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from product_catalog import ProductCatalog
+
+    parser = argparse.ArgumentParser(description="สร้างภาพย่อสินค้าล่วงหน้า (และวัดเวลา)")
+    parser.add_argument("--products", default="data/products.json")
+    parser.add_argument("--cache-dir", default="data/thumbnails")
+    parser.add_argument("--size", type=int, default=64, help="ขนาดภาพย่อ (พิกเซล)")
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    catalog = ProductCatalog.load(args.products)
+    started = time.perf_counter()
+    count, errors = warm(catalog.products, ThumbnailStore(args.cache_dir), (args.size, args.size),
+                         args.workers)
+    elapsed = time.perf_counter() - started
+    print(f"ภาพย่อ {count:,} ภาพ ผิดพลาด {errors} ภาพ ใน {elapsed:.2f} วินาที")
+    for name, timing in metrics.snapshot()['timings'].items():
+        print(f"  {name:16s} {timing['count']:6,} ครั้ง  p50 {timing['p50_ms']:8.2f} ms  "
+              f"p95 {timing['p95_ms']:8.2f} ms")
+    for name, value in metrics.snapshot()['counters'].items():
+        print(f"  {name:16s} {value:,}")